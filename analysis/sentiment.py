@@ -5,11 +5,30 @@ import pandas as pd
 import os
 from database.models import Comment
 from database.db_manager import DatabaseManager
+from database.rollups import length_bucket
 import matplotlib.pyplot as plt
 from wordcloud import WordCloud
 import jieba
 import re
 
+# 情感打分模型版本，修改打分方式或正负面阈值后加一，已保存的得分随之在下次分析时重新计算
+SENTIMENT_VERSION = 1
+
+# 词云停用词
+STOP_WORDS = set([
+    '的', '了', '和', '是', '就', '都', '而', '及', '与', '着',
+    '之', '在', '也', '这', '那', '有', '我', '你', '他', '她',
+    '它', '们', '个', '上', '下', '不', '没', '很', '到', '去',
+    '又', '这个', '那个', '这样', '那样', '什么', '为什么', '怎么',
+    '电影', '片子', '剧情', '感觉', '觉得', '认为', '还是', '比较',
+    '一个', '一部', '这部', '这种', '那种', '一样', '这么', '那么',
+    '挺', '真的', '确实', '其实', '可能', '应该', '一直', '一定',
+    '但是', '因为', '所以', '如果', '虽然', '就是', '只是', '但',
+    '啊', '吧', '啦', '呢', '呀', '了', '哦', '哈', '嗯', '噢',
+    '的话', '来说', '而且', '只有', '由于', '一些', '一下', '一点',
+    '看', '说', '讲', '写', '想', '做', '看到', '听到', '说到'
+])
+
 class SentimentAnalyzer:
     def __init__(self, db_manager: DatabaseManager):
         self.db_manager = db_manager
@@ -26,16 +45,11 @@ class SentimentAnalyzer:
     def analyze_movie(self, movie_id: str) -> Dict[str, Any]:
         """分析电影评论"""
         try:
-            comments = self.db_manager.get_movie_comments(movie_id)
-            if not comments:
-                raise ValueError("没有找到任何评论数据")
+            # 只给未打分或打分版本过期的评论打分，其余直接使用已保存的得分
+            self._score_comments(movie_id)
             
-            movie_dir = os.path.join(self.static_dir, str(movie_id))
-            os.makedirs(movie_dir, exist_ok=True)
-            
-            # 评论文本和时间列表
-            comment_texts = []
-            comment_dates = []
+            # 逐行统计，不保留评论文本，内存占用与评论数无关
+            row_count = 0
             
             # 情感分析统计
             sentiment_results = {
@@ -58,31 +72,31 @@ class SentimentAnalyzer:
             
             # 热门词统计
             word_freq = {}
+            # 词云词频（过滤停用词）
+            cloud_freq = {}
             
-            for comment in comments:
+            columns = ('comment_text', 'date', 'sentiment', 'sentiment_score')
+            for comment in self.db_manager.iter_movie_comments(movie_id, columns):
+                row_count += 1
                 if comment.comment_text:
                     text = comment.comment_text.strip()
-                    comment_texts.append(text)
                     
-                    # 统计评论长度
-                    text_length = len(text)
-                    if text_length < 50:
-                        length_stats['short'] += 1
-                    elif text_length < 200:
-                        length_stats['medium'] += 1
-                    else:
-                        length_stats['long'] += 1
+                    # 统计评论长度，分组与每日统计一致
+                    length_stats[length_bucket(comment.comment_text)] += 1
                     
                     # 统计发布时间
                     if comment.date:
-                        comment_dates.append(comment.date)
                         hour = comment.date.hour
                         time_distribution[str(hour)] += 1
                     
-                    # 情感分析
-                    analysis = self._analyze_comment(text)
-                    sentiment = analysis['sentiment']
-                    score = analysis['score']
+                    # 情感分析结果已由_score_comments保存
+                    if comment.sentiment_score is not None:
+                        sentiment = comment.sentiment
+                        score = comment.sentiment_score
+                    else:
+                        analysis = self._analyze_comment(text)
+                        sentiment = analysis['sentiment']
+                        score = analysis['score']
                     
                     sentiment_results['total'] += 1
                     sentiment_results['avg_score'] += score
@@ -94,15 +108,22 @@ class SentimentAnalyzer:
                     else:
                         sentiment_results['neutral'] += 1
                     
-                    # 分词统计
-                    words = jieba.cut(text)
-                    for word in words:
+                    # 分词统计，同一次分词结果同时用于热门词和词云
+                    for word in jieba.cut(text):
                         if len(word) > 1:  # 排除单字词
                             word_freq[word] = word_freq.get(word, 0) + 1
+                        if self._is_cloud_word(word):
+                            word = word.strip()
+                            cloud_freq[word] = cloud_freq.get(word, 0) + 1
             
-            if not comment_texts:
+            if not row_count:
+                raise ValueError("没有找到任何评论数据")
+            if not sentiment_results['total']:
                 raise ValueError("没有有效的评论文本")
             
+            movie_dir = os.path.join(self.static_dir, str(movie_id))
+            os.makedirs(movie_dir, exist_ok=True)
+            
             # 计算平均情感得分
             sentiment_results['avg_score'] /= sentiment_results['total']
             
@@ -110,7 +131,11 @@ class SentimentAnalyzer:
             top_words = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)[:10]
             
             # 生成各种可视化
-            self._generate_wordcloud(comment_texts, os.path.join(movie_dir, 'wordcloud.png'))
+            if not cloud_freq:
+                # 如果过滤太严格，退回到简单的分词结果
+                self.logger.warning("过滤后没有剩余词语，使用原始分词结果")
+                cloud_freq = word_freq
+            self._generate_wordcloud(cloud_freq, os.path.join(movie_dir, 'wordcloud.png'))
             self._generate_sentiment_chart(sentiment_results, os.path.join(movie_dir, 'sentiment.png'))
             self._generate_time_distribution(time_distribution, os.path.join(movie_dir, 'time_dist.png'))
             self._generate_length_distribution(length_stats, os.path.join(movie_dir, 'length_dist.png'))
@@ -134,6 +159,47 @@ class SentimentAnalyzer:
             self.logger.error(f"电影评论分析失败: {str(e)}")
             raise
     
+    def _score_comments(self, movie_id: str) -> int:
+        """
+        给未打分或打分版本过期的评论打分，每批分块写回数据库
+        :return: 本次打分的评论数
+        """
+        scored = 0
+        while True:
+            rows = self.db_manager.get_unscored_comments(movie_id, SENTIMENT_VERSION)
+            if not rows:
+                break
+            
+            scores = []
+            for comment_id, text in rows:
+                text = (text or '').strip()
+                if text:
+                    analysis = self._analyze_comment(text)
+                    scores.append({'id': comment_id, 'sentiment': analysis['sentiment'], 'score': analysis['score']})
+                else:
+                    # 空评论也记录版本，之后不再读取
+                    scores.append({'id': comment_id, 'sentiment': None, 'score': None})
+            
+            if not self.db_manager.update_comment_sentiments(scores, SENTIMENT_VERSION):
+                # 这批评论已被删除，避免反复读取同一批
+                break
+            scored += len(scores)
+        
+        if scored:
+            self.logger.info(f"电影{movie_id}新打分{scored}条评论")
+        return scored
+    
+    @staticmethod
+    def _is_cloud_word(word: str) -> bool:
+        """词语是否进入词云"""
+        word = word.strip()
+        return all([
+            len(word) > 1,  # 过滤单字
+            word not in STOP_WORDS,  # 过滤停用词
+            not word.isdigit(),  # 过滤纯数字
+            not bool(re.search(r'^[a-zA-Z0-9_]+$', word))  # 过滤纯英文和数字组合
+        ])
+    
     def _analyze_comment(self, text: str) -> Dict[str, Any]:
         """分析单条评论的情感倾向"""
         try:
@@ -156,48 +222,12 @@ class SentimentAnalyzer:
             self.logger.error(f"情感分析失败: {str(e)}")
             return {'score': 0.5, 'sentiment': '中性'}
     
-    def _generate_wordcloud(self, texts: List[str], save_path: str) -> None:
-        """生成词云图"""
+    def _generate_wordcloud(self, frequencies: Dict[str, int], save_path: str) -> None:
+        """根据词频生成词云图"""
         try:
-            # 合并所有评论文本
-            text = ' '.join(texts)
-            
-            # 停用词列表
-            stop_words = set([
-                '的', '了', '和', '是', '就', '都', '而', '及', '与', '着',
-                '之', '在', '也', '这', '那', '有', '我', '你', '他', '她',
-                '它', '们', '个', '上', '下', '不', '没', '很', '到', '去',
-                '又', '这个', '那个', '这样', '那样', '什么', '为什么', '怎么',
-                '电影', '片子', '剧情', '感觉', '觉得', '认为', '还是', '比较',
-                '一个', '一部', '这部', '这种', '那种', '一样', '这么', '那么',
-                '挺', '真的', '确实', '其实', '可能', '应该', '一直', '一定',
-                '但是', '因为', '所以', '如果', '虽然', '就是', '只是', '但',
-                '啊', '吧', '啦', '呢', '呀', '了', '哦', '哈', '嗯', '噢',
-                '的话', '来说', '而且', '只有', '由于', '一些', '一下', '一点',
-                '看', '说', '讲', '写', '想', '做', '看到', '听到', '说到'
-            ])
-            
-            # 分词并过滤
-            words = []
-            for word in jieba.cut(text):
-                if all([
-                    len(word.strip()) > 1,  # 过滤单字
-                    word.strip() not in stop_words,  # 过滤停用词
-                    not word.isdigit(),  # 过滤纯数字
-                    not bool(re.search(r'^[a-zA-Z0-9_]+$', word.strip()))  # 过滤纯英文和数字组合
-                ]):
-                    words.append(word.strip())
-            
-            if not words:
-                self.logger.warning("过滤后没有剩余词语，使用原始分词结果")
-                # 如果过滤太严格，退回到简单的分词结果
-                words = [word for word in jieba.cut(text) if len(word.strip()) > 1]
-            
-            if not words:
+            if not frequencies:
                 raise ValueError("无法提取有效词语，可能评论内容过短或无效")
             
-            word_space_split = ' '.join(words)
-            
             # 生成词云
             wordcloud = WordCloud(
                 font_path='simhei.ttf',
@@ -209,7 +239,7 @@ class SentimentAnalyzer:
                 max_font_size=80,
                 random_state=42,  # 固定随机状态，使每次生成的词云位置相对固定
                 collocations=False  # 避免词语重复
-            ).generate(word_space_split)
+            ).generate_from_frequencies(frequencies)
             
             # 绘制词云图
             plt.figure(figsize=(10, 5))
@@ -37,19 +37,16 @@ class DataVisualizer:
         except Exception as e:
             self.logger.error(f"绘制评分分布图失败: {str(e)}")
     
-    def plot_genre_statistics(self, movies: List[Movie], save_path: str = None):
+    def plot_genre_statistics(self, save_path: str = None):
         """绘制电影类型统计图"""
         try:
-            # 统计各类型电影数量
-            genre_counter = Counter()
-            for movie in movies:
-                genres = movie.genre.split('/')
-                genre_counter.update(genres)
+            # 各类型电影数量由数据库按类型分组统计
+            genre_counts = self.db_manager.get_genre_counts()
             
             # 绘制柱状图
             plt.figure(figsize=(12, 6))
-            genres = list(genre_counter.keys())
-            counts = list(genre_counter.values())
+            genres = [item['genre'] for item in genre_counts]
+            counts = [item['count'] for item in genre_counts]
             
             plt.bar(genres, counts)
             plt.title('电影类型分布')
@@ -100,11 +97,12 @@ class DataVisualizer:
     def plot_sentiment_analysis(self, movie_id: int, save_path: str = None):
         """绘制情感分析结果图"""
         try:
-            comments = self.db_manager.get_movie_comments(movie_id)
-            sentiments = [comment.sentiment for comment in comments if comment.sentiment]
-            
-            # 统计各情感类型数量
-            sentiment_counts = Counter(sentiments)
+            # 只读取情感列，边读边计数
+            sentiment_counts = Counter(
+                comment.sentiment
+                for comment in self.db_manager.iter_movie_comments(movie_id, ('sentiment',))
+                if comment.sentiment
+            )
             
             # 绘制饼图
             plt.figure(figsize=(8, 8))
@@ -0,0 +1,152 @@
+"""
+离线抓取基准
+在录制的HTTP档案上回放MovieCrawler和CommentCrawler的评论抓取，
+不访问网络，测量吞吐、并发和限流行为，可注入延迟、连接失败和429
+
+用法:
+    python -m benchmarks.crawl_benchmark seed [--pages N]            从fixtures中的页面样本构造档案
+    python -m benchmarks.crawl_benchmark record ID [ID ...]          在线抓取并录制
+    python -m benchmarks.crawl_benchmark replay [ID ...] [--latency S] [--failure-rate P] ...
+"""
+from typing import List, Dict, Any
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config.config import Config
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+def _fixture_ids(fixtures_dir: str) -> List[str]:
+    """有评论页样本的豆瓣ID"""
+    paths = glob.glob(os.path.join(fixtures_dir, 'comments_*.html'))
+    return sorted(re.search(r'_(\d+)\.html$', path).group(1) for path in paths)
+
+def seed(args):
+    """用保存的页面样本构造档案，每部电影的各页评论使用同一个样本"""
+    from crawler.http_archive import HttpArchive
+    from crawler.movie_crawler import MovieCrawler
+    import requests
+
+    archive = HttpArchive(args.archive)
+    crawler = MovieCrawler(None)
+    for path in glob.glob(os.path.join(args.fixtures, '*_*.html')):
+        kind, douban_id = re.search(r'(\w+?)_(\d+)\.html$', os.path.basename(path)).groups()
+        with open(path, 'rb') as f:
+            body = f.read()
+        headers = {'Content-Type': 'text/html; charset=utf-8'}
+        if kind == 'subject':
+            archive.add(crawler._detail_request(douban_id)['url'], body, headers=headers)
+        elif kind == 'comments':
+            for page in range(args.pages):
+                for sort in ('new_score', 'time'):
+                    request = crawler._comment_page_request(douban_id, page, sort)
+                    url = requests.Request('GET', request['url'], params=request['params']).prepare().url
+                    archive.add(url, body, headers=headers)
+    print(f"档案 {args.archive} 共 {archive.count()} 条响应")
+
+def record(args):
+    """在线抓取详情和评论页并录制"""
+    Config.HTTP_ARCHIVE_MODE = 'record'
+    Config.HTTP_ARCHIVE_PATH = args.archive
+    from crawler.movie_crawler import MovieCrawler
+
+    crawler = MovieCrawler(None)
+    for douban_id in args.douban_ids:
+        crawler.get_movie_detail(douban_id)
+        comments = crawler.get_movie_comments(douban_id, max_pages=args.pages)
+        print(f"{douban_id}: 录制 {len(comments)} 条评论")
+
+def _run_case(name: str, douban_ids: List[str], crawl) -> Dict[str, Any]:
+    """运行一组抓取并统计"""
+    start = time.perf_counter()
+    comments = sum(len(crawl(douban_id)) for douban_id in douban_ids)
+    elapsed = time.perf_counter() - start
+    return {'name': name, 'elapsed': elapsed, 'comments': comments}
+
+def replay(args):
+    """在档案上回放抓取"""
+    Config.HTTP_ARCHIVE_MODE = 'replay'
+    Config.HTTP_ARCHIVE_PATH = args.archive
+    Config.HTTP_ARCHIVE_LATENCY = args.latency
+    Config.HTTP_ARCHIVE_JITTER = args.jitter
+    Config.HTTP_ARCHIVE_FAILURE_RATE = args.failure_rate
+    Config.HTTP_ARCHIVE_BLOCK_RATE = args.block_rate
+    # 覆盖起始值时同时放宽上限，否则自适应限流第一次加速就会把速率压回上限
+    if args.rate is not None:
+        Config.CRAWL_RATE = args.rate
+        Config.CRAWL_MAX_RATE = max(Config.CRAWL_MAX_RATE, args.rate)
+    if args.burst is not None:
+        Config.CRAWL_BURST = args.burst
+    if args.concurrency is not None:
+        Config.CRAWL_CONCURRENCY = args.concurrency
+        Config.CRAWL_MAX_CONCURRENCY = max(Config.CRAWL_MAX_CONCURRENCY, args.concurrency)
+    from crawler.movie_crawler import MovieCrawler
+    from crawler.comment_crawler import CommentCrawler
+    from crawler.transport import get_transport
+
+    douban_ids = args.douban_ids or _fixture_ids(FIXTURES_DIR)
+    if not douban_ids:
+        print("没有指定豆瓣ID，fixtures中也没有评论页样本")
+        return
+
+    movie_crawler = MovieCrawler(None)
+    comment_crawler = CommentCrawler()
+    results = [
+        _run_case('MovieCrawler.get_movie_comments', douban_ids,
+                  lambda douban_id: movie_crawler.get_movie_comments(douban_id, max_pages=args.pages)),
+        _run_case('CommentCrawler.crawl', douban_ids,
+                  lambda douban_id: comment_crawler.crawl(douban_id, max_pages=args.pages)),
+    ]
+
+    print(f"{'抓取路径':<36}{'耗时(s)':>10}{'评论数':>10}{'评论/秒':>10}")
+    for result in results:
+        throughput = result['comments'] / result['elapsed'] if result['elapsed'] else 0
+        print(f"{result['name']:<36}{result['elapsed']:>10.2f}{result['comments']:>10}{throughput:>10.1f}")
+
+    stats = get_transport().stats()
+    print(f"回放统计: {stats['replay']}")
+    for host, throttle in (stats['throttle'] or {}).items():
+        print(f"{host} 限流: {throttle}")
+
+def main():
+    parser = argparse.ArgumentParser(description='在录制的HTTP档案上离线测量抓取吞吐')
+    parser.add_argument('--archive', default=Config.HTTP_ARCHIVE_PATH, help='档案文件路径')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    seed_parser = subparsers.add_parser('seed', help='从页面样本构造档案')
+    seed_parser.add_argument('--fixtures', default=FIXTURES_DIR, help='HTML样本目录')
+    seed_parser.add_argument('--pages', type=int, default=5, help='每部电影构造的评论页数')
+    seed_parser.set_defaults(func=seed)
+
+    record_parser = subparsers.add_parser('record', help='在线抓取并录制')
+    record_parser.add_argument('douban_ids', nargs='+', help='豆瓣电影ID')
+    record_parser.add_argument('--pages', type=int, default=5, help='每部电影抓取的评论页数')
+    record_parser.set_defaults(func=record)
+
+    replay_parser = subparsers.add_parser('replay', help='回放档案并测量')
+    replay_parser.add_argument('douban_ids', nargs='*', help='豆瓣电影ID，默认使用fixtures中的样本')
+    replay_parser.add_argument('--pages', type=int, default=5, help='每部电影抓取的评论页数')
+    replay_parser.add_argument('--latency', type=float, default=Config.HTTP_ARCHIVE_LATENCY,
+                               help='每个请求的延迟(秒)，负数使用录制时的耗时')
+    replay_parser.add_argument('--jitter', type=float, default=Config.HTTP_ARCHIVE_JITTER, help='延迟随机浮动(秒)')
+    replay_parser.add_argument('--failure-rate', type=float, default=Config.HTTP_ARCHIVE_FAILURE_RATE,
+                               help='注入连接失败的概率')
+    replay_parser.add_argument('--block-rate', type=float, default=Config.HTTP_ARCHIVE_BLOCK_RATE,
+                               help='注入429的概率')
+    replay_parser.add_argument('--rate', type=float, help='覆盖CRAWL_RATE')
+    replay_parser.add_argument('--burst', type=float, help='覆盖CRAWL_BURST')
+    replay_parser.add_argument('--concurrency', type=int, help='覆盖CRAWL_CONCURRENCY')
+    replay_parser.set_defaults(func=replay)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == '__main__':
+    main()
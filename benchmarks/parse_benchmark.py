@@ -0,0 +1,166 @@
+"""
+页面解析性能对比
+比较原BeautifulSoup(html.parser)实现与crawler.parsers中lxml预编译XPath实现
+在保存的HTML样本上的单页解析耗时，并校验两者输出一致
+
+用法: python -m benchmarks.parse_benchmark [--fixtures DIR] [--rounds N]
+样本文件按前缀区分页面类型: comments_*.html 为短评页，subject_*.html 为详情页
+"""
+from typing import List, Dict, Any, Optional, Callable
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from bs4 import BeautifulSoup
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from crawler.parsers import parse_comment_page, parse_movie_detail
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+def legacy_parse_comment_page(html: str) -> Optional[List[Dict[str, Any]]]:
+    """原MovieCrawler.get_movie_comments中的解析逻辑"""
+    soup = BeautifulSoup(html, 'html.parser')
+    comment_items = soup.find_all('div', class_='comment-item')
+    if not comment_items:
+        return None
+
+    comments = []
+    for item in comment_items:
+        try:
+            user = item.find('span', class_='comment-info').find('a').text.strip()
+            comment_text = item.find('span', class_='short').text.strip()
+            date_str = item.find('span', class_='comment-time').get('title', '').strip()
+            if not date_str:
+                date_str = item.find('span', class_='comment-time').text.strip()
+            try:
+                date = datetime.strptime(date_str, '%Y-%m-%d %H:%M:%S')
+            except ValueError:
+                try:
+                    date = datetime.strptime(date_str, '%Y-%m-%d')
+                except ValueError:
+                    date = datetime.strptime(date_str.split()[0], '%Y-%m-%d')
+            if comment_text.strip():
+                comments.append({
+                    'user': user,
+                    'comment_text': comment_text,
+                    'date': date,
+                    'sentiment': None
+                })
+        except Exception:
+            continue
+    return comments
+
+def legacy_parse_movie_detail(html: str, douban_id: str) -> Dict[str, Any]:
+    """原MovieCrawler.get_movie_detail中的解析逻辑"""
+    soup = BeautifulSoup(html, 'html.parser')
+
+    name = soup.select_one('meta[property="og:title"]')['content']
+    img_url = soup.select_one('meta[property="og:image"]')['content']
+    if img_url:
+        img_url = img_url.replace('s_ratio', 'l_ratio')
+        img_url = img_url.replace('img1.doubanio.com', 'img9.doubanio.com')
+        img_url = img_url.replace('img2.doubanio.com', 'img9.doubanio.com')
+        img_url = img_url.replace('img3.doubanio.com', 'img9.doubanio.com')
+
+    year = None
+    sub_title = ''
+    title_element = soup.select_one('#content h1')
+    if title_element:
+        year_match = re.search(r'\((\d{4})\)', title_element.text)
+        if year_match:
+            year = year_match.group(1)
+            name = re.sub(r'\s*\(\d{4}\)\s*', '', name)
+        spans = title_element.select('span.year')
+        if len(spans) > 0:
+            title_text = title_element.text.replace(spans[0].text, '').strip()
+            if name in title_text:
+                sub_title = title_text.replace(name, '').strip()
+
+    director = soup.select_one('a[rel="v:directedBy"]')
+    director = director.text.strip() if director else '未知'
+
+    rating_element = soup.select_one('#interest_sectl strong.rating_num')
+    rating = float(rating_element.text.strip()) if rating_element else None
+
+    actors_element = soup.select('a[rel="v:starring"]')
+    actors = '/'.join([actor.text.strip() for actor in actors_element[:3]]) if actors_element else ''
+
+    genre_elements = soup.select('span[property="v:genre"]')
+    genre = '/'.join([g.text.strip() for g in genre_elements]) if genre_elements else ''
+
+    release_date = soup.select_one('span[property="v:initialReleaseDate"]')
+    release_date = datetime.strptime(release_date.text.split('(')[0], '%Y-%m-%d') if release_date else None
+
+    return {
+        'douban_id': douban_id,
+        'name': name,
+        'rating': rating,
+        'director': director,
+        'actors': actors,
+        'genre': genre,
+        'release_date': release_date,
+        'img_url': img_url,
+        'year': year,
+        'sub_title': sub_title
+    }
+
+def _time_per_page(func: Callable[[], Any], rounds: int) -> float:
+    """多轮运行取单页平均耗时(毫秒)"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - start) * 1000 / rounds
+
+def _douban_id(path: str) -> str:
+    """从样本文件名中取豆瓣ID"""
+    match = re.search(r'_(\d+)\.html$', path)
+    return match.group(1) if match else ''
+
+def run(fixtures_dir: str, rounds: int) -> List[Dict[str, Any]]:
+    """运行全部样本，返回每个样本的对比结果"""
+    results = []
+    cases = [
+        ('comments_*.html', lambda html, path: legacy_parse_comment_page(html.decode('utf-8')),
+         lambda html, path: parse_comment_page(html)),
+        ('subject_*.html', lambda html, path: legacy_parse_movie_detail(html.decode('utf-8'), _douban_id(path)),
+         lambda html, path: parse_movie_detail(html, _douban_id(path))),
+    ]
+    for pattern, legacy, current in cases:
+        for path in sorted(glob.glob(os.path.join(fixtures_dir, pattern))):
+            with open(path, 'rb') as f:
+                html = f.read()
+            legacy_output = legacy(html, path)
+            current_output = current(html, path)
+            results.append({
+                'fixture': os.path.basename(path),
+                'legacy_ms': _time_per_page(lambda: legacy(html, path), rounds),
+                'lxml_ms': _time_per_page(lambda: current(html, path), rounds),
+                'same_output': legacy_output == current_output
+            })
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='对比页面解析吞吐')
+    parser.add_argument('--fixtures', default=FIXTURES_DIR, help='HTML样本目录')
+    parser.add_argument('--rounds', type=int, default=50, help='每个样本的解析轮数')
+    args = parser.parse_args()
+
+    results = run(args.fixtures, args.rounds)
+    if not results:
+        print(f"{args.fixtures} 中没有找到样本")
+        return
+
+    print(f"{'样本':<32}{'原实现(ms/页)':>14}{'lxml(ms/页)':>14}{'加速':>8}{'输出一致':>10}")
+    for result in results:
+        speedup = result['legacy_ms'] / result['lxml_ms'] if result['lxml_ms'] else 0
+        print(f"{result['fixture']:<32}{result['legacy_ms']:>14.2f}{result['lxml_ms']:>14.2f}"
+              f"{speedup:>7.1f}x{str(result['same_output']):>10}")
+
+if __name__ == '__main__':
+    main()
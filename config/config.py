@@ -11,17 +11,117 @@ class Config:
     MYSQL_USER = os.getenv('MYSQL_USER', 'root')
     MYSQL_PASSWORD = os.getenv('MYSQL_PASSWORD', '')
     MYSQL_DATABASE = os.getenv('MYSQL_DATABASE', 'douban_movie')
+    DATABASE_URL = os.getenv(
+        'DATABASE_URL',
+        f'mysql+pymysql://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DATABASE}?charset=utf8mb4'
+    )  # 应用和迁移共用的连接串，也可以是 sqlite:///data/douban_movie.db 或内存库 sqlite://
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))              # 连接池常驻连接数
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 10))       # 连接池允许临时超出的连接数
+    DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', 30))       # 等待空闲连接的超时(秒)
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 3600))     # 连接最长使用时间(秒)，避免被MySQL超时断开
+    SQLITE_BUSY_TIMEOUT = float(os.getenv('SQLITE_BUSY_TIMEOUT', 30))  # SQLite等待写锁的时间(秒)
+    DB_BULK_CHUNK_SIZE = int(os.getenv('DB_BULK_CHUNK_SIZE', 500))  # 批量写入时每条INSERT的行数
+    DB_STREAM_BATCH_SIZE = int(os.getenv('DB_STREAM_BATCH_SIZE', 1000))  # 流式读取时每次从游标取的行数
+    
+    # 数据库读缓存配置（电影列表、分析结果，写入时按键失效）
+    QUERY_CACHE_SIZE = int(os.getenv('QUERY_CACHE_SIZE', 1000))                   # 进程内最多缓存的键数
+    QUERY_CACHE_MOVIES_TTL = float(os.getenv('QUERY_CACHE_MOVIES_TTL', 300))      # 电影列表缓存时间(秒)，0表示不缓存
+    QUERY_CACHE_ANALYSIS_TTL = float(os.getenv('QUERY_CACHE_ANALYSIS_TTL', 3600)) # 分析结果缓存时间(秒)，0表示不缓存
+    QUERY_CACHE_SEARCH_TTL = float(os.getenv('QUERY_CACHE_SEARCH_TTL', 300))     # 评论检索统计（已索引评论数）缓存时间(秒)
+    QUERY_CACHE_SHARED = os.getenv('QUERY_CACHE_SHARED', '0') == '1'              # 多进程共用本地sqlite缓存
+    QUERY_CACHE_PATH = os.getenv('QUERY_CACHE_PATH', '.cache/query_cache.sqlite') # 共享缓存文件
+    
+    # 评论全文检索配置
+    COMMENT_SEARCH_PAGE_SIZE = int(os.getenv('COMMENT_SEARCH_PAGE_SIZE', 20))         # 默认每页条数
+    COMMENT_SEARCH_MAX_PAGE_SIZE = int(os.getenv('COMMENT_SEARCH_MAX_PAGE_SIZE', 100)) # 每页最多条数
+    COMMENT_SEARCH_MAX_TERMS = int(os.getenv('COMMENT_SEARCH_MAX_TERMS', 10))          # 查询最多使用的词数
     
     # 爬虫配置
     CRAWL_INTERVAL = int(os.getenv('CRAWL_INTERVAL', 1))  # 爬虫间隔(秒)
     MAX_THREADS = int(os.getenv('MAX_THREADS', 5))        # 最大线程数
+    CRAWL_RATE = float(os.getenv('CRAWL_RATE', 0.5))      # 每个主机初始每秒请求数(令牌桶速率)
+    CRAWL_BURST = float(os.getenv('CRAWL_BURST', 3))      # 每个主机允许的突发请求数
+    CRAWL_CONCURRENCY = int(os.getenv('CRAWL_CONCURRENCY', MAX_THREADS))  # 初始同时在途的请求数
+    CRAWL_RATE_SHARED = os.getenv('CRAWL_RATE_SHARED', '0') == '1'  # 多进程共用一份限速预算
+    CRAWL_RATE_PATH = os.getenv('CRAWL_RATE_PATH', '.cache/rate_limiter.sqlite')  # 共享令牌桶的状态文件
+    SEARCH_DEADLINE = float(os.getenv('SEARCH_DEADLINE', 3))  # 搜索等待详情补全的截止时间(秒)
+    SEARCH_CACHE_TTL = float(os.getenv('SEARCH_CACHE_TTL', 600))  # 搜索结果缓存时间(秒)
+    SEARCH_CACHE_SIZE = int(os.getenv('SEARCH_CACHE_SIZE', 1000))  # 最多缓存的关键词数
+
+    # 自适应限流配置（AIMD：正常时加性增加，遇到反爬信号时乘性减少）
+    CRAWL_MIN_RATE = float(os.getenv('CRAWL_MIN_RATE', 0.1))              # 速率下限(请求/秒)
+    CRAWL_MAX_RATE = float(os.getenv('CRAWL_MAX_RATE', 3))                # 速率上限(请求/秒)
+    CRAWL_RATE_STEP = float(os.getenv('CRAWL_RATE_STEP', 0.1))            # 每次加速的步长
+    CRAWL_MAX_CONCURRENCY = int(os.getenv('CRAWL_MAX_CONCURRENCY', CRAWL_CONCURRENCY * 2))  # 并发上限
+    CRAWL_BACKOFF_FACTOR = float(os.getenv('CRAWL_BACKOFF_FACTOR', 0.5))  # 遇到反爬时速率和并发的缩减比例
+    CRAWL_HEALTHY_WINDOW = int(os.getenv('CRAWL_HEALTHY_WINDOW', 10))     # 连续多少个正常响应后加速
+    CRAWL_BLOCK_COOLDOWN = float(os.getenv('CRAWL_BLOCK_COOLDOWN', 60))   # 反爬后多久内不加速(秒)
+    
+    # 抓取入库流水线配置
+    PIPELINE_BATCH_SIZE = int(os.getenv('PIPELINE_BATCH_SIZE', 200))            # 每批写入的记录数
+    PIPELINE_MAX_PENDING = int(os.getenv('PIPELINE_MAX_PENDING', 20))           # 最多等待写入的页数
+    PIPELINE_FLUSH_INTERVAL = float(os.getenv('PIPELINE_FLUSH_INTERVAL', 5))    # 未满批次的最长等待(秒)
+    
+    # 抓取任务队列配置
+    JOB_MAX_PAGES = int(os.getenv('JOB_MAX_PAGES', 5))               # 每个任务抓取的评论页数
+    JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 5))         # 任务最多尝试次数
+    JOB_BACKOFF_BASE = float(os.getenv('JOB_BACKOFF_BASE', 30))      # 失败重试的退避基数(秒)
+    JOB_LOCK_TIMEOUT = float(os.getenv('JOB_LOCK_TIMEOUT', 600))     # 运行中任务无心跳多久视为中断(秒)
+    JOB_IDLE_SLEEP = float(os.getenv('JOB_IDLE_SLEEP', 5))           # 队列为空时的等待时间(秒)
     
+    # Selenium驱动池配置
+    DRIVER_POOL_SIZE = int(os.getenv('DRIVER_POOL_SIZE', 2))                  # 最多同时存在的浏览器数
+    DRIVER_MAX_USES = int(os.getenv('DRIVER_MAX_USES', 50))                   # 单个浏览器最多使用次数
+    DRIVER_CHECKOUT_TIMEOUT = float(os.getenv('DRIVER_CHECKOUT_TIMEOUT', 30)) # 等待空闲浏览器的超时(秒)
+    
+    # HTTP连接池配置
+    HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', CRAWL_MAX_CONCURRENCY))  # 每个主机的连接池大小
+    HTTP_POOL_HOSTS = int(os.getenv('HTTP_POOL_HOSTS', 10))               # 缓存连接池的主机数
+    HTTP_TIMEOUT = float(os.getenv('HTTP_TIMEOUT', 10))                   # 请求超时(秒)
+    HTTP_MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', 3))              # 最大重试次数
+    HTTP_BACKOFF_FACTOR = float(os.getenv('HTTP_BACKOFF_FACTOR', 0.5))    # 重试退避因子
+    
+    # HTTP响应缓存配置
+    HTTP_CACHE_ENABLED = os.getenv('HTTP_CACHE_ENABLED', '1') == '1'
+    HTTP_CACHE_PATH = os.getenv('HTTP_CACHE_PATH', '.cache/http_cache.sqlite')
+    HTTP_CACHE_MAX_BYTES = int(os.getenv('HTTP_CACHE_MAX_BYTES', 200 * 1024 * 1024))
+    HTTP_CACHE_TTLS = [  # (含查询参数的URL正则, TTL秒)，按顺序匹配，不匹配的URL不缓存
+        # 按时间排序的评论页用于增量抓取，TTL为0时每次都向服务器重新验证
+        (r'^https://movie\.douban\.com/subject/\d+/comments\?(.*&)?sort=time(&|$)', int(os.getenv('HTTP_CACHE_LATEST_COMMENTS_TTL', 0))),
+        (r'^https://movie\.douban\.com/subject/\d+/comments', int(os.getenv('HTTP_CACHE_COMMENTS_TTL', 3600))),
+        (r'^https://movie\.douban\.com/subject/\d+/?$', int(os.getenv('HTTP_CACHE_SUBJECT_TTL', 86400))),
+        (r'^https://movie\.douban\.com/j/subject_suggest', int(os.getenv('HTTP_CACHE_SUGGEST_TTL', 600))),
+    ]
+
+    # HTTP录制回放配置（离线基准测试用，开启后不经过响应缓存）
+    HTTP_ARCHIVE_MODE = os.getenv('HTTP_ARCHIVE_MODE', '')                          # ''、'record' 或 'replay'
+    HTTP_ARCHIVE_PATH = os.getenv('HTTP_ARCHIVE_PATH', '.cache/http_archive.sqlite')
+    HTTP_ARCHIVE_LATENCY = float(os.getenv('HTTP_ARCHIVE_LATENCY', -1))             # 回放延迟(秒)，负数使用录制时的耗时
+    HTTP_ARCHIVE_JITTER = float(os.getenv('HTTP_ARCHIVE_JITTER', 0))                # 回放延迟的随机浮动(秒)
+    HTTP_ARCHIVE_FAILURE_RATE = float(os.getenv('HTTP_ARCHIVE_FAILURE_RATE', 0))    # 回放时注入连接失败的概率
+    HTTP_ARCHIVE_BLOCK_RATE = float(os.getenv('HTTP_ARCHIVE_BLOCK_RATE', 0))        # 回放时注入429的概率
+
+    # 代理池配置
+    PROXY_ENABLED = os.getenv('PROXY_ENABLED', '0') == '1'
+    PROXY_POOL_URL = os.getenv('PROXY_POOL_URL', '')                           # 获取新代理的API
+    PROXY_VALIDATE_URL = os.getenv('PROXY_VALIDATE_URL', 'https://www.douban.com')
+    PROXY_VALIDATE_INTERVAL = float(os.getenv('PROXY_VALIDATE_INTERVAL', 60))  # 后台验证间隔(秒)
+    PROXY_VALIDATE_WORKERS = int(os.getenv('PROXY_VALIDATE_WORKERS', 10))      # 并发验证线程数
+    PROXY_VALIDATE_TIMEOUT = float(os.getenv('PROXY_VALIDATE_TIMEOUT', 5))     # 单个代理验证超时(秒)
+    PROXY_MAX_FAILURES = int(os.getenv('PROXY_MAX_FAILURES', 3))               # 连续失败多少次剔除
+    PROXY_MIN_SUCCESS_RATE = float(os.getenv('PROXY_MIN_SUCCESS_RATE', 0.3))   # 成功率低于此值剔除
+    PROXY_MIN_POOL_SIZE = int(os.getenv('PROXY_MIN_POOL_SIZE', 5))             # 池中代理少于此数时补充
+
     # API配置
     API_HOST = os.getenv('API_HOST', '0.0.0.0')
     API_PORT = int(os.getenv('API_PORT', 8080))
+    MOVIES_PAGE_SIZE = int(os.getenv('MOVIES_PAGE_SIZE', 24))            # 电影列表默认每页条数
+    MOVIES_MAX_PAGE_SIZE = int(os.getenv('MOVIES_MAX_PAGE_SIZE', 100))   # 电影列表每页最多条数
     
     # 豆瓣网站配置
     DOUBAN_URL = 'https://movie.douban.com'
+    BLOCK_MARKER = '检测到有异常请求'  # 豆瓣反爬页面标识
+    LOGIN_URL_MARKERS = ('accounts.douban.com', 'sec.douban.com')  # 被重定向到登录或验证页面
     USER_AGENTS = [
         'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
         'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
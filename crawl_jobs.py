@@ -0,0 +1,116 @@
+import argparse
+import logging
+import multiprocessing
+import signal
+import threading
+from database.db_manager import DatabaseManager
+from crawler.movie_crawler import MovieCrawler
+from crawler.job_worker import CrawlJobWorker
+from crawler.proxy_manager import start_proxy_pool
+from config.config import Config
+
+def enqueue(args, db_manager: DatabaseManager):
+    """添加抓取任务"""
+    douban_ids = list(args.douban_ids)
+    if args.file:
+        with open(args.file, encoding='utf-8') as f:
+            douban_ids.extend(line.strip() for line in f if line.strip())
+    added = db_manager.enqueue_crawl_jobs(douban_ids, max_pages=args.max_pages)
+    print(f"新增 {added} 个任务，共提交 {len(douban_ids)} 个豆瓣ID")
+
+def _run_workers(db_manager: DatabaseManager, thread_count: int, once: bool):
+    """在当前进程中运行worker线程，直到队列为空（once）或收到停止信号"""
+    movie_crawler = MovieCrawler(db_manager)
+    proxy_manager = start_proxy_pool(db_manager) if Config.PROXY_ENABLED else None
+    stop_event = threading.Event()
+
+    def handle_stop(signum, frame):
+        print("收到停止信号，完成当前页后退出...")
+        stop_event.set()
+
+    signal.signal(signal.SIGINT, handle_stop)
+    signal.signal(signal.SIGTERM, handle_stop)
+
+    workers = [
+        CrawlJobWorker(db_manager, movie_crawler, stop_event=stop_event)
+        for _ in range(thread_count)
+    ]
+    threads = [threading.Thread(target=worker.run, kwargs={'once': once}) for worker in workers]
+    for thread in threads:
+        thread.start()
+    # 主线程需要保持可中断，才能收到信号
+    for thread in threads:
+        while thread.is_alive():
+            thread.join(timeout=1)
+    if proxy_manager:
+        proxy_manager.stop()
+
+def _worker_process(thread_count: int, once: bool):
+    """子进程入口，各进程通过共享令牌桶共用一份请求预算"""
+    Config.CRAWL_RATE_SHARED = True
+    logging.basicConfig(level=logging.INFO)
+    _run_workers(DatabaseManager(), thread_count, once)
+
+def work(args, db_manager: DatabaseManager):
+    """启动worker执行任务"""
+    if args.processes <= 1:
+        _run_workers(db_manager, args.workers, args.once)
+        return
+
+    processes = [
+        multiprocessing.Process(target=_worker_process, args=(args.workers, args.once), name=f'crawl-worker-{i}')
+        for i in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+
+    def handle_stop(signum, frame):
+        # 终端的Ctrl+C会同时发给子进程，这里再转发一次以覆盖kill主进程的情况
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    signal.signal(signal.SIGINT, handle_stop)
+    signal.signal(signal.SIGTERM, handle_stop)
+    for process in processes:
+        while process.is_alive():
+            process.join(timeout=1)
+
+def status(args, db_manager: DatabaseManager):
+    """查看任务状态"""
+    stats = db_manager.get_crawl_job_stats()
+    for name in ('pending', 'running', 'done', 'failed'):
+        print(f"{name:<10}{stats.get(name, 0)}")
+
+def retry_failed(args, db_manager: DatabaseManager):
+    """重试失败任务"""
+    print(f"重新排队 {db_manager.retry_failed_crawl_jobs()} 个失败任务")
+
+def main():
+    parser = argparse.ArgumentParser(description='豆瓣电影批量抓取任务队列')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    enqueue_parser = subparsers.add_parser('enqueue', help='添加抓取任务')
+    enqueue_parser.add_argument('douban_ids', nargs='*', help='豆瓣电影ID')
+    enqueue_parser.add_argument('--file', help='每行一个豆瓣ID的文件')
+    enqueue_parser.add_argument('--max-pages', type=int, default=Config.JOB_MAX_PAGES, help='每部电影抓取的评论页数')
+    enqueue_parser.set_defaults(func=enqueue)
+
+    work_parser = subparsers.add_parser('work', help='执行抓取任务')
+    work_parser.add_argument('--workers', type=int, default=1, help='每个进程的worker线程数')
+    work_parser.add_argument('--processes', type=int, default=1, help='worker进程数，多于1个时共用一份限速预算')
+    work_parser.add_argument('--once', action='store_true', help='队列为空时退出')
+    work_parser.set_defaults(func=work)
+
+    status_parser = subparsers.add_parser('status', help='查看任务状态')
+    status_parser.set_defaults(func=status)
+
+    retry_parser = subparsers.add_parser('retry-failed', help='重试失败任务')
+    retry_parser.set_defaults(func=retry_failed)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    args.func(args, DatabaseManager())
+
+if __name__ == '__main__':
+    main()
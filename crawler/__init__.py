@@ -1,11 +1,13 @@
 from abc import ABC, abstractmethod
 from typing import List, Dict, Any
 import random
-import time
 from fake_useragent import UserAgent
-import requests
 from bs4 import BeautifulSoup
 from config.config import Config
+from .transport import HttpTransport, get_transport
+from .rate_limiter import TokenBucket, HostRateLimiter, get_rate_limiter
+from .async_engine import AsyncFetchEngine, get_fetch_engine
+from .throttle import AdaptiveThrottle, get_throttle
 import urllib3
 import warnings
 
@@ -17,6 +19,10 @@ class BaseCrawler(ABC):
     def __init__(self):
         self.headers = {'User-Agent': UserAgent().random}
         self.config = Config()
+        self.transport = get_transport()
+        self.rate_limiter = get_rate_limiter()
+        self.engine = get_fetch_engine()
+        self.throttle = get_throttle()
         
     def _get_random_user_agent(self) -> str:
         """获取随机User-Agent"""
@@ -25,17 +31,15 @@ class BaseCrawler(ABC):
     def _get_soup(self, url: str) -> BeautifulSoup:
         """获取页面解析对象"""
         headers = {
-            'User-Agent': self._get_random_user_agent(),
-            'Connection': 'close'
+            'User-Agent': self._get_random_user_agent()
         }
-        session = requests.Session()
-        response = session.get(url, headers=headers, verify=False, timeout=10)
+        response = self.transport.get(url, headers=headers, verify=False)
         response.raise_for_status()
         return BeautifulSoup(response.text, 'lxml')
     
-    def _handle_rate_limit(self):
-        """处理请求限制"""
-        time.sleep(self.config.CRAWL_INTERVAL)
+    def _handle_rate_limit(self, url: str = None):
+        """处理请求限制，等待目标主机的令牌"""
+        self.rate_limiter.acquire(url or self.config.DOUBAN_URL)
     
     @abstractmethod
     def crawl(self, *args, **kwargs):
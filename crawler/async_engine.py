@@ -0,0 +1,116 @@
+from typing import List, Dict, Any, Callable, Optional, Union
+import asyncio
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+import requests
+from config.config import Config
+from .transport import HttpTransport, get_transport
+from .rate_limiter import HostRateLimiter, get_rate_limiter
+
+FetchResult = Union[requests.Response, Exception]
+
+class AsyncFetchEngine:
+    """
+    基于asyncio的抓取引擎
+    同时保持多个请求在途，请求间隔由按主机的令牌桶决定，
+    实际并发由传输层的自适应限流控制，这里的并发数只是上限。
+    实际的网络IO交给共享传输层，在线程池中执行以复用连接池
+    """
+
+    def __init__(self, transport: Optional[HttpTransport] = None,
+                 rate_limiter: Optional[HostRateLimiter] = None,
+                 max_concurrency: Optional[int] = None):
+        self.config = Config()
+        self.logger = logging.getLogger(__name__)
+        self.transport = transport or get_transport()
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.max_concurrency = max_concurrency or self.config.CRAWL_MAX_CONCURRENCY
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency,
+            thread_name_prefix='fetch'
+        )
+
+    async def _fetch(self, semaphore: asyncio.Semaphore, request: Dict[str, Any]) -> FetchResult:
+        """在并发和限速约束下发送单个请求，异常作为结果返回"""
+        cached = self.transport.peek_cache(request['url'], request.get('params'))
+        if cached is not None:
+            return cached
+        async with semaphore:
+            await self.rate_limiter.acquire_async(request['url'])
+            loop = asyncio.get_running_loop()
+            try:
+                return await loop.run_in_executor(
+                    self._executor,
+                    functools.partial(self.transport.get, **request)
+                )
+            except Exception as e:
+                return e
+
+    async def fetch_all_async(self, requests_: List[Dict[str, Any]]) -> List[FetchResult]:
+        """并发抓取全部请求，按请求顺序返回结果"""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        return await asyncio.gather(*[self._fetch(semaphore, request) for request in requests_])
+
+    async def crawl_pages_async(self, page_requests: List[Dict[str, Any]],
+                                on_page: Callable[[int, FetchResult], Optional[bool]]):
+        """
+        并发抓取分页请求，按页序回调处理
+        只提前调度最多max_concurrency页，处理完一页才补调度下一页；
+        回调要求停止后不再调度新页，已发出的请求最多浪费一个窗口
+        :param page_requests: 按页序排列的请求参数（传给transport.get）
+        :param on_page: 页面回调，返回False时停止翻页并取消剩余请求
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        pending: Dict[int, asyncio.Future] = {}
+        next_index = 0
+        try:
+            for index in range(len(page_requests)):
+                while next_index < len(page_requests) and len(pending) < self.max_concurrency:
+                    pending[next_index] = asyncio.ensure_future(self._fetch(semaphore, page_requests[next_index]))
+                    next_index += 1
+                result = await pending.pop(index)
+                if on_page(index, result) is False:
+                    break
+        finally:
+            # 还在等令牌的任务取消时会退回预占的令牌
+            for task in pending.values():
+                task.cancel()
+            await asyncio.gather(*pending.values(), return_exceptions=True)
+
+    def _fetch_blocking(self, request: Dict[str, Any]) -> requests.Response:
+        """在工作线程中等待令牌并发送请求"""
+        cached = self.transport.peek_cache(request['url'], request.get('params'))
+        if cached is not None:
+            return cached
+        self.rate_limiter.acquire(request['url'])
+        return self.transport.get(**request)
+
+    def submit(self, request: Dict[str, Any]) -> Future:
+        """
+        提交单个限速请求，不等待结果
+        供同步代码使用，返回的Future可配合超时等待
+        """
+        return self._executor.submit(self._fetch_blocking, request)
+
+    def fetch_all(self, requests_: List[Dict[str, Any]]) -> List[FetchResult]:
+        """fetch_all_async的同步入口"""
+        return asyncio.run(self.fetch_all_async(requests_))
+
+    def crawl_pages(self, page_requests: List[Dict[str, Any]],
+                    on_page: Callable[[int, FetchResult], Optional[bool]]):
+        """crawl_pages_async的同步入口"""
+        asyncio.run(self.crawl_pages_async(page_requests, on_page))
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_fetch_engine() -> AsyncFetchEngine:
+    """获取进程内共享的抓取引擎"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = AsyncFetchEngine()
+    return _engine
@@ -0,0 +1,153 @@
+from typing import Callable, Dict, Any, Optional
+from contextlib import contextmanager
+import logging
+import atexit
+import queue
+import threading
+import weakref
+from selenium.webdriver.remote.webdriver import WebDriver
+from config.config import Config
+
+# 进程内仍在使用的驱动池，退出时统一关闭；弱引用不会让已丢弃的池一直存活
+_live_pools: 'weakref.WeakSet[WebDriverPool]' = weakref.WeakSet()
+
+class DriverPoolTimeout(Exception):
+    """等待空闲WebDriver超时"""
+    pass
+
+class WebDriverPool:
+    """
+    有界的WebDriver复用池
+    驱动在多次搜索间保持热启动，检出前做健康检查，
+    使用N次或出错后回收重建。可以在Flask请求线程中并发检出
+    """
+
+    def __init__(self, factory: Callable[[], WebDriver], size: Optional[int] = None,
+                 max_uses: Optional[int] = None):
+        """
+        :param factory: 创建新WebDriver的函数
+        :param size: 最多同时存在的驱动数
+        :param max_uses: 单个驱动最多使用次数，达到后回收
+        """
+        config = Config()
+        self.factory = factory
+        self.size = size or config.DRIVER_POOL_SIZE
+        self.max_uses = max_uses or config.DRIVER_MAX_USES
+        self.logger = logging.getLogger(__name__)
+        self._idle = queue.LifoQueue()  # 后进先出，优先复用最近用过的驱动
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._uses: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        self.counters = {
+            'created': 0,
+            'reused': 0,
+            'recycled': 0,
+            'unhealthy': 0
+        }
+        _live_pools.add(self)
+
+    def _create(self) -> WebDriver:
+        """创建新驱动"""
+        driver = self.factory()
+        with self._lock:
+            self._uses[id(driver)] = 0
+            self.counters['created'] += 1
+        return driver
+
+    def _discard(self, driver: WebDriver):
+        """关闭并丢弃驱动"""
+        with self._lock:
+            self._uses.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception as e:
+            self.logger.warning(f"关闭WebDriver失败: {str(e)}")
+
+    def _is_healthy(self, driver: WebDriver) -> bool:
+        """健康检查：浏览器进程仍能执行脚本"""
+        try:
+            return driver.execute_script('return 1') == 1
+        except Exception:
+            return False
+
+    def _checkout(self) -> WebDriver:
+        """取出一个健康的空闲驱动，没有则新建"""
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                return self._create()
+            if self._is_healthy(driver):
+                with self._lock:
+                    self.counters['reused'] += 1
+                return driver
+            with self._lock:
+                self.counters['unhealthy'] += 1
+            self._discard(driver)
+
+    def _checkin(self, driver: WebDriver, broken: bool):
+        """归还驱动，出错或达到使用次数时回收"""
+        with self._lock:
+            uses = self._uses.get(id(driver), 0) + 1
+            self._uses[id(driver)] = uses
+        if broken or self._closed or uses >= self.max_uses:
+            if not broken:
+                with self._lock:
+                    self.counters['recycled'] += 1
+            self._discard(driver)
+            return
+        try:
+            # 清理上一次使用留下的会话状态
+            driver.delete_all_cookies()
+        except Exception:
+            self._discard(driver)
+            return
+        self._idle.put(driver)
+
+    @contextmanager
+    def driver(self, timeout: Optional[float] = None):
+        """
+        检出一个WebDriver
+        with块内抛出的异常会让驱动被回收而不是放回池中
+        :param timeout: 等待空闲驱动的最长秒数，None表示一直等待
+        """
+        if not self._slots.acquire(timeout=timeout):
+            raise DriverPoolTimeout(f"等待WebDriver超过 {timeout} 秒")
+        driver = None
+        broken = False
+        try:
+            driver = self._checkout()
+            yield driver
+        except Exception:
+            broken = True
+            raise
+        finally:
+            if driver is not None:
+                self._checkin(driver, broken)
+            self._slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """驱动池统计"""
+        with self._lock:
+            stats = dict(self.counters)
+            stats['alive'] = len(self._uses)
+        stats['idle'] = self._idle.qsize()
+        stats['size'] = self.size
+        return stats
+
+    def close(self):
+        """关闭所有空闲驱动，使用中的驱动归还时关闭"""
+        self._closed = True
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(driver)
+
+@atexit.register
+def _close_live_pools():
+    """进程退出时关闭所有驱动池的空闲浏览器"""
+    for pool in list(_live_pools):
+        pool.close()
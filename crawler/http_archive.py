@@ -0,0 +1,202 @@
+from typing import Dict, Any, Optional
+from datetime import timedelta
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from config.config import Config
+
+class HttpArchive:
+    """
+    本地HTTP录制档案
+    sqlite文件中按规范化URL保存请求和响应（状态码、响应头、正文），
+    录制模式写入，回放模式读取，同一URL保留最后一次录制
+    """
+
+    # 这些头描述的是原始传输，档案保存的是解码后的正文
+    SKIP_HEADERS = ('content-encoding', 'transfer-encoding', 'content-length', 'connection')
+
+    def __init__(self, path: Optional[str] = None):
+        self.config = Config()
+        self.path = path or self.config.HTTP_ARCHIVE_PATH
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        """打开档案数据库"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS http_archive (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                request_headers TEXT NOT NULL,
+                status_code INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                encoding TEXT,
+                final_url TEXT NOT NULL,
+                elapsed REAL NOT NULL,
+                recorded_at REAL NOT NULL
+            )
+        ''')
+        return conn
+
+    @staticmethod
+    def make_key(url: str) -> str:
+        """规范化URL：查询参数排序，去掉片段"""
+        parts = urlsplit(url)
+        query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+        return urlunsplit((parts.scheme, parts.netloc, parts.path, query, ''))
+
+    def save(self, request: requests.PreparedRequest, response: requests.Response):
+        """录制一对请求和响应"""
+        headers = {
+            name: value for name, value in response.headers.items()
+            if name.lower() not in self.SKIP_HEADERS
+        }
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO http_archive '
+                '(key, url, request_headers, status_code, headers, body, encoding, final_url, elapsed, recorded_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (self.make_key(request.url), request.url, json.dumps(dict(request.headers)),
+                 response.status_code, json.dumps(headers), response.content, response.encoding,
+                 response.url, response.elapsed.total_seconds(), time.time())
+            )
+
+    def add(self, url: str, body: bytes, status_code: int = 200, headers: Optional[Dict[str, str]] = None,
+            encoding: Optional[str] = 'utf-8'):
+        """直接写入一条响应，用于从保存的页面样本构造档案"""
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO http_archive '
+                '(key, url, request_headers, status_code, headers, body, encoding, final_url, elapsed, recorded_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (self.make_key(url), url, '{}', status_code, json.dumps(headers or {}),
+                 body, encoding, url, 0.0, time.time())
+            )
+
+    def lookup(self, url: str) -> Optional[Dict[str, Any]]:
+        """查找录制的响应，未录制返回None"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT status_code, headers, body, encoding, final_url, elapsed FROM http_archive WHERE key = ?',
+                (self.make_key(url),)
+            ).fetchone()
+        if row is None:
+            return None
+        status_code, headers, body, encoding, final_url, elapsed = row
+        return {
+            'status_code': status_code,
+            'headers': json.loads(headers),
+            'body': body,
+            'encoding': encoding,
+            'url': final_url,
+            'elapsed': elapsed
+        }
+
+    def count(self) -> int:
+        """档案中的响应数"""
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM http_archive').fetchone()[0]
+
+class RecordingAdapter(HTTPAdapter):
+    """正常发送请求，同时把响应写入档案"""
+
+    def __init__(self, archive: HttpArchive, **kwargs):
+        self.archive = archive
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        try:
+            self.archive.save(request, response)
+        except Exception as e:
+            logging.getLogger(__name__).error(f"录制响应失败: {str(e)}")
+        return response
+
+class ReplayAdapter(BaseAdapter):
+    """
+    从档案回放响应，不访问网络
+    可以注入延迟、连接失败和反爬响应，用于离线测试并发和限流行为
+    """
+
+    def __init__(self, archive: HttpArchive, latency: Optional[float] = None, jitter: Optional[float] = None,
+                 failure_rate: Optional[float] = None, block_rate: Optional[float] = None,
+                 seed: Optional[int] = None):
+        """
+        :param latency: 每个请求的基础延迟(秒)，负数表示使用录制时的耗时
+        :param jitter: 延迟的随机浮动上限(秒)
+        :param failure_rate: 抛出连接错误的概率
+        :param block_rate: 返回429的概率
+        :param seed: 随机种子，固定后每次回放的注入序列相同
+        """
+        super().__init__()
+        config = Config()
+        self.archive = archive
+        self.latency = latency if latency is not None else config.HTTP_ARCHIVE_LATENCY
+        self.jitter = jitter if jitter is not None else config.HTTP_ARCHIVE_JITTER
+        self.failure_rate = failure_rate if failure_rate is not None else config.HTTP_ARCHIVE_FAILURE_RATE
+        self.block_rate = block_rate if block_rate is not None else config.HTTP_ARCHIVE_BLOCK_RATE
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.counters = {'replayed': 0, 'missing': 0, 'failures': 0, 'blocked': 0}
+
+    def _draw(self) -> tuple:
+        """抽取本次请求用到的随机数"""
+        with self._lock:
+            return self._random.random(), self._random.random(), self._random.random()
+
+    def _count(self, counter: str):
+        with self._lock:
+            self.counters[counter] += 1
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        failure_draw, block_draw, jitter_draw = self._draw()
+        recorded = self.archive.lookup(request.url)
+
+        delay = self.latency if self.latency >= 0 else (recorded['elapsed'] if recorded else 0.0)
+        delay += self.jitter * jitter_draw
+        if delay > 0:
+            time.sleep(delay)
+
+        if failure_draw < self.failure_rate:
+            self._count('failures')
+            raise requests.ConnectionError(f"回放注入的连接失败: {request.url}", request=request)
+
+        response = requests.Response()
+        response.request = request
+        response.url = request.url
+        response.elapsed = timedelta(seconds=delay)
+        if block_draw < self.block_rate:
+            self._count('blocked')
+            response.status_code = 429
+            response.headers = CaseInsensitiveDict()
+            response._content = b''
+        elif recorded is None:
+            self._count('missing')
+            response.status_code = 404
+            response.headers = CaseInsensitiveDict({'X-Archive-Miss': '1'})
+            response._content = b''
+        else:
+            self._count('replayed')
+            response.status_code = recorded['status_code']
+            response.headers = CaseInsensitiveDict(recorded['headers'])
+            response._content = recorded['body']
+            response.encoding = recorded['encoding']
+            response.url = recorded['url']
+        return response
+
+    def close(self):
+        pass
@@ -0,0 +1,231 @@
+from typing import Dict, Any, Optional, List, Tuple
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import requests
+from requests.structures import CaseInsensitiveDict
+from config.config import Config
+
+class CacheEntry:
+    """缓存中的一条响应"""
+
+    def __init__(self, key: str, url: str, status_code: int, headers: Dict[str, str], body: bytes,
+                 encoding: Optional[str], etag: Optional[str], last_modified: Optional[str],
+                 expires_at: float):
+        self.key = key
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.body = body
+        self.encoding = encoding
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+
+    @property
+    def fresh(self) -> bool:
+        """是否仍在有效期内"""
+        return self.expires_at > time.time()
+
+    @property
+    def revalidatable(self) -> bool:
+        """是否可以发送条件请求"""
+        return bool(self.etag or self.last_modified)
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """构造条件请求头"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    def to_response(self) -> requests.Response:
+        """还原为requests响应对象"""
+        response = requests.Response()
+        response.status_code = self.status_code
+        response.headers = CaseInsensitiveDict(self.headers)
+        response._content = self.body
+        response.encoding = self.encoding
+        response.url = self.url
+        response.from_cache = True
+        return response
+
+class HttpCache:
+    """
+    基于本地sqlite文件的HTTP响应缓存
+    按URL和查询参数建键，每类URL有独立TTL，过期后用ETag/Last-Modified
+    条件请求重新验证，总大小超过上限时按最近访问时间淘汰
+    """
+
+    # 这些头描述的是原始传输，缓存的是解码后的正文
+    SKIP_HEADERS = ('content-encoding', 'transfer-encoding', 'content-length', 'connection')
+
+    def __init__(self, path: Optional[str] = None, max_bytes: Optional[int] = None,
+                 ttl_rules: Optional[List[Tuple[str, int]]] = None):
+        self.config = Config()
+        self.logger = logging.getLogger(__name__)
+        self.path = path or self.config.HTTP_CACHE_PATH
+        self.max_bytes = max_bytes if max_bytes is not None else self.config.HTTP_CACHE_MAX_BYTES
+        self.ttl_rules = [
+            (re.compile(pattern), ttl)
+            for pattern, ttl in (ttl_rules if ttl_rules is not None else self.config.HTTP_CACHE_TTLS)
+        ]
+        self.counters = {
+            'hits': 0,
+            'misses': 0,
+            'revalidated': 0,
+            'stores': 0,
+            'evictions': 0
+        }
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+        self._total_bytes = self._query_total_bytes()
+
+    def _connect(self) -> sqlite3.Connection:
+        """打开缓存数据库"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS http_cache (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                status_code INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                encoding TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS ix_http_cache_last_access ON http_cache (last_access)')
+        return conn
+
+    def _query_total_bytes(self) -> int:
+        """统计缓存总大小"""
+        row = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM http_cache').fetchone()
+        return row[0]
+
+    def ttl_for(self, url: str, params: Optional[Dict[str, Any]] = None) -> Optional[int]:
+        """
+        获取URL对应的TTL，规则匹配带查询参数的完整URL
+        :return: 秒数，不匹配任何规则时返回None表示不缓存
+        """
+        full_url = self.full_url(url, params)
+        for pattern, ttl in self.ttl_rules:
+            if pattern.search(full_url):
+                return ttl
+        return None
+
+    @staticmethod
+    def full_url(url: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """按参数名排序拼接查询参数，得到规范化的完整URL"""
+        return requests.Request('GET', url, params=sorted((params or {}).items())).prepare().url
+
+    @classmethod
+    def make_key(cls, url: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """按规范化后的完整URL生成缓存键"""
+        return hashlib.sha1(cls.full_url(url, params).encode('utf-8')).hexdigest()
+
+    def lookup(self, key: str) -> Optional[CacheEntry]:
+        """查找缓存条目，未命中返回None"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT url, status_code, headers, body, encoding, etag, last_modified, expires_at '
+                'FROM http_cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute('UPDATE http_cache SET last_access = ? WHERE key = ?', (time.time(), key))
+        url, status_code, headers, body, encoding, etag, last_modified, expires_at = row
+        return CacheEntry(key, url, status_code, json.loads(headers), body,
+                          encoding, etag, last_modified, expires_at)
+
+    def store(self, key: str, response: requests.Response, ttl: int):
+        """写入响应"""
+        headers = {
+            name: value for name, value in response.headers.items()
+            if name.lower() not in self.SKIP_HEADERS
+        }
+        body = response.content
+        size = len(body)
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute('SELECT size FROM http_cache WHERE key = ?', (key,)).fetchone()
+            self._conn.execute(
+                'INSERT OR REPLACE INTO http_cache '
+                '(key, url, status_code, headers, body, encoding, etag, last_modified, expires_at, last_access, size) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, response.url, response.status_code, json.dumps(headers), body, response.encoding,
+                 response.headers.get('ETag'), response.headers.get('Last-Modified'), now + ttl, now, size)
+            )
+            self._total_bytes += size - (old[0] if old else 0)
+            self.counters['stores'] += 1
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def refresh(self, entry: CacheEntry, response: requests.Response, ttl: int):
+        """304重新验证成功后延长有效期"""
+        etag = response.headers.get('ETag') or entry.etag
+        last_modified = response.headers.get('Last-Modified') or entry.last_modified
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'UPDATE http_cache SET etag = ?, last_modified = ?, expires_at = ?, last_access = ? WHERE key = ?',
+                (etag, last_modified, now + ttl, now, entry.key)
+            )
+
+    def _evict(self):
+        """按最近访问时间淘汰，直到总大小降到上限的90%"""
+        # 其他进程可能也写入了缓存，淘汰前以数据库统计为准
+        self._total_bytes = self._query_total_bytes()
+        target = self.max_bytes * 0.9
+        rows = self._conn.execute('SELECT key, size FROM http_cache ORDER BY last_access').fetchall()
+        evicted = []
+        for key, size in rows:
+            if self._total_bytes <= target:
+                break
+            evicted.append((key,))
+            self._total_bytes -= size
+        if evicted:
+            self._conn.executemany('DELETE FROM http_cache WHERE key = ?', evicted)
+            self.counters['evictions'] += len(evicted)
+            self.logger.info(f"HTTP缓存淘汰 {len(evicted)} 条记录")
+
+    def record(self, counter: str):
+        """累加计数器"""
+        with self._lock:
+            self.counters[counter] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存统计"""
+        with self._lock:
+            counters = dict(self.counters)
+            entries = self._conn.execute('SELECT COUNT(*) FROM http_cache').fetchone()[0]
+            total_bytes = self._total_bytes
+        lookups = counters['hits'] + counters['misses']
+        counters.update({
+            'entries': entries,
+            'bytes': total_bytes,
+            'hit_ratio': round(counters['hits'] / lookups, 4) if lookups else 0.0
+        })
+        return counters
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._conn.execute('DELETE FROM http_cache')
+            self._total_bytes = 0
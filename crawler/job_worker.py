@@ -0,0 +1,94 @@
+from typing import Dict, Any, Optional
+import logging
+import os
+import socket
+import threading
+import time
+from config.config import Config
+
+class CrawlJobWorker:
+    """
+    抓取任务队列的执行者
+    从crawl_jobs表领取任务，依次抓取详情和评论页，每完成一页记录检查点，
+    失败时按指数退避重新排队，进程重启后从检查点继续
+    """
+
+    def __init__(self, db_manager, movie_crawler, worker_id: Optional[str] = None,
+                 stop_event: Optional[threading.Event] = None):
+        self.config = Config()
+        self.logger = logging.getLogger(__name__)
+        self.db_manager = db_manager
+        self.movie_crawler = movie_crawler
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+        self.stop_event = stop_event or threading.Event()
+
+    def run(self, once: bool = False) -> int:
+        """
+        循环领取并执行任务
+        :param once: 为True时队列空了就退出，否则一直等待新任务
+        :return: 本次执行完成的任务数
+        """
+        completed = 0
+        last_release = None
+
+        while not self.stop_event.is_set():
+            # 其他worker可能随时中断，每隔一个锁超时周期回收一次，而不只在启动时
+            now = time.monotonic()
+            if last_release is None or now - last_release >= self.config.JOB_LOCK_TIMEOUT:
+                self.db_manager.release_stale_crawl_jobs(self.config.JOB_LOCK_TIMEOUT)
+                last_release = now
+
+            job = self.db_manager.claim_crawl_job(self.worker_id)
+            if not job:
+                if once:
+                    break
+                self.stop_event.wait(self.config.JOB_IDLE_SLEEP)
+                continue
+
+            if self.process(job):
+                completed += 1
+
+        return completed
+
+    def process(self, job: Dict[str, Any]) -> bool:
+        """
+        执行单个任务
+        :return: 任务是否完成
+        """
+        douban_id = job['douban_id']
+        try:
+            if job['stage'] == 'detail':
+                movie_data = self.movie_crawler.get_movie_detail(douban_id)
+                self.db_manager.save_movie(movie_data)
+                self.db_manager.checkpoint_crawl_job(job['id'], 'comments', 0)
+                self.logger.info(f"任务{douban_id}: 电影详情已保存")
+
+            page = job['cursor'] if job['stage'] == 'comments' else 0
+            while page < job['max_pages']:
+                if self.stop_event.is_set():
+                    # 收到停止信号，放回队列等待下次从检查点继续
+                    self.db_manager.release_crawl_job(job['id'])
+                    return False
+
+                comments = self.movie_crawler.get_comment_page(douban_id, page)
+                if comments is None:
+                    break
+                if comments:
+                    self.db_manager.save_comments(comments, douban_id)
+
+                page += 1
+                self.db_manager.checkpoint_crawl_job(job['id'], 'comments', page)
+                self.logger.info(f"任务{douban_id}: 第{page}页评论已保存({len(comments)}条)")
+
+            self.db_manager.complete_crawl_job(job['id'])
+            self.logger.info(f"任务{douban_id}完成")
+            return True
+
+        except Exception as e:
+            self.logger.error(f"任务{douban_id}失败: {str(e)}")
+            self.db_manager.fail_crawl_job(
+                job['id'], str(e),
+                self.config.JOB_MAX_ATTEMPTS,
+                self.config.JOB_BACKOFF_BASE
+            )
+            return False
@@ -1,13 +1,16 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import Future, wait
+from collections import OrderedDict
+import functools
+import threading
 from . import BaseCrawler
-from datetime import datetime
+from .driver_pool import WebDriverPool
+from .search_cache import SearchCache
+from .parsers import parse_comment_page, parse_detail_summary, parse_movie_detail
 import re
-import requests
 from bs4 import BeautifulSoup
 import time
-import random
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
@@ -18,59 +21,61 @@ from webdriver_manager.chrome import ChromeDriverManager
 import os
 
 class MovieCrawler(BaseCrawler):
+    # 迟到详情最多保留的条数
+    LATE_DETAILS_LIMIT = 500
+    
     def __init__(self, db_manager):
         super().__init__()
         self.logger = logging.getLogger(__name__)
         self.db_manager = db_manager
-        self.driver = None
-        self.use_selenium = False  # 是否使用 Selenium
-        self._init_chrome_options()  # 预初始化 Chrome 选项
+        self.driver_pool = WebDriverPool(self._create_driver)  # 复用热启动的浏览器
+        self._late_details = OrderedDict()  # 搜索返回后才补全的详情
+        self._late_details_lock = threading.Lock()
+        self.search_cache = SearchCache()  # 相同关键词共享一次上游搜索
     
-    def _init_chrome_options(self):
-        """初始化 Chrome 选项"""
-        self.chrome_options = Options()
-        self.chrome_options.add_argument('--headless')  # 无头模式
-        self.chrome_options.add_argument('--no-sandbox')
-        self.chrome_options.add_argument('--disable-dev-shm-usage')
-        self.chrome_options.add_argument('--disable-gpu')
-        self.chrome_options.add_argument('--disable-extensions')
-        self.chrome_options.add_argument('--disable-logging')
-        self.chrome_options.add_argument('--disable-notifications')
-        self.chrome_options.add_argument('--disable-default-apps')
-        self.chrome_options.add_argument('--disable-popup-blocking')
-        self.chrome_options.add_argument('--window-size=1920,1080')  # 设置窗口大小
-        self.chrome_options.add_argument('--ignore-certificate-errors')  # 忽略证书错误
-        self.chrome_options.add_argument('--ignore-ssl-errors')  # 忽略SSL错误
-        self.chrome_options.page_load_strategy = 'eager'
+    def _build_chrome_options(self) -> Options:
+        """构造 Chrome 选项，每个驱动使用独立的User-Agent"""
+        chrome_options = Options()
+        chrome_options.add_argument('--headless')  # 无头模式
+        chrome_options.add_argument('--no-sandbox')
+        chrome_options.add_argument('--disable-dev-shm-usage')
+        chrome_options.add_argument('--disable-gpu')
+        chrome_options.add_argument('--disable-extensions')
+        chrome_options.add_argument('--disable-logging')
+        chrome_options.add_argument('--disable-notifications')
+        chrome_options.add_argument('--disable-default-apps')
+        chrome_options.add_argument('--disable-popup-blocking')
+        chrome_options.add_argument('--window-size=1920,1080')  # 设置窗口大小
+        chrome_options.add_argument('--ignore-certificate-errors')  # 忽略证书错误
+        chrome_options.add_argument('--ignore-ssl-errors')  # 忽略SSL错误
+        chrome_options.add_argument(f'user-agent={self._get_random_user_agent()}')  # 添加随机User-Agent
+        chrome_options.page_load_strategy = 'eager'
+        return chrome_options
     
-    def _init_driver(self):
-        """初始化 Selenium WebDriver"""
-        if not self.driver:
-            try:
-                # 设置下载路径为当前目录
-                chrome_driver_path = os.path.join(os.getcwd(), 'chromedriver')
-                os.environ['WDM_LOCAL'] = '1'  # 使用本地缓存
-                os.environ['WDM_SSL_VERIFY'] = '0'  # 禁用SSL验证
-                
-                # 添加随机User-Agent
-                self.chrome_options.add_argument(f'user-agent={self._get_random_user_agent()}')
-                
-                # 使用 Service 对象
-                service = Service()
-                self.driver = webdriver.Chrome(
-                    service=service,
-                    options=self.chrome_options
-                )
-                
-                # 设置超时时间
-                self.driver.set_page_load_timeout(20)
-                self.driver.implicitly_wait(10)
-                
-            except Exception as e:
-                self.logger.error(f"初始化WebDriver失败: {str(e)}")
-                if self.driver:
-                    self.driver.quit()
-                raise
+    def _create_driver(self) -> webdriver.Chrome:
+        """创建 Selenium WebDriver，由驱动池调用"""
+        driver = None
+        try:
+            os.environ['WDM_LOCAL'] = '1'  # 使用本地缓存
+            os.environ['WDM_SSL_VERIFY'] = '0'  # 禁用SSL验证
+            
+            # 使用 Service 对象
+            service = Service()
+            driver = webdriver.Chrome(
+                service=service,
+                options=self._build_chrome_options()
+            )
+            
+            # 设置超时时间
+            driver.set_page_load_timeout(20)
+            driver.implicitly_wait(10)
+            return driver
+            
+        except Exception as e:
+            self.logger.error(f"初始化WebDriver失败: {str(e)}")
+            if driver:
+                driver.quit()
+            raise
     
     def crawl(self, *args, **kwargs):
         """实现抽象方法"""
@@ -85,87 +90,47 @@ class MovieCrawler(BaseCrawler):
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/98.100.4758.11 Safari/537.36'
             }
             
-            detail_response = requests.get(detail_url, headers=headers)
+            detail_response = self.transport.get(detail_url, headers=headers)
             detail_response.raise_for_status()
             
-            soup = BeautifulSoup(detail_response.text, 'html.parser')
-            
-            # 获取基本信息
-            name = soup.select_one('meta[property="og:title"]')['content']
-            img_url = soup.select_one('meta[property="og:image"]')['content']
-            
-            # 处理图片URL
-            if img_url:
-                img_url = img_url.replace('s_ratio', 'l_ratio')
-                img_url = img_url.replace('img1.doubanio.com', 'img9.doubanio.com')
-                img_url = img_url.replace('img2.doubanio.com', 'img9.doubanio.com')
-                img_url = img_url.replace('img3.doubanio.com', 'img9.doubanio.com')
-            
-            # 获取年份和副标题
-            year = None
-            sub_title = ''
-            title_element = soup.select_one('#content h1')
-            if title_element:
-                # 处理年份
-                year_match = re.search(r'\((\d{4})\)', title_element.text)
-                if year_match:
-                    year = year_match.group(1)
-                    name = re.sub(r'\s*\(\d{4}\)\s*', '', name)  # 从标题中移除年份
-                
-                # 处理副标题
-                spans = title_element.select('span.year')
-                if len(spans) > 0:
-                    # 移除副标题中的年份部分
-                    title_text = title_element.text.replace(spans[0].text, '').strip()
-                    # 获取主标题之后的文本作为副标题
-                    if name in title_text:
-                        sub_title = title_text.replace(name, '').strip()
-            
-            # 获取其他信息
-            director = soup.select_one('a[rel="v:directedBy"]')
-            director = director.text.strip() if director else '未知'
-            
-            rating_element = soup.select_one('#interest_sectl strong.rating_num')
-            rating = float(rating_element.text.strip()) if rating_element else None
-            
-            actors_element = soup.select('a[rel="v:starring"]')
-            actors = '/'.join([actor.text.strip() for actor in actors_element[:3]]) if actors_element else ''
-            
-            genre_elements = soup.select('span[property="v:genre"]')
-            genre = '/'.join([g.text.strip() for g in genre_elements]) if genre_elements else ''
-            
-            release_date = soup.select_one('span[property="v:initialReleaseDate"]')
-            release_date = datetime.strptime(release_date.text.split('(')[0], '%Y-%m-%d') if release_date else None
-            
-            return {
-                'douban_id': douban_id,
-                'name': name,
-                'rating': rating,
-                'director': director,
-                'actors': actors,
-                'genre': genre,
-                'release_date': release_date,
-                'img_url': img_url,
-                'year': year,
-                'sub_title': sub_title
-            }
+            return parse_movie_detail(detail_response.content, douban_id)
             
         except Exception as e:
             self.logger.error(f"获取电影详情失败: {str(e)}")
             raise
     
     def search_movies(self, keyword: str) -> List[Dict[str, Any]]:
-        """搜索电影"""
+        """
+        搜索电影
+        结果按关键词缓存，并发的相同搜索只抓取一次；
+        是否已添加和迟到的详情每次返回前重新填充
+        """
+        movies = self.search_cache.get_or_load(keyword, self._search_uncached)
+        return self._refresh_search_results(movies)
+    
+    def _refresh_search_results(self, movies: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """缓存结果可能已过时：重新检查是否已添加，补上缓存后才返回的详情"""
+        late_details = self.get_enriched_details(
+            [movie['douban_id'] for movie in movies if movie.get('enriching')]
+        )
+        existing = self.db_manager.get_existing_douban_ids(movie['douban_id'] for movie in movies)
+        for movie in movies:
+            movie['is_added'] = movie['douban_id'] in existing
+            fields = late_details.get(movie['douban_id'])
+            if fields:
+                movie.update(fields)
+                movie.pop('enriching', None)
+        return movies
+    
+    def _search_uncached(self, keyword: str) -> List[Dict[str, Any]]:
+        """向豆瓣发起搜索"""
         try:
             # 首先尝试使用普通请求
-            if not self.use_selenium:
-                try:
-                    return self._search_with_api(keyword)
-                except Exception as e:
-                    self.logger.warning(f"API搜索失败，切换到Selenium模式: {str(e)}")
-                    self.use_selenium = True
-                    # 显示切换提示
-                    print("检测到豆瓣反爬限制，正在切换到浏览器模式...")
+            try:
+                return self._search_with_api(keyword)
+            except Exception as e:
+                # 只对本次搜索改用浏览器，限流器已经根据响应退避，下次仍先尝试API
+                self.logger.warning(f"API搜索失败，本次改用Selenium模式: {str(e)}")
             
             # 如果API请求失败，使用Selenium
             return self._search_with_selenium(keyword)
@@ -184,8 +149,8 @@ class MovieCrawler(BaseCrawler):
             'User-Agent': self._get_random_user_agent()
         }
         
-        response = requests.get(url, headers=headers, timeout=5)
-        if '检测到有异常请求' in response.text:
+        response = self.transport.get(url, headers=headers, timeout=5)
+        if self.config.BLOCK_MARKER in response.text:
             raise Exception("检测到反爬限制")
             
         movies_data = response.json()
@@ -198,22 +163,24 @@ class MovieCrawler(BaseCrawler):
         
         while retry_count < max_retries:
             try:
-                self._init_driver()
-                url = f"https://movie.douban.com/subject_search?search_text={keyword}"
-                self.driver.get(url)
-                
-                # 等待搜索结果加载
-                try:
-                    WebDriverWait(self.driver, 15).until(
-                        EC.presence_of_element_located((By.CLASS_NAME, 'item-root'))
-                    )
-                except Exception as e:
-                    self.logger.warning(f"等待搜索结果超时: {str(e)}")
-                    return []
+                with self.driver_pool.driver(timeout=self.config.DRIVER_CHECKOUT_TIMEOUT) as driver:
+                    url = f"https://movie.douban.com/subject_search?search_text={keyword}"
+                    driver.get(url)
+                    
+                    # 等待搜索结果加载
+                    try:
+                        WebDriverWait(driver, 15).until(
+                            EC.presence_of_element_located((By.CLASS_NAME, 'item-root'))
+                        )
+                    except Exception as e:
+                        self.logger.warning(f"等待搜索结果超时: {str(e)}")
+                        return []
+                    
+                    page_source = driver.page_source
                 
                 # 获取页面内容并解析
                 movies = []
-                soup = BeautifulSoup(self.driver.page_source, 'lxml')
+                soup = BeautifulSoup(page_source, 'lxml')
                 items = soup.select('.item-root')
                 
                 if not items:
@@ -237,57 +204,103 @@ class MovieCrawler(BaseCrawler):
                 if retry_count >= max_retries:
                     return []
                 time.sleep(2)  # 等待2秒后重试
-                
-            finally:
-                if self.driver:
-                    try:
-                        self.driver.quit()
-                    except:
-                        pass
-                    self.driver = None
     
-    def _process_api_results(self, movies_data: List[Dict]) -> List[Dict[str, Any]]:
-        """处理API搜索结果"""
+    def _detail_request(self, douban_id: str) -> Dict[str, Any]:
+        """构造详情页请求参数"""
+        return {
+            'url': f"https://movie.douban.com/subject/{douban_id}/",
+            'headers': {
+                'User-Agent': self._get_random_user_agent(),
+                'Referer': 'https://movie.douban.com/'
+            },
+            'timeout': 5
+        }
+    
+    def _collect_detail_summary(self, douban_id: str, future: Future) -> Optional[Dict[str, Any]]:
+        """读取详情页请求结果，失败时返回None"""
+        try:
+            return parse_detail_summary(future.result().content)
+        except Exception as e:
+            self.logger.error(f"获取电影 {douban_id} 详情失败: {str(e)}")
+            return None
+    
+    def _on_late_detail(self, douban_id: str, on_enriched: Optional[Callable[[str, Dict[str, Any]], None]],
+                        future: Future):
+        """截止时间之后才返回的详情，记录下来供前端补充"""
+        fields = self._collect_detail_summary(douban_id, future)
+        if fields is None:
+            return
+        with self._late_details_lock:
+            self._late_details[douban_id] = fields
+            self._late_details.move_to_end(douban_id)
+            while len(self._late_details) > self.LATE_DETAILS_LIMIT:
+                self._late_details.popitem(last=False)
+        if on_enriched:
+            try:
+                on_enriched(douban_id, fields)
+            except Exception as e:
+                self.logger.error(f"推送电影 {douban_id} 详情失败: {str(e)}")
+    
+    def get_enriched_details(self, douban_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """获取搜索返回后才补全的详情字段"""
+        with self._late_details_lock:
+            return {
+                douban_id: self._late_details[douban_id]
+                for douban_id in douban_ids
+                if douban_id in self._late_details
+            }
+    
+    def _process_api_results(self, movies_data: List[Dict], deadline: Optional[float] = None,
+                             on_enriched: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
+        """
+        处理API搜索结果
+        并发获取详情页补全评分和导演，到达截止时间后返回已有结果，
+        未完成的详情在后台继续获取，完成后记录并回调on_enriched
+        :param movies_data: 搜索建议接口返回的数据
+        :param deadline: 等待详情的最长秒数，默认使用SEARCH_DEADLINE
+        :param on_enriched: 迟到详情的回调，参数为(douban_id, 字段字典)
+        """
+        if deadline is None:
+            deadline = self.config.SEARCH_DEADLINE
+        
         movies = []
+        futures = {}
         for movie in movies_data[:10]:
             if movie.get('type') == 'movie':
                 try:
-                    # 获取电影详情以获取评分和导演信息
-                    detail_url = f"https://movie.douban.com/subject/{movie.get('id')}/"
-                    headers = {
-                        'User-Agent': self._get_random_user_agent(),
-                        'Referer': 'https://movie.douban.com/'
-                    }
-                    
-                    # 添加随机延时避免被封
-                    time.sleep(random.uniform(1, 2))
-                    
-                    detail_response = requests.get(detail_url, headers=headers, timeout=5)
-                    detail_soup = BeautifulSoup(detail_response.text, 'html.parser')
-                    
-                    # 获取评分
-                    rating_element = detail_soup.select_one('#interest_sectl strong.rating_num')
-                    rating = float(rating_element.text.strip()) if rating_element else None
-                    
-                    # 获取导演
-                    director = ''
-                    director_element = detail_soup.select_one('a[rel="v:directedBy"]')
-                    if director_element:
-                        director = director_element.text.strip()
-                    
                     movie_info = {
                         'douban_id': movie.get('id'),
                         'name': movie.get('title', ''),
                         'year': movie.get('year', ''),
                         'img': movie.get('img', '').replace('s_ratio', 'l_ratio'),
-                        'director': director,  # 使用从详情页获取的导演信息
-                        'rating': rating,
-                        'sub_title': '',
-                        'is_added': self.db_manager.check_movie_exists(movie.get('id'))
+                        'director': '',  # 从详情页获取导演信息
+                        'rating': None,
+                        'sub_title': ''
                     }
                     movies.append(movie_info)
+                    futures[self.engine.submit(self._detail_request(movie_info['douban_id']))] = movie_info
                 except Exception as e:
                     self.logger.error(f"处理电影信息失败: {str(e)}")
+        
+        if not futures:
+            return movies
+        
+        done, pending = wait(futures, timeout=deadline)
+        for future in done:
+            movie_info = futures[future]
+            fields = self._collect_detail_summary(movie_info['douban_id'], future)
+            if fields:
+                movie_info.update(fields)
+        
+        if pending:
+            self.logger.info(f"{len(pending)} 部电影详情未在 {deadline} 秒内返回，先返回部分结果")
+        for future in pending:
+            movie_info = futures[future]
+            movie_info['enriching'] = True
+            future.add_done_callback(
+                functools.partial(self._on_late_detail, movie_info['douban_id'], on_enriched)
+            )
+        
         return movies
     
     def _process_selenium_results(self, page_source: str) -> List[Dict[str, Any]]:
@@ -356,93 +369,148 @@ class MovieCrawler(BaseCrawler):
                 'director': director,
                 'rating': rating,
                 'sub_title': '',
-                'genre': '',  # 添加空的genre字段
-                'is_added': self.db_manager.check_movie_exists(douban_id)
+                'genre': ''  # 添加空的genre字段
             }
         except Exception as e:
             self.logger.error(f"提取电影信息失败: {str(e)}")
             return None
     
-    def get_movie_comments(self, douban_id: str, max_pages: int = 5) -> List[Dict[str, Any]]:
-        """获取电影评论"""
-        comments = []
-        try:
-            for page in range(max_pages):
-                url = f"https://movie.douban.com/subject/{douban_id}/comments"
-                params = {
-                    'start': page * 20,
-                    'limit': 20,
-                    'status': 'P',
-                    'sort': 'new_score'
-                }
-                headers = {
-                    'User-Agent': self._get_random_user_agent(),
-                    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
-                    'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-                    'Connection': 'close',
-                    'Host': 'movie.douban.com',
-                    'Referer': 'https://movie.douban.com/'
-                }
-                
-                response = requests.get(url, params=params, headers=headers, timeout=10)
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # 获取评论区域
-                comment_items = soup.find_all('div', class_='comment-item')
-                
-                for item in comment_items:
-                    try:
-                        # 获取用户名
-                        user = item.find('span', class_='comment-info').find('a').text.strip()
-                        
-                        # 获取评论内容
-                        comment_text = item.find('span', class_='short').text.strip()
-                        
-                        # 获取评论时间并处理格式
-                        date_str = item.find('span', class_='comment-time').get('title', '').strip()
-                        if not date_str:  # 如果title属性为空，获取文本内容
-                            date_str = item.find('span', class_='comment-time').text.strip()
-                        
-                        try:
-                            # 尝试解析完整的日期时间格式
-                            date = datetime.strptime(date_str, '%Y-%m-%d %H:%M:%S')
-                        except ValueError:
-                            try:
-                                # 尝试解析只有日期的格式
-                                date = datetime.strptime(date_str, '%Y-%m-%d')
-                            except ValueError:
-                                # 如果都失败了，只保留日期部分
-                                date_str = date_str.split()[0]  # 取第一部分（日期）
-                                date = datetime.strptime(date_str, '%Y-%m-%d')
-                        
-                        # 只有评论内容不为空时才添加
-                        if comment_text.strip():
-                            comments.append({
-                                'user': user,
-                                'comment_text': comment_text,
-                                'date': date,
-                                'sentiment': None
-                            })
-                        
-                    except Exception as e:
-                        self.logger.error(f"解析评论失败: {str(e)}")
-                        continue
-                
-                # 检查是否获取到评论
-                if not comment_items:
-                    self.logger.warning(f"页面 {page + 1} 未获取到评论，可能需要登录或遇到反爬限制")
-                    break
-                
-                # 添加随机延时避免被封
-                time.sleep(random.uniform(2, 4))
+    def _comment_page_request(self, douban_id: str, page: int, sort: str = 'new_score') -> Dict[str, Any]:
+        """构造评论分页请求参数"""
+        return {
+            'url': f"https://movie.douban.com/subject/{douban_id}/comments",
+            'params': {
+                'start': page * 20,
+                'limit': 20,
+                'status': 'P',
+                'sort': sort
+            },
+            'headers': {
+                'User-Agent': self._get_random_user_agent(),
+                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
+                'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+                'Referer': 'https://movie.douban.com/'
+            }
+        }
+    
+    def get_comment_page(self, douban_id: str, page: int, sort: str = 'new_score') -> Optional[List[Dict[str, Any]]]:
+        """
+        获取单页评论
+        与get_movie_comments不同，请求失败或遇到反爬页面时抛出异常，供任务队列重试
+        :return: 评论列表，没有更多评论时返回None
+        """
+        request = self._comment_page_request(douban_id, page, sort)
+        self._handle_rate_limit(request['url'])
+        response = self.transport.get(**request)
+        response.raise_for_status()
+        reason = self.throttle.block_reason(response)
+        if reason:
+            raise Exception(f"检测到反爬限制({reason})")
+        return parse_comment_page(response.content)
+    
+    @staticmethod
+    def _is_after_watermark(comment: Dict[str, Any], watermark: Dict[str, Any]) -> bool:
+        """
+        评论是否需要保存：比高水位新，或与高水位同一秒但不是高水位那条评论
+        同一秒的评论无法判断先后，全部保留，已保存过的由 (movie_id, user, date) 唯一索引去重
+        """
+        if comment['date'] != watermark['date']:
+            return comment['date'] > watermark['date']
+        return comment['user'] != watermark['user']
+    
+    @staticmethod
+    def _reached_watermark(comment: Dict[str, Any], watermark: Dict[str, Any]) -> bool:
+        """是否翻到了高水位：就是高水位那条评论，或者比它更早"""
+        if comment['date'] != watermark['date']:
+            return comment['date'] < watermark['date']
+        return comment['user'] == watermark['user']
+    
+    def stream_movie_comments(self, douban_id: str, sink: Callable[[List[Dict[str, Any]]], None],
+                              max_pages: int = 5, incremental: bool = False,
+                              watermark: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        流式抓取电影评论
+        多个分页请求同时在途，每解析完一页就交给sink（例如BatchWriter.put），不在内存中累积。
+        sink抛出的异常会中止抓取并向上抛出
+        :param douban_id: 豆瓣电影ID
+        :param sink: 接收每页评论的函数
+        :param max_pages: 最大爬取页数
+        :param incremental: 增量模式，按时间从新到旧翻页
+        :param watermark: 增量模式下上次抓到的最新评论 {'date', 'user'}，
+                          翻到不比它新的评论即停止，翻满max_pages仍未到达时complete为False
+        :return: {'count': 评论数, 'newest': 最新的一条评论, 'failed': 是否因请求失败或反爬提前停止,
+                  'complete': 是否完整抓完，只有为True时才能用newest推进高水位}
+        """
+        result = {'count': 0, 'newest': None, 'failed': False, 'complete': False}
+        
+        def emit(page_comments: List[Dict[str, Any]]):
+            if not page_comments:
+                return
+            newest = max(page_comments, key=lambda c: c['date'])
+            if result['newest'] is None or newest['date'] > result['newest']['date']:
+                result['newest'] = dict(newest)
+            result['count'] += len(page_comments)
+            sink(page_comments)
+        
+        def on_page(page: int, response) -> bool:
+            if isinstance(response, Exception):
+                self.logger.error(f"获取评论页 {page + 1} 失败: {str(response)}")
+                result['failed'] = True
+                return False
             
-            if not comments:
-                self.logger.warning("未获取到任何有效评论")
-            else:
-                self.logger.info(f"成功获取 {len(comments)} 条评论")
+            # 反爬页面、登录跳转和错误状态码同样没有评论条目，不能当成翻到了末页
+            reason = self.throttle.block_reason(response)
+            if reason is None and response.status_code >= 400:
+                reason = f"HTTP {response.status_code}"
+            if reason:
+                self.logger.error(f"获取评论页 {page + 1} 失败: {reason}")
+                result['failed'] = True
+                return False
             
-            return comments
+            page_comments = parse_comment_page(response.content)
             
+            # 正常页面中没有评论条目，说明已经没有更多评论
+            if page_comments is None:
+                self.logger.info(f"页面 {page + 1} 没有更多评论，停止翻页")
+                result['complete'] = True
+                return False
+            
+            if watermark:
+                new_comments = [c for c in page_comments if self._is_after_watermark(c, watermark)]
+                emit(new_comments)
+                if any(self._reached_watermark(c, watermark) for c in page_comments):
+                    self.logger.info(f"页面 {page + 1} 已到达上次抓取的位置，停止翻页")
+                    result['complete'] = True
+                    return False
+                return True
+            
+            emit(page_comments)
+            return True
+        
+        sort = 'time' if incremental else 'new_score'
+        page_requests = [self._comment_page_request(douban_id, page, sort) for page in range(max_pages)]
+        self.engine.crawl_pages(page_requests, on_page)
+        # 有高水位时必须翻到它或翻到末页才算完整，翻满max_pages仍未到达说明中间还有没抓的评论
+        if watermark and not result['complete'] and not result['failed']:
+            self.logger.warning(f"翻完 {max_pages} 页仍未到达上次抓取的位置，保留原高水位")
+        result['complete'] = not result['failed'] and (result['complete'] or not watermark)
+        
+        if not result['count']:
+            self.logger.warning("未获取到任何有效评论")
+        else:
+            self.logger.info(f"成功获取 {result['count']} 条评论")
+        return result
+    
+    def get_movie_comments(self, douban_id: str, max_pages: int = 5, incremental: bool = False,
+                           watermark: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        获取电影评论，全部抓完后一次返回
+        页数较多时应使用stream_movie_comments边抓边写库
+        """
+        comments = []
+        try:
+            self.stream_movie_comments(douban_id, comments.extend, max_pages, incremental, watermark)
+            return comments
         except Exception as e:
             self.logger.error(f"获取电影评论失败: {str(e)}")
-            return [] 
\ No newline at end of file
+            return []
@@ -0,0 +1,173 @@
+from typing import List, Dict, Any, Optional, Union
+from datetime import datetime
+import logging
+import re
+from lxml import etree, html as lxml_html
+
+logger = logging.getLogger(__name__)
+
+# bytes输入统一按utf-8解析，豆瓣页面都是utf-8
+_UTF8_PARSER = lxml_html.HTMLParser(encoding='utf-8')
+
+def _has_class(name: str) -> str:
+    """XPath中按单个class匹配，等价于CSS的 .name"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+# 评论页选择器
+_COMMENT_ITEMS = etree.XPath(f"//div[{_has_class('comment-item')}]")
+_COMMENT_USER = etree.XPath(f"string((.//span[{_has_class('comment-info')}]//a)[1])")
+_COMMENT_TEXT = etree.XPath(f"(.//span[{_has_class('short')}])[1]")
+_COMMENT_TIME = etree.XPath(f"(.//span[{_has_class('comment-time')}])[1]")
+
+# 详情页选择器
+_OG_TITLE = etree.XPath('//meta[@property="og:title"]/@content')
+_OG_IMAGE = etree.XPath('//meta[@property="og:image"]/@content')
+_TITLE = etree.XPath('(//*[@id="content"]//h1)[1]')
+_TITLE_YEAR = etree.XPath(f".//span[{_has_class('year')}]")
+_DIRECTOR = etree.XPath('(//a[@rel="v:directedBy"])[1]')
+_RATING = etree.XPath(f'(//*[@id="interest_sectl"]//strong[{_has_class("rating_num")}])[1]')
+_STARRING = etree.XPath('//a[@rel="v:starring"]')
+_GENRES = etree.XPath('//span[@property="v:genre"]')
+_RELEASE_DATE = etree.XPath('(//span[@property="v:initialReleaseDate"])[1]')
+
+def _parse_document(html: Union[str, bytes]) -> etree._Element:
+    """解析HTML文档"""
+    if isinstance(html, bytes):
+        return lxml_html.document_fromstring(html, parser=_UTF8_PARSER)
+    return lxml_html.document_fromstring(html)
+
+def _first_text(elements: List[etree._Element]) -> Optional[str]:
+    """取第一个元素的去空白文本"""
+    return elements[0].text_content().strip() if elements else None
+
+def parse_comment_date(date_str: str) -> datetime:
+    """解析评论时间，兼容带时分秒和只有日期两种格式"""
+    try:
+        # 尝试解析完整的日期时间格式
+        return datetime.strptime(date_str, '%Y-%m-%d %H:%M:%S')
+    except ValueError:
+        try:
+            # 尝试解析只有日期的格式
+            return datetime.strptime(date_str, '%Y-%m-%d')
+        except ValueError:
+            # 如果都失败了，只保留日期部分
+            return datetime.strptime(date_str.split()[0], '%Y-%m-%d')
+
+def parse_comment_page(html: Union[str, bytes]) -> Optional[List[Dict[str, Any]]]:
+    """
+    解析评论页
+    只访问评论条目节点，返回与原BeautifulSoup实现相同的结构
+    :return: 评论列表，页面中没有评论条目时返回None
+    """
+    items = _COMMENT_ITEMS(_parse_document(html))
+    if not items:
+        return None
+
+    comments = []
+    for item in items:
+        try:
+            user = _COMMENT_USER(item).strip()
+
+            text_elements = _COMMENT_TEXT(item)
+            time_elements = _COMMENT_TIME(item)
+            if not text_elements or not time_elements:
+                raise ValueError('评论条目缺少内容或时间')
+            comment_text = text_elements[0].text_content().strip()
+
+            date_str = (time_elements[0].get('title') or '').strip()
+            if not date_str:  # 如果title属性为空，获取文本内容
+                date_str = time_elements[0].text_content().strip()
+            date = parse_comment_date(date_str)
+
+            # 只有评论内容不为空时才添加
+            if comment_text:
+                comments.append({
+                    'user': user,
+                    'comment_text': comment_text,
+                    'date': date,
+                    'sentiment': None
+                })
+        except Exception as e:
+            logger.error(f"解析评论失败: {str(e)}")
+            continue
+
+    return comments
+
+def parse_detail_summary(html: Union[str, bytes]) -> Dict[str, Any]:
+    """从详情页提取搜索结果需要的评分和导演"""
+    doc = _parse_document(html)
+    rating = _first_text(_RATING(doc))
+    return {
+        'rating': float(rating) if rating else None,
+        'director': _first_text(_DIRECTOR(doc)) or ''
+    }
+
+def _normalize_img_url(img_url: str) -> str:
+    """海报换成大图并统一图片域名"""
+    if img_url:
+        img_url = img_url.replace('s_ratio', 'l_ratio')
+        img_url = img_url.replace('img1.doubanio.com', 'img9.doubanio.com')
+        img_url = img_url.replace('img2.doubanio.com', 'img9.doubanio.com')
+        img_url = img_url.replace('img3.doubanio.com', 'img9.doubanio.com')
+    return img_url
+
+def parse_movie_detail(html: Union[str, bytes], douban_id: str) -> Dict[str, Any]:
+    """
+    解析电影详情页
+    :raises ValueError: 页面缺少标题或海报（通常是反爬页面）
+    """
+    doc = _parse_document(html)
+
+    # 获取基本信息
+    og_title = _OG_TITLE(doc)
+    og_image = _OG_IMAGE(doc)
+    if not og_title or not og_image:
+        raise ValueError(f"详情页缺少基本信息: {douban_id}")
+    name = og_title[0]
+    img_url = _normalize_img_url(og_image[0])
+
+    # 获取年份和副标题
+    year = None
+    sub_title = ''
+    title_elements = _TITLE(doc)
+    if title_elements:
+        title_text = title_elements[0].text_content()
+        # 处理年份
+        year_match = re.search(r'\((\d{4})\)', title_text)
+        if year_match:
+            year = year_match.group(1)
+            name = re.sub(r'\s*\(\d{4}\)\s*', '', name)  # 从标题中移除年份
+
+        # 处理副标题
+        spans = _TITLE_YEAR(title_elements[0])
+        if spans:
+            # 移除副标题中的年份部分
+            title_text = title_text.replace(spans[0].text_content(), '').strip()
+            # 获取主标题之后的文本作为副标题
+            if name in title_text:
+                sub_title = title_text.replace(name, '').strip()
+
+    # 获取其他信息
+    director = _first_text(_DIRECTOR(doc)) or '未知'
+
+    rating = _first_text(_RATING(doc))
+    rating = float(rating) if rating else None
+
+    actors = '/'.join([actor.text_content().strip() for actor in _STARRING(doc)[:3]])
+    genre = '/'.join([g.text_content().strip() for g in _GENRES(doc)])
+
+    release_date = _RELEASE_DATE(doc)
+    release_date = datetime.strptime(release_date[0].text_content().split('(')[0], '%Y-%m-%d') if release_date else None
+
+    return {
+        'douban_id': douban_id,
+        'name': name,
+        'rating': rating,
+        'director': director,
+        'actors': actors,
+        'genre': genre,
+        'release_date': release_date,
+        'img_url': img_url,
+        'year': year,
+        'sub_title': sub_title
+    }
@@ -0,0 +1,93 @@
+from typing import List, Dict, Any, Callable, Optional, Iterable
+import logging
+import queue
+import threading
+import time
+from config.config import Config
+
+_STOP = object()
+
+class BatchWriter:
+    """
+    抓取到入库之间的流水线
+    抓取线程按页put记录，后台线程攒够一批或等待超时后写库。
+    队列有界，写库跟不上时put会阻塞，抓取随之放慢，内存占用保持有界；
+    已写入的批次不受后续抓取失败影响
+    """
+
+    def __init__(self, write: Callable[[List[Dict[str, Any]]], Any], batch_size: Optional[int] = None,
+                 max_pending: Optional[int] = None, flush_interval: Optional[float] = None):
+        """
+        :param write: 写入一批记录的函数
+        :param batch_size: 每批最多记录数
+        :param max_pending: 队列中最多等待写入的页数
+        :param flush_interval: 没有新记录时多久写入一次未满的批次(秒)
+        """
+        config = Config()
+        self.logger = logging.getLogger(__name__)
+        self.write = write
+        self.batch_size = batch_size or config.PIPELINE_BATCH_SIZE
+        self.flush_interval = flush_interval or config.PIPELINE_FLUSH_INTERVAL
+        self._queue = queue.Queue(maxsize=max_pending or config.PIPELINE_MAX_PENDING)
+        self.written = 0
+        self.error: Optional[Exception] = None
+        self._thread = threading.Thread(target=self._run, name='batch-writer', daemon=True)
+        self._thread.start()
+
+    def put(self, records: Iterable[Dict[str, Any]]):
+        """提交一页记录，写库已失败时抛出异常让抓取尽早停止"""
+        if self.error:
+            raise self.error
+        records = list(records)
+        if records:
+            self._queue.put(records)
+
+    def _flush(self, buffer: List[Dict[str, Any]]):
+        """写入一批，失败后丢弃后续记录但继续消费队列，避免抓取线程阻塞"""
+        if not buffer or self.error:
+            return
+        try:
+            self.write(buffer)
+            self.written += len(buffer)
+        except Exception as e:
+            self.error = e
+            self.logger.error(f"批量写入失败，已写入{self.written}条: {str(e)}")
+
+    def _run(self):
+        buffer = []
+        last_flush = time.monotonic()
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                break
+            if item:
+                buffer.extend(item)
+            if len(buffer) >= self.batch_size or \
+                    (buffer and time.monotonic() - last_flush >= self.flush_interval):
+                self._flush(buffer)
+                buffer = []
+                last_flush = time.monotonic()
+        self._flush(buffer)
+
+    def close(self):
+        """写入剩余记录并等待后台线程结束，写库失败时抛出异常"""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+        if self.error:
+            raise self.error
+
+    def __enter__(self) -> 'BatchWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # 抓取中途出错也要把已抓到的记录写完，原异常优先抛出
+        try:
+            self.close()
+        except Exception:
+            if exc_type is None:
+                raise
+        return False
@@ -1,77 +1,305 @@
-import requests
 import logging
-from typing import Optional, List
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, Tuple
 from datetime import datetime
 from database.models import ProxyPool
-from sqlalchemy.orm import Session
+from config.config import Config
+from .transport import get_transport
+
+class ProxyStats:
+    """单个代理的健康统计"""
+
+    # 延迟的指数滑动平均系数
+    LATENCY_ALPHA = 0.3
+
+    def __init__(self, proxy: str):
+        self.proxy = proxy
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.latency: Optional[float] = None
+        self.last_checked: Optional[datetime] = None
+
+    def record(self, success: bool, latency: Optional[float] = None):
+        """记录一次使用或验证结果"""
+        if success:
+            self.successes += 1
+            self.consecutive_failures = 0
+            if latency is not None:
+                self.latency = latency if self.latency is None else \
+                    self.LATENCY_ALPHA * latency + (1 - self.LATENCY_ALPHA) * self.latency
+        else:
+            self.failures += 1
+            self.consecutive_failures += 1
+
+    @property
+    def total(self) -> int:
+        return self.successes + self.failures
+
+    @property
+    def success_rate(self) -> float:
+        """拉普拉斯平滑后的成功率，新代理默认为0.5"""
+        return (self.successes + 1) / (self.total + 2)
+
+    @property
+    def score(self) -> float:
+        """综合得分：成功率越高、延迟越低得分越高"""
+        return self.success_rate / (1 + (self.latency or 1.0))
 
 class ProxyManager:
-    def __init__(self, db_session: Session):
-        self.session = db_session
+    """
+    内存代理池
+    启动时从proxy_pool表加载，后台线程并发验证并统计每个代理的延迟和成功率，
+    检出时按得分加权随机选择（别名表，O(1)），不做任何网络请求。
+    连续失败或成功率过低的代理自动剔除
+    """
+
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+        self.config = Config()
         self.logger = logging.getLogger(__name__)
-    
-    def _validate_proxy(self, proxy: str) -> bool:
-        """验证代理是否可用"""
+        self.transport = get_transport()
+        self._stats: Dict[str, ProxyStats] = {}
+        self._lock = threading.Lock()
+        # (代理列表, 概率表, 别名表)，整体替换保证检出时读到一致的快照
+        self._table: Tuple[List[str], List[float], List[int]] = ([], [], [])
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.load_from_db()
+
+    def load_from_db(self):
+        """从数据库加载代理，保留已有的统计"""
+        session = self.db_manager.get_session()
         try:
-            test_url = "https://www.douban.com"
-            response = requests.get(
-                test_url,
+            proxies = [row.proxy for row in session.query(ProxyPool.proxy).all()]
+        except Exception as e:
+            self.logger.error(f"加载代理失败: {str(e)}")
+            return
+        finally:
+            session.close()
+
+        with self._lock:
+            for proxy in proxies:
+                if proxy and proxy not in self._stats:
+                    self._stats[proxy] = ProxyStats(proxy)
+        self._rebuild_table()
+        self.logger.info(f"代理池加载完成，共{len(self._stats)}个代理")
+
+    def _rebuild_table(self):
+        """按得分重建别名采样表（Vose算法）"""
+        with self._lock:
+            proxies = list(self._stats)
+            weights = [self._stats[proxy].score for proxy in proxies]
+
+        n = len(proxies)
+        if n == 0:
+            self._table = ([], [], [])
+            return
+
+        total = sum(weights)
+        scaled = [weight * n / total for weight in weights]
+        prob = [0.0] * n
+        alias = [0] * n
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s = small.pop()
+            l = large.pop()
+            prob[s] = scaled[s]
+            alias[s] = l
+            scaled[l] = scaled[l] + scaled[s] - 1.0
+            (small if scaled[l] < 1.0 else large).append(l)
+        for i in small + large:
+            prob[i] = 1.0
+
+        self._table = (proxies, prob, alias)
+
+    def get_proxy(self) -> Optional[str]:
+        """按得分加权随机获取一个代理，不会阻塞"""
+        proxies, prob, alias = self._table
+        if not proxies:
+            return None
+        i = random.randrange(len(proxies))
+        return proxies[i] if random.random() < prob[i] else proxies[alias[i]]
+
+    def report(self, proxy: str, success: bool, latency: Optional[float] = None):
+        """记录爬虫使用代理的结果"""
+        with self._lock:
+            stats = self._stats.get(proxy)
+            if not stats:
+                return
+            stats.record(success, latency)
+            should_eject = self._is_bad(stats)
+        if should_eject:
+            self._eject(proxy)
+
+    def _is_bad(self, stats: ProxyStats) -> bool:
+        """是否应该剔除"""
+        if stats.consecutive_failures >= self.config.PROXY_MAX_FAILURES:
+            return True
+        return stats.total >= 5 and stats.success_rate < self.config.PROXY_MIN_SUCCESS_RATE
+
+    def _eject(self, proxy: str):
+        """从内存池和数据库中剔除代理"""
+        with self._lock:
+            if self._stats.pop(proxy, None) is None:
+                return
+        self._rebuild_table()
+        self.remove_proxy(proxy)
+        self.logger.info(f"剔除失效代理: {proxy}")
+
+    def _validate_proxy(self, proxy: str) -> Tuple[bool, Optional[float]]:
+        """
+        验证代理是否可用
+        :return: (是否可用, 延迟秒数)
+        """
+        try:
+            start = time.monotonic()
+            response = self.transport.get(
+                self.config.PROXY_VALIDATE_URL,
                 proxies={'http': proxy, 'https': proxy},
-                timeout=5
+                timeout=self.config.PROXY_VALIDATE_TIMEOUT,
+                use_cache=False
             )
-            return response.status_code == 200
-        except:
-            return False
-    
-    def get_proxy(self) -> Optional[str]:
-        """获取一个可用代理"""
+            return response.status_code == 200, time.monotonic() - start
+        except Exception:
+            return False, None
+
+    def validate_all(self):
+        """并发验证池中所有代理"""
+        with self._lock:
+            proxies = list(self._stats)
+        if not proxies:
+            return
+
+        with ThreadPoolExecutor(max_workers=self.config.PROXY_VALIDATE_WORKERS) as executor:
+            results = list(executor.map(self._validate_proxy, proxies))
+
+        now = datetime.now()
+        bad = []
+        with self._lock:
+            for proxy, (ok, latency) in zip(proxies, results):
+                stats = self._stats.get(proxy)
+                if not stats:
+                    continue
+                stats.record(ok, latency)
+                stats.last_checked = now
+                if self._is_bad(stats):
+                    bad.append(proxy)
+        for proxy in bad:
+            self._eject(proxy)
+        self._rebuild_table()
+        self._save_last_checked([proxy for proxy, (ok, _) in zip(proxies, results) if ok], now)
+
+    def _save_last_checked(self, proxies: List[str], checked_at: datetime):
+        """回写验证时间"""
+        if not proxies:
+            return
+        session = self.db_manager.get_session()
         try:
-            # 从数据库获取最近检查过的代理
-            proxy = self.session.query(ProxyPool)\
-                .order_by(ProxyPool.last_checked.desc())\
-                .first()
-            
-            if proxy and self._validate_proxy(proxy.proxy):
-                return proxy.proxy
-                
-            # 如果没有可用代理，则获取新代理
-            return self._fetch_new_proxy()
-            
+            session.query(ProxyPool)\
+                .filter(ProxyPool.proxy.in_(proxies))\
+                .update({'last_checked': checked_at}, synchronize_session=False)
+            session.commit()
         except Exception as e:
-            self.logger.error(f"获取代理失败: {str(e)}")
-            return None
-    
+            session.rollback()
+            self.logger.error(f"更新代理验证时间失败: {str(e)}")
+        finally:
+            session.close()
+
+    def _run(self):
+        """后台验证循环"""
+        while not self._stop_event.is_set():
+            try:
+                self.load_from_db()
+                if len(self._stats) < self.config.PROXY_MIN_POOL_SIZE:
+                    self._fetch_new_proxy()
+                self.validate_all()
+            except Exception as e:
+                self.logger.error(f"代理验证失败: {str(e)}")
+            self._stop_event.wait(self.config.PROXY_VALIDATE_INTERVAL)
+
+    def start(self):
+        """启动后台验证线程"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='proxy-validator', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止后台验证线程"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=self.config.PROXY_VALIDATE_TIMEOUT + 1)
+
     def _fetch_new_proxy(self) -> Optional[str]:
         """从代理API获取新代理"""
         try:
             if not self.config.PROXY_POOL_URL:
                 return None
-                
-            response = requests.get(self.config.PROXY_POOL_URL)
+
+            # 直连代理API：不经过池中代理，也不占用豆瓣的限流额度、不计入代理成功率，
+            # 代理池整体变差时仍能补充新代理
+            response = self.transport.get(self.config.PROXY_POOL_URL, use_cache=False, proxies={})
             if response.status_code == 200:
                 proxy = response.text.strip()
-                if self._validate_proxy(proxy):
+                ok, latency = self._validate_proxy(proxy)
+                if ok:
                     # 保存到数据库
-                    new_proxy = ProxyPool(
-                        proxy=proxy,
-                        protocol='http',
-                        last_checked=datetime.now()
-                    )
-                    self.session.add(new_proxy)
-                    self.session.commit()
+                    session = self.db_manager.get_session()
+                    try:
+                        session.add(ProxyPool(
+                            proxy=proxy,
+                            protocol='http',
+                            last_checked=datetime.now()
+                        ))
+                        session.commit()
+                    finally:
+                        session.close()
+
+                    with self._lock:
+                        stats = self._stats.setdefault(proxy, ProxyStats(proxy))
+                        stats.record(True, latency)
+                    self._rebuild_table()
                     return proxy
             return None
-            
+
         except Exception as e:
             self.logger.error(f"获取新代理失败: {str(e)}")
             return None
-    
+
     def remove_proxy(self, proxy: str):
         """移除无效代理"""
+        session = self.db_manager.get_session()
         try:
-            self.session.query(ProxyPool)\
+            session.query(ProxyPool)\
                 .filter(ProxyPool.proxy == proxy)\
                 .delete()
-            self.session.commit()
+            session.commit()
         except Exception as e:
-            self.logger.error(f"移除代理失败: {str(e)}") 
\ No newline at end of file
+            session.rollback()
+            self.logger.error(f"移除代理失败: {str(e)}")
+        finally:
+            session.close()
+
+    def stats(self) -> List[Dict[str, object]]:
+        """每个代理的健康统计"""
+        with self._lock:
+            return [{
+                'proxy': stats.proxy,
+                'success_rate': round(stats.success_rate, 3),
+                'latency': round(stats.latency, 3) if stats.latency is not None else None,
+                'score': round(stats.score, 3),
+                'consecutive_failures': stats.consecutive_failures
+            } for stats in self._stats.values()]
+
+def start_proxy_pool(db_manager) -> ProxyManager:
+    """创建代理池、启动后台验证，并接入共享传输层"""
+    proxy_manager = ProxyManager(db_manager)
+    proxy_manager.start()
+    get_transport().set_proxy_provider(proxy_manager)
+    return proxy_manager
@@ -0,0 +1,269 @@
+from typing import Dict, Optional, Callable, Tuple
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse
+from config.config import Config
+
+class TokenBucket:
+    """
+    令牌桶限速器
+    线程安全，同一个桶可以同时被线程和协程使用
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        :param rate: 每秒补充的令牌数
+        :param capacity: 桶容量（允许的突发请求数）
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        """按流逝时间补充令牌"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def set_rate(self, rate: float, drain: bool = False):
+        """
+        调整补充速率
+        :param drain: 同时清空剩余令牌，立即停止突发请求
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = rate
+            if drain:
+                self.tokens = min(self.tokens, 0.0)
+
+    def increase_rate(self, expected: float, step: float, max_rate: float) -> float:
+        """
+        加性增加速率
+        :param expected: 调用方上次看到的速率，当前速率已被其他地方调整过时不再增加
+        :return: 调整后的速率
+        """
+        with self._lock:
+            if self.rate == expected:
+                self._refill(time.monotonic())
+                self.rate = min(max_rate, self.rate + step)
+            return self.rate
+
+    def decrease_rate(self, expected: float, factor: float, min_rate: float) -> float:
+        """
+        乘性减少速率并清空剩余令牌，立即停止突发请求
+        :param expected: 调用方上次看到的速率，当前速率已低于它说明已经退避过，不再重复减少
+        :return: 调整后的速率
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            if self.rate >= expected:
+                self.rate = max(min_rate, self.rate * factor)
+            self.tokens = min(self.tokens, 0.0)
+            return self.rate
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """
+        预占令牌
+        令牌不足时允许透支，调用方按返回的等待时间排队
+        :return: 需要等待的秒数
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens -= tokens
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def acquire(self, tokens: float = 1.0):
+        """阻塞等待令牌"""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    def refund(self, tokens: float = 1.0):
+        """退回预占后没有使用的令牌"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.capacity, self.tokens + tokens)
+
+    async def acquire_async(self, tokens: float = 1.0):
+        """在协程中等待令牌，等待期间被取消时退回预占的令牌"""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                self.refund(tokens)
+                raise
+
+class SharedTokenBucket(TokenBucket):
+    """
+    跨进程共享的令牌桶
+    令牌数和速率保存在本地sqlite文件中，每次预占在一个写事务里完成，
+    同一台机器上的多个抓取进程共用同一份请求预算。
+    自适应限流对速率的增减也在共享状态上进行，多个进程同时观察到的同一次变化只生效一次
+    """
+
+    def __init__(self, path: str, key: str, rate: float, capacity: float, idle_reset: float = 0.0):
+        """
+        :param path: sqlite文件路径
+        :param key: 桶的名字，通常是主机名
+        :param idle_reset: 共享状态超过这么多秒没有进程使用时按配置重新初始化
+        """
+        super().__init__(rate, capacity)
+        self.path = path
+        self.key = key
+        self._local = threading.local()
+        self._seed(idle_reset)
+
+    def _seed(self, idle_reset: float):
+        """
+        按配置初始化共享状态
+        配置的速率或容量变了，或者没有其他进程在用（旧的退避已经过时）时重新初始化，
+        否则沿用正在运行的进程调整后的速率
+        """
+        now = time.time()
+        self._connection().execute(
+            'INSERT INTO token_buckets (key, tokens, updated, rate, base_rate, capacity) '
+            'VALUES (?, ?, ?, ?, ?, ?) '
+            'ON CONFLICT (key) DO UPDATE SET '
+            'tokens = excluded.tokens, updated = excluded.updated, rate = excluded.rate, '
+            'base_rate = excluded.base_rate, capacity = excluded.capacity '
+            'WHERE base_rate IS NOT excluded.base_rate OR capacity IS NOT excluded.capacity '
+            'OR updated < ?',
+            (self.key, self.capacity, now, self.rate, self.rate, self.capacity, now - idle_reset)
+        )
+        self.rate = self._connection().execute(
+            'SELECT rate FROM token_buckets WHERE key = ?', (self.key,)
+        ).fetchone()[0]
+
+    def _connection(self) -> sqlite3.Connection:
+        """每个线程使用独立的连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, isolation_level=None, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS token_buckets (
+                    key TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    updated REAL NOT NULL,
+                    rate REAL NOT NULL,
+                    base_rate REAL,
+                    capacity REAL
+                )
+            ''')
+            # 旧版本的状态文件没有记录配置，补上列后第一次使用时会按配置重新初始化
+            columns = {row[1] for row in conn.execute('PRAGMA table_info(token_buckets)')}
+            for column in ('base_rate', 'capacity'):
+                if column not in columns:
+                    conn.execute(f'ALTER TABLE token_buckets ADD COLUMN {column} REAL')
+            self._local.conn = conn
+        return conn
+
+    def _update(self, change: Callable[[float, float], Tuple[float, float]]) -> float:
+        """
+        在写事务中补充令牌并应用修改
+        进程之间没有共同的单调时钟，这里使用墙上时间
+        :param change: 接收(令牌数, 速率)，返回新的(令牌数, 速率)
+        :return: 修改后的令牌数
+        """
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            tokens, updated, rate = conn.execute(
+                'SELECT tokens, updated, rate FROM token_buckets WHERE key = ?', (self.key,)
+            ).fetchone()
+            now = time.time()
+            tokens = min(self.capacity, tokens + max(0.0, now - updated) * rate)
+            tokens, rate = change(tokens, rate)
+            conn.execute(
+                'UPDATE token_buckets SET tokens = ?, updated = ?, rate = ? WHERE key = ?',
+                (tokens, now, rate, self.key)
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        self.rate = rate
+        return tokens
+
+    def set_rate(self, rate: float, drain: bool = False):
+        """调整所有进程共用的补充速率"""
+        self._update(lambda tokens, _: (min(tokens, 0.0) if drain else tokens, rate))
+
+    def increase_rate(self, expected: float, step: float, max_rate: float) -> float:
+        """在共享速率上加性增加，其他进程已经调整过时沿用它的结果"""
+        self._update(lambda tokens, rate: (tokens, min(max_rate, rate + step) if rate == expected else rate))
+        return self.rate
+
+    def decrease_rate(self, expected: float, factor: float, min_rate: float) -> float:
+        """在共享速率上乘性减少并清空剩余令牌，其他进程已经退避过时不再重复减少"""
+        self._update(lambda tokens, rate: (min(tokens, 0.0), max(min_rate, rate * factor) if rate >= expected else rate))
+        return self.rate
+
+    def refund(self, tokens: float = 1.0):
+        """退回预占后没有使用的令牌"""
+        self._update(lambda current, rate: (min(self.capacity, current + tokens), rate))
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """预占令牌，返回需要等待的秒数"""
+        remaining = self._update(lambda current, rate: (current - tokens, rate))
+        if remaining >= 0:
+            return 0.0
+        return -remaining / self.rate
+
+class HostRateLimiter:
+    """按主机划分的令牌桶集合"""
+
+    def __init__(self, rate: Optional[float] = None, capacity: Optional[float] = None):
+        config = Config()
+        self.rate = rate if rate is not None else config.CRAWL_RATE
+        self.capacity = capacity if capacity is not None else config.CRAWL_BURST
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def _create_bucket(self, host: str) -> TokenBucket:
+        """创建主机对应的令牌桶，多进程抓取时使用跨进程共享的桶"""
+        config = Config()
+        if config.CRAWL_RATE_SHARED:
+            return SharedTokenBucket(config.CRAWL_RATE_PATH, host, self.rate, self.capacity,
+                                     idle_reset=config.CRAWL_BLOCK_COOLDOWN)
+        return TokenBucket(self.rate, self.capacity)
+
+    def bucket(self, url: str) -> TokenBucket:
+        """获取URL所属主机的令牌桶"""
+        host = urlparse(url).netloc or url
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._create_bucket(host)
+                self._buckets[host] = bucket
+            return bucket
+
+    def acquire(self, url: str):
+        """阻塞等待指定主机的令牌"""
+        self.bucket(url).acquire()
+
+    async def acquire_async(self, url: str):
+        """在协程中等待指定主机的令牌"""
+        await self.bucket(url).acquire_async()
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+def get_rate_limiter() -> HostRateLimiter:
+    """获取进程内共享的限速器"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                _rate_limiter = HostRateLimiter()
+    return _rate_limiter
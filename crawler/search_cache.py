@@ -0,0 +1,109 @@
+from typing import List, Dict, Any, Callable, Optional
+from collections import OrderedDict
+import logging
+import threading
+import time
+from config.config import Config
+
+SearchResults = List[Dict[str, Any]]
+
+class _Flight:
+    """一次进行中的上游搜索，相同关键词的请求等待它的结果"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[SearchResults] = None
+        self.error: Optional[BaseException] = None
+
+class SearchCache:
+    """
+    进程内搜索结果缓存
+    按规范化后的关键词缓存，带TTL和LRU容量上限；
+    同一关键词的并发请求合并为一次上游抓取（single-flight）
+    """
+
+    def __init__(self, ttl: Optional[float] = None, max_entries: Optional[int] = None):
+        config = Config()
+        self.logger = logging.getLogger(__name__)
+        self.ttl = ttl if ttl is not None else config.SEARCH_CACHE_TTL
+        self.max_entries = max_entries if max_entries is not None else config.SEARCH_CACHE_SIZE
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()  # key -> (过期时间, 结果)
+        self._flights: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+        self.counters = {'hits': 0, 'misses': 0, 'coalesced': 0, 'evictions': 0}
+
+    @staticmethod
+    def normalize(keyword: str) -> str:
+        """规范化关键词：去首尾空白、合并连续空白、忽略大小写"""
+        return ' '.join(keyword.split()).casefold()
+
+    @staticmethod
+    def _copy(results: SearchResults) -> SearchResults:
+        """返回副本，调用方修改结果不会影响缓存"""
+        return [dict(movie) for movie in results]
+
+    def get_or_load(self, keyword: str, loader: Callable[[str], SearchResults]) -> SearchResults:
+        """
+        获取搜索结果
+        缓存未命中时调用loader抓取；已有相同关键词的抓取在进行时等待其结果。
+        空结果不缓存，避免把反爬或网络失败的结果缓存下来
+        """
+        key = self.normalize(keyword)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.counters['hits'] += 1
+                return self._copy(entry[1])
+
+            flight = self._flights.get(key)
+            if flight:
+                self.counters['coalesced'] += 1
+                leader = False
+            else:
+                flight = _Flight()
+                self._flights[key] = flight
+                self.counters['misses'] += 1
+                leader = True
+
+        if not leader:
+            flight.done.wait()
+            if flight.error:
+                raise flight.error
+            return self._copy(flight.result)
+
+        try:
+            flight.result = loader(keyword)
+            if flight.result:
+                self._store(key, flight.result)
+            return self._copy(flight.result)
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def _store(self, key: str, results: SearchResults):
+        """写入缓存，超过容量时淘汰最久未访问的关键词"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, self._copy(results))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.counters['evictions'] += 1
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存统计"""
+        with self._lock:
+            stats = dict(self.counters)
+            stats['entries'] = len(self._entries)
+        lookups = stats['hits'] + stats['misses'] + stats['coalesced']
+        stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        return stats
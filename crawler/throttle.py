@@ -0,0 +1,164 @@
+from typing import Dict, Any, Optional
+from contextlib import contextmanager
+from urllib.parse import urlparse
+import logging
+import threading
+import time
+import requests
+from config.config import Config
+from .rate_limiter import HostRateLimiter, get_rate_limiter
+
+class _HostState:
+    """单个主机的当前限额"""
+
+    def __init__(self, rate: float, limit: int):
+        self.rate = rate
+        self.limit = limit
+        self.in_flight = 0
+        self.healthy = 0          # 上次调整后连续健康的响应数
+        self.blocked = 0          # 累计反爬信号数
+        self.backoffs = 0         # 累计退避次数
+        self.last_blocked: Optional[float] = None
+        self.last_signal: Optional[str] = None
+
+class AdaptiveThrottle:
+    """
+    AIMD自适应限流
+    所有爬取路径共用：响应正常时逐步加速率、加并发，
+    遇到403/429、反爬页面或跳转登录页时成倍退避。
+    速率在限速器的令牌桶上增减（共享令牌桶时所有进程共用一个速率），
+    并发由这里的槽位控制，限额按进程计算
+    """
+
+    BLOCK_STATUS_CODES = (403, 429)
+
+    def __init__(self, rate_limiter: Optional[HostRateLimiter] = None):
+        self.config = Config()
+        self.logger = logging.getLogger(__name__)
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self._hosts: Dict[str, _HostState] = {}
+        self._condition = threading.Condition()
+
+    @staticmethod
+    def _host(url: str) -> str:
+        return urlparse(url).netloc or url
+
+    def _state(self, host: str) -> _HostState:
+        """获取主机状态，调用方需持有锁"""
+        state = self._hosts.get(host)
+        if state is None:
+            # 共享令牌桶中可能是其他进程退避后的速率
+            state = _HostState(self.rate_limiter.bucket(host).rate, self.config.CRAWL_CONCURRENCY)
+            self._hosts[host] = state
+        return state
+
+    def block_reason(self, response: requests.Response) -> Optional[str]:
+        """判断响应是否为反爬信号，返回原因"""
+        if response.status_code in self.BLOCK_STATUS_CODES:
+            return f"HTTP {response.status_code}"
+        if any(marker in response.url for marker in self.config.LOGIN_URL_MARKERS):
+            return '跳转登录页'
+        if self.config.BLOCK_MARKER in response.text:
+            return '反爬页面'
+        return None
+
+    def observe(self, url: str, response: requests.Response):
+        """根据响应调整限额"""
+        reason = self.block_reason(response)
+        if reason:
+            self.report_blocked(url, reason)
+        elif response.status_code < 400:
+            self.report_healthy(url)
+
+    def report_healthy(self, url: str):
+        """记录一次正常响应，累计足够后加性增加"""
+        host = self._host(url)
+        with self._condition:
+            state = self._state(host)
+            state.healthy += 1
+            if state.healthy < self.config.CRAWL_HEALTHY_WINDOW:
+                return
+            if state.last_blocked and time.monotonic() - state.last_blocked < self.config.CRAWL_BLOCK_COOLDOWN:
+                return
+            state.healthy = 0
+            if state.limit < self.config.CRAWL_MAX_CONCURRENCY:
+                state.limit += 1
+                self._condition.notify_all()
+            expected = state.rate
+        rate = self.rate_limiter.bucket(url).increase_rate(
+            expected, self.config.CRAWL_RATE_STEP, self.config.CRAWL_MAX_RATE
+        )
+        with self._condition:
+            state.rate = rate
+
+    def report_blocked(self, url: str, reason: str):
+        """记录一次反爬信号，乘性减少"""
+        host = self._host(url)
+        now = time.monotonic()
+        with self._condition:
+            state = self._state(host)
+            state.blocked += 1
+            state.healthy = 0
+            state.last_signal = reason
+            # 同一批在途请求会接连被拦，冷却期内只退避一次
+            recent = state.last_blocked and now - state.last_blocked < self.config.CRAWL_BLOCK_COOLDOWN / 2
+            state.last_blocked = now
+            if recent:
+                return
+            state.backoffs += 1
+            state.limit = max(1, int(state.limit * self.config.CRAWL_BACKOFF_FACTOR))
+            expected, limit = state.rate, state.limit
+        rate = self.rate_limiter.bucket(url).decrease_rate(
+            expected, self.config.CRAWL_BACKOFF_FACTOR, self.config.CRAWL_MIN_RATE
+        )
+        with self._condition:
+            state.rate = rate
+        self.logger.warning(f"{host} 触发反爬({reason})，降到 {rate:.2f} 请求/秒、{limit} 并发")
+
+    def acquire(self, url: str):
+        """阻塞等待并发槽位"""
+        with self._condition:
+            state = self._state(self._host(url))
+            while state.in_flight >= state.limit:
+                self._condition.wait()
+            state.in_flight += 1
+
+    def release(self, url: str):
+        """释放并发槽位"""
+        with self._condition:
+            state = self._state(self._host(url))
+            state.in_flight -= 1
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(self, url: str):
+        """占用一个并发槽位"""
+        self.acquire(url)
+        try:
+            yield
+        finally:
+            self.release(url)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """每个主机当前的速率、并发限额和反爬计数"""
+        with self._condition:
+            return {host: {
+                'rate': round(state.rate, 3),
+                'concurrency': state.limit,
+                'in_flight': state.in_flight,
+                'blocked': state.blocked,
+                'backoffs': state.backoffs,
+                'last_signal': state.last_signal
+            } for host, state in self._hosts.items()}
+
+_throttle = None
+_throttle_lock = threading.Lock()
+
+def get_throttle() -> AdaptiveThrottle:
+    """获取进程内共享的自适应限流器"""
+    global _throttle
+    if _throttle is None:
+        with _throttle_lock:
+            if _throttle is None:
+                _throttle = AdaptiveThrottle()
+    return _throttle
@@ -0,0 +1,192 @@
+from typing import Dict, Any, Optional
+import logging
+import threading
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from urllib3.util.retry import Retry
+from config.config import Config
+from .http_cache import HttpCache
+from .http_archive import HttpArchive, RecordingAdapter, ReplayAdapter
+from .throttle import AdaptiveThrottle, get_throttle
+
+class HttpTransport:
+    """
+    爬虫共享的HTTP传输层
+    所有请求复用同一个Session，按主机维护keep-alive连接池，
+    统一处理超时与重试策略，并在开启时经过本地响应缓存
+    """
+
+    # 只对服务端错误重试，403/429属于反爬信号，重试只会加重封禁
+    RETRY_STATUS_CODES = (500, 502, 503, 504)
+
+    def __init__(self, config: Optional[Config] = None):
+        self.config = config or Config()
+        self.logger = logging.getLogger(__name__)
+        self.session = self._create_session()
+        # 录制或回放时响应必须真正经过适配器，不能被缓存拦下
+        archive_mode = self.config.HTTP_ARCHIVE_MODE
+        self.cache = HttpCache() if self.config.HTTP_CACHE_ENABLED and not archive_mode else None
+        self.proxy_provider = None
+        self.throttle: Optional[AdaptiveThrottle] = get_throttle()
+
+    def _create_retry(self) -> Retry:
+        """创建重试策略"""
+        return Retry(
+            total=self.config.HTTP_MAX_RETRIES,
+            connect=self.config.HTTP_MAX_RETRIES,
+            read=self.config.HTTP_MAX_RETRIES,
+            status=self.config.HTTP_MAX_RETRIES,
+            backoff_factor=self.config.HTTP_BACKOFF_FACTOR,
+            status_forcelist=self.RETRY_STATUS_CODES,
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            raise_on_status=False
+        )
+
+    def _create_adapter(self) -> BaseAdapter:
+        """
+        创建传输适配器
+        HTTP_ARCHIVE_MODE为record时边请求边录制，为replay时只从档案回放
+        """
+        mode = self.config.HTTP_ARCHIVE_MODE
+        if mode == 'replay':
+            self.logger.info(f"从 {self.config.HTTP_ARCHIVE_PATH} 回放HTTP响应")
+            return ReplayAdapter(HttpArchive())
+        pool_kwargs = {
+            'pool_connections': self.config.HTTP_POOL_HOSTS,
+            'pool_maxsize': self.config.HTTP_POOL_SIZE,
+            'max_retries': self._create_retry()
+        }
+        if mode == 'record':
+            self.logger.info(f"录制HTTP响应到 {self.config.HTTP_ARCHIVE_PATH}")
+            return RecordingAdapter(HttpArchive(), **pool_kwargs)
+        return HTTPAdapter(**pool_kwargs)
+
+    def _create_session(self) -> requests.Session:
+        """创建带连接池的Session"""
+        session = requests.Session()
+        self.adapter = self._create_adapter()
+        session.mount('https://', self.adapter)
+        session.mount('http://', self.adapter)
+        return session
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None,
+            headers: Optional[Dict[str, str]] = None, timeout: Optional[float] = None,
+            use_cache: bool = True, **kwargs) -> requests.Response:
+        """
+        发送GET请求
+        :param url: 请求地址
+        :param params: 查询参数
+        :param headers: 请求头
+        :param timeout: 超时时间，默认使用HTTP_TIMEOUT
+        :param use_cache: 是否允许使用响应缓存
+        :return: 响应对象
+        """
+        if timeout is None:
+            timeout = self.config.HTTP_TIMEOUT
+
+        ttl = self.cache.ttl_for(url, params) if self.cache and use_cache else None
+        if ttl is None:
+            return self._send(url, params=params, headers=headers, timeout=timeout, **kwargs)
+
+        key = self.cache.make_key(url, params)
+        entry = self.cache.lookup(key)
+        if entry and entry.fresh:
+            self.cache.record('hits')
+            return entry.to_response()
+
+        request_headers = dict(headers or {})
+        if entry and entry.revalidatable:
+            request_headers.update(entry.conditional_headers())
+
+        response = self._send(url, params=params, headers=request_headers, timeout=timeout, **kwargs)
+
+        if entry and response.status_code == 304:
+            self.cache.record('revalidated')
+            self.cache.refresh(entry, response, ttl)
+            return entry.to_response()
+
+        self.cache.record('misses')
+        if self._is_cacheable(response):
+            self.cache.store(key, response, ttl)
+        return response
+
+    def set_proxy_provider(self, provider):
+        """
+        设置代理来源
+        provider需要提供get_proxy()和report(proxy, success, latency)
+        """
+        self.proxy_provider = provider
+
+    def _send(self, url: str, **kwargs) -> requests.Response:
+        """
+        发送网络请求，未指定代理时从代理来源取一个并回报结果
+        爬取请求受自适应限流的并发槽位约束，响应用于调整限额；
+        显式指定代理的请求（如代理验证）不代表本机出口，不参与限流
+        """
+        throttled = self.throttle is not None and 'proxies' not in kwargs
+        proxy = None
+        if self.proxy_provider and 'proxies' not in kwargs:
+            proxy = self.proxy_provider.get_proxy()
+            if proxy:
+                kwargs['proxies'] = {'http': proxy, 'https': proxy}
+
+        if throttled:
+            self.throttle.acquire(url)
+        try:
+            response = self.session.get(url, **kwargs)
+        except requests.RequestException:
+            if proxy:
+                self.proxy_provider.report(proxy, False)
+            raise
+        finally:
+            if throttled:
+                self.throttle.release(url)
+
+        if throttled:
+            self.throttle.observe(url, response)
+        if proxy:
+            self.proxy_provider.report(proxy, response.status_code < 400, response.elapsed.total_seconds())
+        return response
+
+    def peek_cache(self, url: str, params: Optional[Dict[str, Any]] = None) -> Optional[requests.Response]:
+        """
+        只查缓存不发请求
+        命中未过期的缓存时返回响应，调用方据此跳过限速等待
+        """
+        if not self.cache or self.cache.ttl_for(url, params) is None:
+            return None
+        entry = self.cache.lookup(self.cache.make_key(url, params))
+        if entry and entry.fresh:
+            self.cache.record('hits')
+            return entry.to_response()
+        return None
+
+    def _is_cacheable(self, response: requests.Response) -> bool:
+        """只缓存未被重定向的正常页面，反爬页面不能进缓存"""
+        if response.status_code != 200 or response.history:
+            return False
+        return self.config.BLOCK_MARKER not in response.text
+
+    def stats(self) -> Dict[str, Any]:
+        """传输层统计"""
+        return {
+            'cache': self.cache.stats() if self.cache else None,
+            'throttle': self.throttle.stats() if self.throttle else None,
+            'replay': dict(self.adapter.counters) if isinstance(self.adapter, ReplayAdapter) else None
+        }
+
+    def close(self):
+        """关闭连接池"""
+        self.session.close()
+
+_transport = None
+_transport_lock = threading.Lock()
+
+def get_transport() -> HttpTransport:
+    """获取进程内共享的传输层实例"""
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = HttpTransport()
+    return _transport
@@ -1,4 +1,4 @@
 from .db_manager import DatabaseManager
-from .models import Movie, Comment, ProxyPool
+from .models import Movie, Comment, ProxyPool, CrawlWatermark
 
-__all__ = ['DatabaseManager', 'Movie', 'Comment', 'ProxyPool'] 
\ No newline at end of file
+__all__ = ['DatabaseManager', 'Movie', 'Comment', 'ProxyPool', 'CrawlWatermark'] 
\ No newline at end of file
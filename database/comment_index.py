@@ -0,0 +1,36 @@
+from typing import Dict, List
+from collections import Counter
+import re
+import jieba
+
+# 分词规则变化时加1，save_comments和回填工具会重新索引旧版本的评论
+COMMENT_INDEX_VERSION = 1
+
+MAX_TERM_LENGTH = 50   # 与comment_terms.term列长度一致
+BM25_K1 = 1.2          # 词频饱和参数，同一个词在一条评论中重复出现时得分增长放缓
+
+_WORD_PATTERN = re.compile(r'\w')  # 至少包含一个文字或数字，过滤标点和空白
+
+def tokenize(text: str) -> List[str]:
+    """
+    切分评论或查询文本
+    使用jieba搜索引擎模式，长词同时切出其中的短词，搜"好看"也能命中"非常好看"
+    """
+    terms = []
+    for word in jieba.cut_for_search(text or ''):
+        word = word.strip().lower()
+        if word and _WORD_PATTERN.search(word):
+            terms.append(word[:MAX_TERM_LENGTH])
+    return terms
+
+def term_frequencies(text: str) -> Dict[str, int]:
+    """评论中每个词出现的次数"""
+    return dict(Counter(tokenize(text)))
+
+def query_terms(query: str, max_terms: int) -> List[str]:
+    """查询词去重，最多保留max_terms个"""
+    return list(dict.fromkeys(tokenize(query)))[:max_terms]
+
+def term_weight(tf):
+    """BM25词频部分 tf*(k1+1)/(tf+k1)，tf可以是数字或SQL列"""
+    return tf * (BM25_K1 + 1) / (tf + BM25_K1)
@@ -1,12 +1,21 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set, Iterable, Iterator, Sequence, Tuple
+import base64
+import math
 import logging
-from sqlalchemy import create_engine
+import threading
+from sqlalchemy import func, select, update, delete, case, and_, or_
+from sqlalchemy.dialects import mysql, sqlite
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.exc import SQLAlchemyError
-from datetime import datetime
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
 import json
 
-from .models import Base, Movie, Comment, ProxyPool, AnalysisResult
+from .comment_index import COMMENT_INDEX_VERSION, term_frequencies, query_terms, term_weight
+from .engine import create_db_engine, is_sqlite_memory
+from .rollups import ROLLUP_COLUMNS, GRANULARITIES, new_daily_stats, add_sentiment, aggregate_by_day, period_start
+from .models import Base, Movie, Genre, Person, MovieGenre, MoviePerson, Comment, CommentTerm, CommentDailyStats, ProxyPool, AnalysisResult, CrawlWatermark, CrawlJob
+from .query_cache import QueryCache
 from config.config import Config
 
 class DatabaseManager:
@@ -14,31 +23,26 @@ class DatabaseManager:
         self.config = Config()
         self.logger = logging.getLogger(__name__)
         
-        # 创建MySQL数据库连接
-        self.engine = create_engine(
-            f'mysql+pymysql://{self.config.MYSQL_USER}:{self.config.MYSQL_PASSWORD}'
-            f'@{self.config.MYSQL_HOST}:{self.config.MYSQL_PORT}/{self.config.MYSQL_DATABASE}'
-            '?charset=utf8mb4',
-            pool_size=5,
-            max_overflow=10,
-            pool_timeout=30,
-            pool_recycle=3600
-        )
+        # 创建数据库连接（MySQL或SQLite）
+        self.engine = create_db_engine(self.config.DATABASE_URL)
+        
+        # 内存库每次都是空库，没有可迁移的旧结构，直接按模型建表；其他库由迁移维护
+        if is_sqlite_memory(self.engine.url):
+            Base.metadata.create_all(self.engine)
         
         # 创建会话工厂
         self.SessionLocal = sessionmaker(bind=self.engine)
         
-        # 创建表
-        self._create_tables()
-    
-    def _create_tables(self):
-        """创建数据库表"""
-        try:
-            Base.metadata.create_all(self.engine)
-            self.logger.info("数据库表创建成功")
-        except SQLAlchemyError as e:
-            self.logger.error(f"创建数据库表失败: {str(e)}")
-            raise
+        # 已确认入库的豆瓣ID，电影只增不删，命中后无需再查库
+        self._known_douban_ids: Set[str] = set()
+        self._known_douban_ids_lock = threading.Lock()
+        
+        # 电影列表和分析结果的读缓存，由对应的写方法失效
+        self.query_cache = QueryCache(
+            shared_path=self.config.QUERY_CACHE_PATH if self.config.QUERY_CACHE_SHARED else None
+        )
+        
+        # 表结构由迁移维护（alembic upgrade head），启动时不再检查和建表
     
     def get_session(self) -> Session:
         """获取数据库会话"""
@@ -65,14 +69,18 @@ class DatabaseManager:
                     for key, value in movie_data.items():
                         setattr(existing_movie, key, value)
                     existing_movie.updated_at = datetime.now()
-                    saved_movies.append(existing_movie)
+                    movie = existing_movie
                 else:
                     # 创建新电影记录
-                    new_movie = Movie(**movie_data)
-                    session.add(new_movie)
-                    saved_movies.append(new_movie)
+                    movie = Movie(**movie_data)
+                    session.add(movie)
+                session.flush()
+                self._sync_movie_dimensions(session, movie.id, movie_data)
+                saved_movies.append(movie)
             
             session.commit()
+            self._remember_douban_ids(movie_data.get('douban_id') for movie_data in movies)
+            self.query_cache.invalidate('movie_list', 'movie_filters', 'genre_counts')
             self.logger.info(f"成功保存{len(saved_movies)}部电影信息")
             return saved_movies
             
@@ -83,44 +91,191 @@ class DatabaseManager:
         finally:
             session.close()
     
-    def save_comments(self, comments: List[Dict[str, Any]], movie_id: int) -> List[Comment]:
+    # 电影字段 -> movie_people.role
+    PERSON_ROLES = {'director': 'director', 'actors': 'actor'}
+    
+    @staticmethod
+    def _split_names(value: Optional[str]) -> List[str]:
+        """把 "剧情/历史" 形式的字段拆成去重后的名称列表"""
+        names = (name.strip() for name in (value or '').split('/'))
+        return list(dict.fromkeys(name for name in names if name and name != '未知'))
+    
+    def _dimension_ids(self, session: Session, table, names: List[str]) -> List[int]:
+        """取名称对应的类型或人员ID，不存在的名称先插入"""
+        names = [name[:table.c.name.type.length] for name in names]
+        if not names:
+            return []
+        session.execute(self._insert_ignore(table), [{'name': name} for name in names])
+        return list(dict.fromkeys(session.execute(select(table.c.id).where(table.c.name.in_(names))).scalars()))
+    
+    def _sync_movie_dimensions(self, session: Session, movie_id: int, movie_data: Dict[str, Any]):
+        """
+        按电影的genre、director、actors字段重建类型和人员关联
+        movie_data中没有的字段（如搜索结果不含演员）保留原有关联
+        """
+        if 'genre' in movie_data:
+            genre_ids = self._dimension_ids(session, Genre.__table__, self._split_names(movie_data['genre']))
+            session.execute(delete(MovieGenre.__table__).where(MovieGenre.movie_id == movie_id))
+            if genre_ids:
+                session.execute(
+                    self._insert_ignore(MovieGenre.__table__),
+                    [{'movie_id': movie_id, 'genre_id': genre_id} for genre_id in genre_ids]
+                )
+        for field, role in self.PERSON_ROLES.items():
+            if field not in movie_data:
+                continue
+            person_ids = self._dimension_ids(session, Person.__table__, self._split_names(movie_data[field]))
+            session.execute(
+                delete(MoviePerson.__table__)
+                .where(MoviePerson.movie_id == movie_id)
+                .where(MoviePerson.role == role)
+            )
+            if person_ids:
+                session.execute(
+                    self._insert_ignore(MoviePerson.__table__),
+                    [{'movie_id': movie_id, 'role': role, 'person_id': person_id} for person_id in person_ids]
+                )
+    
+    def rebuild_movie_dimensions(self) -> int:
+        """
+        按电影表的字符串字段重建全部类型和人员关联，用于升级后回填
+        :return: 处理的电影数
+        """
+        session = self.get_session()
+        try:
+            movies = session.query(Movie.id, Movie.genre, Movie.director, Movie.actors).all()
+            for movie in movies:
+                self._sync_movie_dimensions(session, movie.id, {
+                    'genre': movie.genre,
+                    'director': movie.director,
+                    'actors': movie.actors
+                })
+            session.commit()
+            self.query_cache.invalidate('movie_filters', 'genre_counts')
+            return len(movies)
+        except SQLAlchemyError as e:
+            session.rollback()
+            self.logger.error(f"重建类型和人员关联失败: {str(e)}")
+            raise
+        finally:
+            session.close()
+    
+    def _insert_ignore(self, table):
+        """构造遇到唯一键冲突时跳过的INSERT语句"""
+        if self.engine.dialect.name == 'sqlite':
+            return sqlite.insert(table).on_conflict_do_nothing()
+        return mysql.insert(table).prefix_with('IGNORE')
+    
+    def save_comments(self, comments: List[Dict[str, Any]], movie_id: int) -> Dict[str, int]:
         """
-        保存评论数据
+        批量保存评论数据
+        按 (movie_id, user, date) 唯一键去重，每个分块一条多行INSERT IGNORE
         :param comments: 评论数据列表
         :param movie_id: 电影ID
-        :return: 保存的Comment对象列表
+        :return: {'inserted': 新增条数, 'skipped': 已存在而跳过的条数}
         """
-        session = self.get_session()
-        saved_comments = []
+        now = datetime.now()
+        rows = [{
+            'movie_id': movie_id,
+            'user': comment_data.get('user'),
+            'comment_text': comment_data.get('comment_text'),
+            'sentiment': comment_data.get('sentiment'),
+            'date': comment_data.get('date'),
+            'created_at': now
+        } for comment_data in comments]
+        if not rows:
+            return {'inserted': 0, 'skipped': 0}
         
+        chunk_size = self.config.DB_BULK_CHUNK_SIZE
+        inserted = 0
         try:
-            for comment_data in comments:
-                comment_data['movie_id'] = movie_id
-                # 检查评论是否已存在
-                existing_comment = session.query(Comment)\
-                    .filter(
-                        Comment.movie_id == movie_id,
-                        Comment.user == comment_data['user'],
-                        Comment.date == comment_data['date']
-                    ).first()
-                
-                if not existing_comment:
-                    # 创建新评论记录
-                    new_comment = Comment(**comment_data)
-                    session.add(new_comment)
-                    saved_comments.append(new_comment)
+            with self.engine.begin() as conn:
+                for start in range(0, len(rows), chunk_size):
+                    chunk = rows[start:start + chunk_size]
+                    stmt = self._insert_ignore(Comment.__table__).values(chunk)
+                    chunk_inserted = conn.execute(stmt).rowcount
+                    inserted += chunk_inserted
+                    # 在同一事务中更新每日统计
+                    if chunk_inserted == len(chunk):
+                        self._increment_daily_stats(conn, movie_id, aggregate_by_day(chunk))
+                    elif chunk_inserted:
+                        # 部分评论已存在，分不出哪些是新增的，重算这批评论涉及的日期
+                        self._recompute_daily_stats(conn, movie_id, {row['date'].date() for row in chunk if row['date']})
             
-            session.commit()
-            self.logger.info(f"成功保存{len(saved_comments)}条评论")
-            return saved_comments
+            result = {'inserted': inserted, 'skipped': len(rows) - inserted}
+            self.logger.info(f"成功保存{inserted}条评论，跳过{result['skipped']}条已存在的评论")
             
         except SQLAlchemyError as e:
-            session.rollback()
             self.logger.error(f"保存评论数据失败: {str(e)}")
             raise
+        
+        # 评论已经保存，建索引失败时只记录日志，下次保存或回填时补上
+        if inserted:
+            try:
+                self.index_comments(movie_id)
+            except SQLAlchemyError:
+                pass
+        return result
+    
+    def get_comment_watermark(self, movie_id: int) -> Optional[Dict[str, Any]]:
+        """获取电影增量抓取的高水位（已抓到的最新评论）"""
+        session = self.get_session()
+        try:
+            watermark = session.query(CrawlWatermark)\
+                .filter(CrawlWatermark.movie_id == movie_id)\
+                .first()
+            if not watermark or not watermark.newest_date:
+                return None
+            return {'date': watermark.newest_date, 'user': watermark.newest_user}
         finally:
             session.close()
     
+    def update_comment_watermark(self, movie_id: int, comments: List[Dict[str, Any]]):
+        """
+        用本次抓到的评论推进高水位
+        只应在按时间倒序抓取并保存成功后调用
+        """
+        dated = [c for c in comments if c.get('date')]
+        if not dated:
+            return
+        newest = max(dated, key=lambda c: c['date'])
+        
+        # 一条upsert完成，并发抓取同一部电影时高水位也只会前进
+        table = CrawlWatermark.__table__
+        row = {
+            'movie_id': movie_id,
+            'newest_date': newest['date'],
+            'newest_user': newest['user'],
+            'updated_at': datetime.now()
+        }
+        if self.engine.dialect.name == 'sqlite':
+            stmt = sqlite.insert(table).values(row)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.movie_id],
+                set_={
+                    'newest_date': stmt.excluded.newest_date,
+                    'newest_user': stmt.excluded.newest_user,
+                    'updated_at': stmt.excluded.updated_at
+                },
+                where=or_(table.c.newest_date.is_(None), table.c.newest_date < stmt.excluded.newest_date)
+            )
+        else:
+            stmt = mysql.insert(table).values(row)
+            advance = or_(table.c.newest_date.is_(None), table.c.newest_date < stmt.inserted.newest_date)
+            # MySQL按书写顺序赋值，newest_date放在最后，前面的条件才能比较到旧值
+            stmt = stmt.on_duplicate_key_update([
+                ('newest_user', case((advance, stmt.inserted.newest_user), else_=table.c.newest_user)),
+                ('updated_at', case((advance, stmt.inserted.updated_at), else_=table.c.updated_at)),
+                ('newest_date', case((advance, stmt.inserted.newest_date), else_=table.c.newest_date)),
+            ])
+        
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(stmt)
+        except SQLAlchemyError as e:
+            self.logger.error(f"更新评论高水位失败: {str(e)}")
+            raise
+    
     def get_movie_by_id(self, movie_id: int) -> Optional[Movie]:
         """获取指定ID的电影信息"""
         session = self.get_session()
@@ -140,6 +295,22 @@ class DatabaseManager:
         finally:
             session.close()
     
+    def iter_movie_comments(self, movie_id: int, columns: Sequence[str] = ('comment_text', 'date'),
+                            batch_size: Optional[int] = None) -> Iterator[Any]:
+        """
+        流式读取指定电影的评论
+        只查询需要的列，通过服务端游标每次取batch_size行，内存占用与评论总数无关。
+        迭代期间占用一个连接，调用方应尽快消费完或关闭生成器
+        :param columns: Comment的列名
+        :return: 按时间倒序的行，可按列名访问（row.comment_text）
+        """
+        query = select(*(getattr(Comment, column) for column in columns))\
+            .where(Comment.movie_id == movie_id)\
+            .order_by(Comment.date.desc())\
+            .execution_options(yield_per=batch_size or self.config.DB_STREAM_BATCH_SIZE)
+        with self.get_session() as session:
+            yield from session.execute(query)
+    
     def update_comment_sentiment(self, comment_id: int, sentiment: str):
         """更新评论的情感分析结果"""
         session = self.get_session()
@@ -155,40 +326,533 @@ class DatabaseManager:
         finally:
             session.close()
     
-    def get_all_movies(self) -> List[Dict[str, Any]]:
-        """获取所有电影信息"""
-        session = self.get_session()
+    def get_unscored_comments(self, movie_id: int, version: int, limit: Optional[int] = None) -> List[Any]:
+        """
+        获取未打分或打分版本不是version的评论
+        :return: 最多limit行 (id, comment_text)
+        """
+        query = select(Comment.id, Comment.comment_text)\
+            .where(Comment.movie_id == movie_id)\
+            .where(or_(Comment.sentiment_version.is_(None), Comment.sentiment_version != version))\
+            .limit(limit or self.config.DB_BULK_CHUNK_SIZE)
+        with self.get_session() as session:
+            return session.execute(query).all()
+    
+    def update_comment_sentiments(self, scores: List[Dict[str, Any]], version: int) -> int:
+        """
+        批量写入评论情感分析结果
+        每个分块一条UPDATE，用CASE按id设置各行的得分和倾向
+        :param scores: [{'id': 评论ID, 'sentiment': 倾向, 'score': 得分}]，得分可为None（空评论）
+        :param version: 打分模型版本
+        :return: 更新的行数
+        """
+        chunk_size = self.config.DB_BULK_CHUNK_SIZE
+        updated = 0
         try:
-            movies = session.query(Movie).all()
-            # 转换为字典列表，包含所有需要的字段
-            return [{
-                'id': movie.id,
-                'douban_id': movie.douban_id,
-                'name': movie.name,
-                'rating': movie.rating,
-                'director': movie.director,
-                'img': movie.img_url,  # 注意这里用 img 而不是 img_url
-                'year': movie.year,
-                'sub_title': movie.sub_title,
-                'genre': movie.genre,  # 添加 genre 字段
-                'analyzed': movie.analyzed
-            } for movie in movies]
-        except Exception as e:
-            self.logger.error(f"获取电影列表失败: {str(e)}")
+            with self.engine.begin() as conn:
+                for start in range(0, len(scores), chunk_size):
+                    chunk = scores[start:start + chunk_size]
+                    ids = [item['id'] for item in chunk]
+                    # 锁住这批评论读出旧的打分结果，每日统计按新旧之差更新
+                    previous = conn.execute(
+                        select(Comment.id, Comment.movie_id, Comment.date, Comment.sentiment, Comment.sentiment_score)
+                        .where(Comment.id.in_(ids))
+                        .with_for_update()
+                    ).all()
+                    stmt = update(Comment.__table__)\
+                        .where(Comment.id.in_(ids))\
+                        .values(
+                            sentiment=case({item['id']: item['sentiment'] for item in chunk}, value=Comment.id),
+                            sentiment_score=case({item['id']: item['score'] for item in chunk}, value=Comment.id),
+                            sentiment_version=version
+                        )
+                    updated += conn.execute(stmt).rowcount
+                    
+                    new_scores = {item['id']: item for item in chunk}
+                    deltas = defaultdict(new_daily_stats)
+                    for row in previous:
+                        item = new_scores[row.id]
+                        add_sentiment(deltas[row.movie_id], row.date, row.sentiment, row.sentiment_score, sign=-1)
+                        add_sentiment(deltas[row.movie_id], row.date, item['sentiment'], item['score'])
+                    for movie_id, stats in deltas.items():
+                        self._increment_daily_stats(conn, movie_id, stats)
+            return updated
+        except SQLAlchemyError as e:
+            self.logger.error(f"批量更新评论情感分析结果失败: {str(e)}")
             raise
+    
+    def index_comments(self, movie_id: int) -> int:
+        """
+        为电影中未索引或索引版本过期的评论建立全文索引
+        每批在一个事务中删除旧的词、写入新的词并标记索引版本
+        :return: 本次索引的评论数
+        """
+        chunk_size = self.config.DB_BULK_CHUNK_SIZE
+        table = CommentTerm.__table__
+        pending = select(Comment.id, Comment.comment_text)\
+            .where(Comment.movie_id == movie_id)\
+            .where(or_(Comment.search_version.is_(None), Comment.search_version != COMMENT_INDEX_VERSION))\
+            .limit(chunk_size)
+        indexed = 0
+        try:
+            while True:
+                with self.engine.begin() as conn:
+                    rows = conn.execute(pending).all()
+                    if not rows:
+                        break
+                    ids = [row.id for row in rows]
+                    terms = [
+                        {'movie_id': movie_id, 'term': term, 'tf': tf, 'comment_id': row.id}
+                        for row in rows for term, tf in term_frequencies(row.comment_text).items()
+                    ]
+                    conn.execute(delete(table).where(table.c.comment_id.in_(ids)))
+                    if terms:
+                        # executemany只编译一次语句，词数远多于评论数时比拼接多行VALUES快
+                        conn.execute(self._insert_ignore(table), terms)
+                    conn.execute(
+                        update(Comment.__table__)
+                        .where(Comment.id.in_(ids))
+                        .values(search_version=COMMENT_INDEX_VERSION)
+                    )
+                indexed += len(rows)
+        except SQLAlchemyError as e:
+            self.logger.error(f"建立评论全文索引失败: {str(e)}")
+            raise
+        finally:
+            if indexed:
+                # 每批评论入库都会建索引，已索引评论数只影响IDF，不必让其他进程的全部缓存重新核对
+                self.query_cache.invalidate(f'comment_search:{movie_id}', broadcast=False)
+        
+        if indexed:
+            self.logger.info(f"电影{movie_id}新索引{indexed}条评论")
+        return indexed
+    
+    def get_unindexed_movie_ids(self) -> List[int]:
+        """有未索引或索引版本过期评论的电影ID"""
+        query = select(Comment.movie_id)\
+            .where(or_(Comment.search_version.is_(None), Comment.search_version != COMMENT_INDEX_VERSION))\
+            .distinct()
+        with self.get_session() as session:
+            return list(session.execute(query).scalars())
+    
+    def _indexed_comment_count(self, movie_id: int) -> int:
+        """电影已索引的评论数（读缓存，建立索引时失效），用于计算IDF"""
+        def load():
+            query = select(func.count())\
+                .where(Comment.movie_id == movie_id)\
+                .where(Comment.search_version == COMMENT_INDEX_VERSION)
+            with self.get_session() as session:
+                return session.execute(query).scalar()
+        return self.query_cache.get_or_load(f'comment_search:{movie_id}', load, self.config.QUERY_CACHE_SEARCH_TTL)
+    
+    def _idf(self, movie_id: int, doc_freq: int) -> float:
+        """BM25逆文档频率，包含该词的评论越少权重越高"""
+        total_docs = max(self._indexed_comment_count(movie_id), doc_freq)
+        return math.log(1 + (total_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+    
+    def search_comments(self, movie_id: int, query: str, page: int = 1,
+                        limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        按关键词检索电影评论
+        只返回包含全部查询词的评论，按BM25得分从高到低排序，同分时新评论在前
+        :param query: 查询文本，与评论使用相同的分词
+        :return: {'query', 'terms', 'total', 'page', 'limit', 'comments'}，comments中每项带score
+        """
+        terms = query_terms(query, self.config.COMMENT_SEARCH_MAX_TERMS)
+        if not terms:
+            raise ValueError("搜索词不能为空")
+        limit = min(max(limit or self.config.COMMENT_SEARCH_PAGE_SIZE, 1), self.config.COMMENT_SEARCH_MAX_PAGE_SIZE)
+        page = max(page or 1, 1)
+        result = {'query': query, 'terms': terms, 'total': 0, 'page': page, 'limit': limit, 'comments': []}
+        
+        table = CommentTerm.__table__
+        postings = and_(table.c.movie_id == movie_id, table.c.term.in_(terms))
+        offset = (page - 1) * limit
+        with self.get_session() as session:
+            if len(terms) == 1:
+                # 单个词按主键顺序读取倒排记录，不需要分组和排序
+                total = session.execute(select(func.count()).where(postings)).scalar()
+                if not total:
+                    return result
+                idf = self._idf(movie_id, total)
+                rows = session.execute(
+                    select(table.c.comment_id, table.c.tf)
+                    .where(postings)
+                    .order_by(table.c.tf.desc(), table.c.comment_id.desc())
+                    .limit(limit).offset(offset)
+                ).all()
+                hits = [(row.comment_id, term_weight(row.tf) * idf) for row in rows]
+            else:
+                doc_freqs = dict(session.execute(
+                    select(table.c.term, func.count()).where(postings).group_by(table.c.term)
+                ).all())
+                if len(doc_freqs) < len(terms):
+                    return result  # 有查询词没有出现在任何评论中
+                
+                idf = {term: self._idf(movie_id, df) for term, df in doc_freqs.items()}
+                score = func.sum(term_weight(table.c.tf) * case(idf, value=table.c.term)).label('score')
+                matched = select(table.c.comment_id, score)\
+                    .where(postings)\
+                    .group_by(table.c.comment_id)\
+                    .having(func.count() == len(terms))
+                # 总数用窗口函数在同一次分组中算出，不必再分组一遍
+                rows = session.execute(
+                    matched.add_columns(func.count().over().label('total'))
+                    .order_by(score.desc(), table.c.comment_id.desc())
+                    .limit(limit).offset(offset)
+                ).all()
+                if rows:
+                    total = rows[0].total
+                else:
+                    total = session.execute(select(func.count()).select_from(matched.subquery())).scalar()
+                hits = [(row.comment_id, row.score) for row in rows]
+            
+            comments = {
+                row.id: row for row in session.execute(
+                    select(Comment.id, Comment.user, Comment.comment_text, Comment.sentiment, Comment.date)
+                    .where(Comment.id.in_([comment_id for comment_id, _ in hits]))
+                )
+            }
+        
+        result['total'] = total
+        for comment_id, score in hits:
+            comment = comments.get(comment_id)
+            if comment is None:
+                continue
+            result['comments'].append({
+                'id': comment.id,
+                'user': comment.user,
+                'comment_text': comment.comment_text,
+                'sentiment': comment.sentiment,
+                'date': comment.date.strftime('%Y-%m-%d %H:%M:%S') if comment.date else None,
+                'score': round(score, 4)
+            })
+        return result
+    
+    def _increment_daily_stats(self, conn, movie_id: int, stats: Dict[date, Dict[str, float]]):
+        """把按日期的增量累加到comment_daily_stats，没有记录的日期新建"""
+        rows = [
+            {'movie_id': movie_id, 'day': day, **values}
+            for day, values in stats.items() if any(values.values())
+        ]
+        if not rows:
+            return
+        table = CommentDailyStats.__table__
+        if self.engine.dialect.name == 'sqlite':
+            stmt = sqlite.insert(table)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.movie_id, table.c.day],
+                set_={column: table.c[column] + stmt.excluded[column] for column in ROLLUP_COLUMNS}
+            )
+        else:
+            stmt = mysql.insert(table)
+            stmt = stmt.on_duplicate_key_update({column: table.c[column] + stmt.inserted[column] for column in ROLLUP_COLUMNS})
+        conn.execute(stmt, rows)
+    
+    def _replace_daily_stats(self, conn, movie_id: int, days: Optional[Set[date]], stats: Dict[date, Dict[str, float]]):
+        """用重新统计的结果替换指定日期（days为None时为全部日期）的记录"""
+        table = CommentDailyStats.__table__
+        stmt = delete(table).where(table.c.movie_id == movie_id)
+        if days is not None:
+            stmt = stmt.where(table.c.day.in_(days))
+        conn.execute(stmt)
+        rows = [{'movie_id': movie_id, 'day': day, **values} for day, values in stats.items() if values['total_comments']]
+        if rows:
+            conn.execute(table.insert(), rows)
+    
+    def _recompute_daily_stats(self, conn, movie_id: int, days: Set[date]):
+        """
+        按评论表重新统计指定日期，每天一个 (movie_id, date) 索引范围
+        InnoDB可重复读下普通SELECT读的是事务快照，读不到并发事务随后提交的评论，
+        直接删除重写会覆盖它们的增量。因此先锁住这些日期的统计行（没有记录时锁住索引间隙），
+        并发的增量更新要等本事务提交；再用加锁读取评论，读到的是已提交的最新数据
+        """
+        if not days:
+            return
+        table = CommentDailyStats.__table__
+        conn.execute(
+            select(table.c.day)
+            .where(table.c.movie_id == movie_id)
+            .where(table.c.day.in_(days))
+            .with_for_update()
+        )
+        day_ranges = [
+            and_(Comment.date >= datetime.combine(day, time.min), Comment.date < datetime.combine(day + timedelta(days=1), time.min))
+            for day in days
+        ]
+        rows = conn.execute(
+            select(Comment.date, Comment.comment_text, Comment.sentiment, Comment.sentiment_score)
+            .where(Comment.movie_id == movie_id)
+            .where(or_(*day_ranges))
+            .with_for_update(read=True)
+        )
+        self._replace_daily_stats(conn, movie_id, days, aggregate_by_day(row._mapping for row in rows))
+    
+    def rebuild_daily_stats(self, movie_id: int) -> int:
+        """
+        按评论表重建电影的全部每日统计，用于升级后回填或修复偏差
+        流式读取评论，内存占用与评论数无关；重建期间该电影新保存的评论可能不计入，应在抓取停止时执行
+        :return: 有评论的天数
+        """
+        columns = ('date', 'comment_text', 'sentiment', 'sentiment_score')
+        stats = aggregate_by_day(row._mapping for row in self.iter_movie_comments(movie_id, columns))
+        try:
+            with self.engine.begin() as conn:
+                self._replace_daily_stats(conn, movie_id, None, stats)
+        except SQLAlchemyError as e:
+            self.logger.error(f"重建每日统计失败: {str(e)}")
+            raise
+        return len(stats)
+    
+    def get_comment_movie_ids(self) -> List[int]:
+        """有评论的电影ID"""
+        with self.get_session() as session:
+            return list(session.execute(select(Comment.movie_id).distinct()).scalars())
+    
+    def get_sentiment_trend(self, movie_id: int, granularity: str = 'day',
+                            start: Optional[date] = None, end: Optional[date] = None) -> Dict[str, Any]:
+        """
+        按天、周或月汇总的评论数量、情感分布和长度分布
+        只读取comment_daily_stats中日期范围内的记录，没有评论的周期不返回
+        :param granularity: day/week/month，周从周一开始
+        :param start: 开始日期（含）
+        :param end: 结束日期（含）
+        :return: {'granularity', 'series': [{'period', 各计数, 'avg_score'}]}，按时间升序
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"不支持的时间粒度: {granularity}")
+        table = CommentDailyStats.__table__
+        query = select(table).where(table.c.movie_id == movie_id).order_by(table.c.day)
+        if start:
+            query = query.where(table.c.day >= start)
+        if end:
+            query = query.where(table.c.day <= end)
+        
+        periods = new_daily_stats()
+        with self.get_session() as session:
+            for row in session.execute(query):
+                period = periods[period_start(row.day, granularity)]
+                for column in ROLLUP_COLUMNS:
+                    period[column] += row._mapping[column]
+        
+        series = []
+        for period, values in periods.items():
+            point = {'period': period.strftime('%Y-%m') if granularity == 'month' else period.isoformat()}
+            point.update((column, values[column]) for column in ROLLUP_COLUMNS if column != 'score_sum')
+            point['avg_score'] = round(values['score_sum'] / values['scored_comments'], 4) if values['scored_comments'] else None
+            series.append(point)
+        return {'granularity': granularity, 'series': series}
+    
+    @staticmethod
+    def _movie_to_dict(movie: Movie) -> Dict[str, Any]:
+        """电影列表中的一项"""
+        return {
+            'id': movie.id,
+            'douban_id': movie.douban_id,
+            'name': movie.name,
+            'rating': movie.rating,
+            'director': movie.director,
+            'img': movie.img_url,  # 注意这里用 img 而不是 img_url
+            'year': movie.year,
+            'sub_title': movie.sub_title,
+            'genre': movie.genre,
+            'analyzed': movie.analyzed
+        }
+    
+    # 电影列表可用的排序列，均有 (列, id) 索引
+    MOVIE_SORTS = {'id': Movie.id, 'rating': Movie.rating, 'year': Movie.year, 'name': Movie.name}
+    
+    @staticmethod
+    def _encode_cursor(value: Any, movie_id: int) -> str:
+        """把上一页最后一项的 (排序值, id) 编码为游标"""
+        return base64.urlsafe_b64encode(json.dumps([value, movie_id]).encode()).decode().rstrip('=')
+    
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[Any, int]:
+        """解析游标，格式不对时抛出ValueError"""
+        try:
+            value, movie_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+            return value, int(movie_id)
+        except Exception:
+            raise ValueError(f"无效的分页游标: {cursor}")
+    
+    def list_movies(self, sort: str = 'id', order: str = 'desc', limit: Optional[int] = None,
+                    cursor: Optional[str] = None, min_rating: Optional[float] = None,
+                    max_rating: Optional[float] = None, genre: Optional[str] = None,
+                    year: Optional[str] = None, analyzed: Optional[bool] = None,
+                    director: Optional[str] = None) -> Dict[str, Any]:
+        """
+        分页获取电影列表
+        按 (排序列, id) 做键集分页：每页从上一页最后一项之后沿索引继续读取，
+        不使用OFFSET，翻到第几页查询代价都相同。排序列为空的电影排在最后，按id排序
+        :param sort: id/rating/year/name
+        :param order: desc/asc
+        :param cursor: 上一页返回的next_cursor，None表示第一页
+        :param genre: 类型名称，经movie_genres索引精确匹配
+        :param director: 导演姓名，经movie_people索引精确匹配
+        :return: {'movies': 本页电影, 'next_cursor': 下一页游标，没有下一页时为None}
+        """
+        if sort not in self.MOVIE_SORTS:
+            raise ValueError(f"不支持的排序方式: {sort}")
+        if order not in ('desc', 'asc'):
+            raise ValueError(f"不支持的排序方向: {order}")
+        limit = max(1, min(limit or self.config.MOVIES_PAGE_SIZE, self.config.MOVIES_MAX_PAGE_SIZE))
+        filters = {
+            'min_rating': min_rating, 'max_rating': max_rating, 'genre': genre,
+            'year': year, 'analyzed': analyzed, 'director': director
+        }
+        
+        # 首页默认列表访问最多，读缓存（保存电影或分析结果时失效），翻页和筛选直接查库
+        if (cursor is None and sort == 'id' and order == 'desc' and limit == self.config.MOVIES_PAGE_SIZE
+                and all(value is None for value in filters.values())):
+            return self.query_cache.get_or_load(
+                'movie_list',
+                lambda: self._query_movie_page(sort, order, limit, None, **filters),
+                self.config.QUERY_CACHE_MOVIES_TTL
+            )
+        return self._query_movie_page(sort, order, limit, cursor, **filters)
+    
+    def _query_movie_page(self, sort: str, order: str, limit: int, cursor: Optional[str],
+                          min_rating: Optional[float], max_rating: Optional[float], genre: Optional[str],
+                          year: Optional[str], analyzed: Optional[bool],
+                          director: Optional[str]) -> Dict[str, Any]:
+        """从数据库查询一页电影，参数已由list_movies校验"""
+        after = self._decode_cursor(cursor) if cursor else None
+        column = self.MOVIE_SORTS[sort]
+        descending = order == 'desc'
+        
+        def before(col, value):
+            """按排序方向位于value之后"""
+            return col < value if descending else col > value
+        
+        def ordered(col):
+            return col.desc() if descending else col.asc()
+        
+        session = self.get_session()
+        try:
+            query = session.query(Movie)
+            if min_rating is not None:
+                query = query.filter(Movie.rating >= min_rating)
+            if max_rating is not None:
+                query = query.filter(Movie.rating <= max_rating)
+            if genre:
+                query = query.filter(Movie.id.in_(self._genre_movie_ids(genre)))
+            if director:
+                query = query.filter(Movie.id.in_(self._person_movie_ids(director, 'director')))
+            if year:
+                query = query.filter(Movie.year == year)
+            if analyzed is not None:
+                query = query.filter(Movie.analyzed == analyzed)
+            
+            if sort == 'id':
+                page = query
+                if after:
+                    page = page.filter(before(Movie.id, after[1]))
+                movies = page.order_by(ordered(Movie.id)).limit(limit + 1).all()
+            else:
+                movies = []
+                # 先读排序列非空的部分
+                if after is None or after[0] is not None:
+                    page = query.filter(column.isnot(None))
+                    if after:
+                        value, last_id = after
+                        page = page.filter(or_(
+                            before(column, value),
+                            and_(column == value, before(Movie.id, last_id))
+                        ))
+                    movies = page.order_by(ordered(column), ordered(Movie.id)).limit(limit + 1).all()
+                # 不足一页时接着读排序列为空的部分
+                if len(movies) <= limit:
+                    page = query.filter(column.is_(None))
+                    if after and after[0] is None:
+                        page = page.filter(before(Movie.id, after[1]))
+                    movies += page.order_by(ordered(Movie.id)).limit(limit + 1 - len(movies)).all()
+            
+            next_cursor = None
+            if len(movies) > limit:
+                movies = movies[:limit]
+                last = movies[-1]
+                next_cursor = self._encode_cursor(getattr(last, column.key), last.id)
+            return {
+                'movies': [self._movie_to_dict(movie) for movie in movies],
+                'next_cursor': next_cursor
+            }
         finally:
             session.close()
     
+    def get_movie_filters(self) -> Dict[str, List[str]]:
+        """电影列表可选的年份和类型（读缓存，保存电影时失效）"""
+        return self.query_cache.get_or_load('movie_filters', self._query_movie_filters,
+                                            self.config.QUERY_CACHE_MOVIES_TTL)
+    
+    def _query_movie_filters(self) -> Dict[str, List[str]]:
+        """从数据库查询已有的年份和类型"""
+        session = self.get_session()
+        try:
+            years = [year for (year,) in session.query(Movie.year).filter(Movie.year.isnot(None)).distinct()
+                     if year]
+            genres = session.execute(
+                select(Genre.name).where(Genre.id.in_(select(MovieGenre.genre_id))).order_by(Genre.name)
+            ).scalars().all()
+            return {'years': sorted(years, reverse=True), 'genres': list(genres)}
+        finally:
+            session.close()
+    
+    @staticmethod
+    def _genre_movie_ids(genre: str):
+        """属于指定类型的电影ID子查询"""
+        return select(MovieGenre.movie_id)\
+            .join(Genre, Genre.id == MovieGenre.genre_id)\
+            .where(Genre.name == genre)
+    
+    @staticmethod
+    def _person_movie_ids(name: str, role: Optional[str] = None):
+        """指定导演或演员参与的电影ID子查询，role为None时不区分角色"""
+        query = select(MoviePerson.movie_id)\
+            .join(Person, Person.id == MoviePerson.person_id)\
+            .where(Person.name == name)
+        if role:
+            query = query.where(MoviePerson.role == role)
+        return query
+    
     def get_movies_by_genre(self, genre: str) -> List[Movie]:
         """获取指定类型的电影"""
         session = self.get_session()
         try:
             return session.query(Movie)\
-                .filter(Movie.genre.like(f'%{genre}%'))\
+                .filter(Movie.id.in_(self._genre_movie_ids(genre)))\
+                .all()
+        finally:
+            session.close()
+    
+    def get_movies_by_person(self, name: str, role: Optional[str] = None) -> List[Movie]:
+        """
+        获取指定导演或演员的电影
+        :param role: director/actor，None表示不区分
+        """
+        session = self.get_session()
+        try:
+            return session.query(Movie)\
+                .filter(Movie.id.in_(self._person_movie_ids(name, role)))\
                 .all()
         finally:
             session.close()
     
+    def get_genre_counts(self) -> List[Dict[str, Any]]:
+        """各类型的电影数，按数量从多到少（读缓存，保存电影时失效）"""
+        return self.query_cache.get_or_load('genre_counts', self._query_genre_counts,
+                                            self.config.QUERY_CACHE_MOVIES_TTL)
+    
+    def _query_genre_counts(self) -> List[Dict[str, Any]]:
+        """在movie_genres上按类型分组计数"""
+        count = func.count(MovieGenre.movie_id).label('count')
+        query = select(Genre.name, count)\
+            .join(MovieGenre, MovieGenre.genre_id == Genre.id)\
+            .group_by(Genre.id, Genre.name)\
+            .order_by(count.desc(), Genre.name)
+        with self.get_session() as session:
+            return [{'genre': name, 'count': movie_count} for name, movie_count in session.execute(query)]
+    
     def get_movies_by_rating_range(self, min_rating: float, max_rating: float) -> List[Movie]:
         """获取指定评分范围的电影"""
         session = self.get_session()
@@ -201,12 +865,37 @@ class DatabaseManager:
     
     def check_movie_exists(self, douban_id: str) -> bool:
         """检查电影是否已存在"""
+        return str(douban_id) in self.get_existing_douban_ids([douban_id])
+    
+    def _remember_douban_ids(self, douban_ids: Iterable[str]):
+        """记录已入库的豆瓣ID"""
+        with self._known_douban_ids_lock:
+            self._known_douban_ids.update(str(douban_id) for douban_id in douban_ids if douban_id)
+    
+    def get_existing_douban_ids(self, douban_ids: Iterable[str]) -> Set[str]:
+        """
+        批量检查电影是否已存在
+        已知入库的ID直接从内存返回，其余的用一次IN查询确认；
+        未入库的结果不缓存，其他进程（如抓取任务worker）可能随时添加
+        :return: 已存在的豆瓣ID集合
+        """
+        douban_ids = {str(douban_id) for douban_id in douban_ids if douban_id}
+        with self._known_douban_ids_lock:
+            existing = douban_ids & self._known_douban_ids
+        unknown = douban_ids - existing
+        if not unknown:
+            return existing
+        
         session = self.get_session()
         try:
-            exists = session.query(Movie).filter(Movie.douban_id == douban_id).first() is not None
-            return exists
+            found = {
+                douban_id for (douban_id,) in session.query(Movie.douban_id)
+                .filter(Movie.douban_id.in_(unknown))
+            }
         finally:
             session.close()
+        self._remember_douban_ids(found)
+        return existing | found
     
     def save_movie(self, movie_data: Dict[str, Any]) -> Movie:
         """保存电影信息"""
@@ -226,7 +915,9 @@ class DatabaseManager:
                 movie = Movie(**movie_data)
                 session.add(movie)
             
-            # 先提交以获取movie.id
+            # 先写入以获取movie.id，类型和人员关联与电影在同一事务中提交
+            session.flush()
+            self._sync_movie_dimensions(session, movie.id, movie_data)
             session.commit()
             
             # 检查是否有分析结果
@@ -237,6 +928,8 @@ class DatabaseManager:
             # 更新分析状态并再次提交
             movie.analyzed = has_analysis
             session.commit()
+            self._remember_douban_ids([movie.douban_id])
+            self.query_cache.invalidate('movie_list', 'movie_filters', 'genre_counts')
             
             # 创建一个新的字典来返回电影信息
             movie_info = {
@@ -322,6 +1015,7 @@ class DatabaseManager:
             movie.analyzed = True
             
             session.commit()
+            self.query_cache.invalidate('movie_list', f'analysis:{movie_id}')
             return analysis_result
         except Exception as e:
             session.rollback()
@@ -331,7 +1025,15 @@ class DatabaseManager:
             session.close()
     
     def get_analysis_result(self, douban_id: str) -> Optional[Dict[str, Any]]:
-        """获取电影分析结果"""
+        """获取电影分析结果（读缓存，保存该电影的分析结果时失效）"""
+        return self.query_cache.get_or_load(
+            f'analysis:{douban_id}',
+            lambda: self._query_analysis_result(douban_id),
+            self.config.QUERY_CACHE_ANALYSIS_TTL
+        )
+    
+    def _query_analysis_result(self, douban_id: str) -> Optional[Dict[str, Any]]:
+        """从数据库查询电影分析结果"""
         session = self.get_session()
         try:
             movie = session.query(Movie).filter(Movie.douban_id == douban_id).first()
@@ -369,4 +1071,208 @@ class DatabaseManager:
             self.logger.error(f"获取分析结果失败: {str(e)}")
             return None
         finally:
-            session.close() 
\ No newline at end of file
+            session.close()
+    
+    def _crawl_job_to_dict(self, job: CrawlJob) -> Dict[str, Any]:
+        """抓取任务转换为字典"""
+        return {
+            'id': job.id,
+            'douban_id': job.douban_id,
+            'status': job.status,
+            'stage': job.stage,
+            'cursor': job.cursor,
+            'max_pages': job.max_pages,
+            'attempts': job.attempts,
+            'last_error': job.last_error
+        }
+    
+    def enqueue_crawl_jobs(self, douban_ids: List[str], max_pages: int = 5) -> int:
+        """
+        批量添加抓取任务，已存在的豆瓣ID会被跳过
+        :return: 新增的任务数
+        """
+        douban_ids = list(dict.fromkeys(str(douban_id).strip() for douban_id in douban_ids if str(douban_id).strip()))
+        if not douban_ids:
+            return 0
+        
+        now = datetime.now()
+        rows = [{
+            'douban_id': douban_id,
+            'status': 'pending',
+            'max_pages': max_pages,
+            'next_run_at': now,
+            'created_at': now,
+            'updated_at': now
+        } for douban_id in douban_ids]
+        
+        # 按douban_id唯一键跳过已存在的任务，并发添加同一ID也不会报错
+        inserted = 0
+        try:
+            with self.engine.begin() as conn:
+                for start in range(0, len(rows), 1000):
+                    stmt = self._insert_ignore(CrawlJob.__table__).values(rows[start:start + 1000])
+                    inserted += conn.execute(stmt).rowcount
+            self.logger.info(f"新增{inserted}个抓取任务，跳过{len(rows) - inserted}个已存在任务")
+            return inserted
+        except SQLAlchemyError as e:
+            self.logger.error(f"添加抓取任务失败: {str(e)}")
+            raise
+    
+    def claim_crawl_job(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """
+        领取一个到期的待执行任务
+        用带状态条件的UPDATE抢占，多个worker并发领取时只有一个能成功
+        """
+        session = self.get_session()
+        try:
+            now = datetime.now()
+            candidates = session.query(CrawlJob.id)\
+                .filter(CrawlJob.status == 'pending', CrawlJob.next_run_at <= now)\
+                .order_by(CrawlJob.next_run_at)\
+                .limit(10)\
+                .all()
+            
+            for (job_id,) in candidates:
+                claimed = session.query(CrawlJob)\
+                    .filter(CrawlJob.id == job_id, CrawlJob.status == 'pending')\
+                    .update({
+                        'status': 'running',
+                        'locked_by': worker_id,
+                        'locked_at': now
+                    }, synchronize_session=False)
+                session.commit()
+                if claimed:
+                    job = session.query(CrawlJob).filter(CrawlJob.id == job_id).first()
+                    return self._crawl_job_to_dict(job)
+            return None
+        except SQLAlchemyError as e:
+            session.rollback()
+            self.logger.error(f"领取抓取任务失败: {str(e)}")
+            raise
+        finally:
+            session.close()
+    
+    def _update_crawl_job(self, job_id: int, values: Dict[str, Any]):
+        """更新抓取任务"""
+        session = self.get_session()
+        try:
+            values['updated_at'] = datetime.now()
+            session.query(CrawlJob).filter(CrawlJob.id == job_id).update(values, synchronize_session=False)
+            session.commit()
+        except SQLAlchemyError as e:
+            session.rollback()
+            self.logger.error(f"更新抓取任务{job_id}失败: {str(e)}")
+            raise
+        finally:
+            session.close()
+    
+    def checkpoint_crawl_job(self, job_id: int, stage: str, cursor: int):
+        """记录任务进度，同时刷新锁时间作为心跳"""
+        self._update_crawl_job(job_id, {
+            'stage': stage,
+            'cursor': cursor,
+            'locked_at': datetime.now()
+        })
+    
+    def complete_crawl_job(self, job_id: int):
+        """标记任务完成"""
+        self._update_crawl_job(job_id, {
+            'status': 'done',
+            'locked_by': None,
+            'locked_at': None,
+            'last_error': None
+        })
+    
+    def release_crawl_job(self, job_id: int):
+        """放回未完成的任务，下次从检查点继续"""
+        self._update_crawl_job(job_id, {
+            'status': 'pending',
+            'locked_by': None,
+            'locked_at': None
+        })
+    
+    def fail_crawl_job(self, job_id: int, error: str, max_attempts: int, backoff_base: float):
+        """
+        记录任务失败
+        未超过最大尝试次数时按指数退避重新排队，否则标记为failed
+        """
+        session = self.get_session()
+        try:
+            job = session.query(CrawlJob).filter(CrawlJob.id == job_id).first()
+            if not job:
+                return
+            job.attempts = (job.attempts or 0) + 1
+            job.last_error = error[:2000]
+            job.locked_by = None
+            job.locked_at = None
+            if job.attempts >= max_attempts:
+                job.status = 'failed'
+            else:
+                job.status = 'pending'
+                job.next_run_at = datetime.now() + timedelta(seconds=backoff_base * 2 ** (job.attempts - 1))
+            session.commit()
+        except SQLAlchemyError as e:
+            session.rollback()
+            self.logger.error(f"记录抓取任务{job_id}失败状态失败: {str(e)}")
+            raise
+        finally:
+            session.close()
+    
+    def release_stale_crawl_jobs(self, lock_timeout: float) -> int:
+        """
+        回收锁已过期的运行中任务（进程崩溃后遗留）
+        :return: 回收的任务数
+        """
+        session = self.get_session()
+        try:
+            released = session.query(CrawlJob)\
+                .filter(
+                    CrawlJob.status == 'running',
+                    CrawlJob.locked_at < datetime.now() - timedelta(seconds=lock_timeout)
+                )\
+                .update({
+                    'status': 'pending',
+                    'locked_by': None,
+                    'locked_at': None
+                }, synchronize_session=False)
+            session.commit()
+            if released:
+                self.logger.info(f"回收{released}个中断的抓取任务")
+            return released
+        except SQLAlchemyError as e:
+            session.rollback()
+            self.logger.error(f"回收抓取任务失败: {str(e)}")
+            raise
+        finally:
+            session.close()
+    
+    def retry_failed_crawl_jobs(self) -> int:
+        """把失败的任务重新放回队列"""
+        session = self.get_session()
+        try:
+            retried = session.query(CrawlJob)\
+                .filter(CrawlJob.status == 'failed')\
+                .update({
+                    'status': 'pending',
+                    'attempts': 0,
+                    'next_run_at': datetime.now()
+                }, synchronize_session=False)
+            session.commit()
+            return retried
+        except SQLAlchemyError as e:
+            session.rollback()
+            self.logger.error(f"重试失败任务失败: {str(e)}")
+            raise
+        finally:
+            session.close()
+    
+    def get_crawl_job_stats(self) -> Dict[str, int]:
+        """按状态统计抓取任务"""
+        session = self.get_session()
+        try:
+            rows = session.query(CrawlJob.status, func.count(CrawlJob.id))\
+                .group_by(CrawlJob.status)\
+                .all()
+            return {status: count for status, count in rows}
+        finally:
+            session.close()
@@ -0,0 +1,57 @@
+from typing import Optional, Union
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, URL, make_url
+from sqlalchemy.pool import StaticPool
+from config.config import Config
+
+# 每个SQLite连接建立时执行
+SQLITE_PRAGMAS = (
+    'journal_mode=WAL',     # 读写互不阻塞，抓取写入时分析和Web读取照常进行
+    'synchronous=NORMAL',   # WAL模式下只在检查点同步，掉电最多丢最后几个事务
+    'temp_store=MEMORY',
+    'cache_size=-20000',    # 页缓存约20MB
+    'foreign_keys=OFF',     # 与MySQL库一致不校验外键，comments.movie_id存放的是豆瓣ID
+)
+
+def is_sqlite_memory(url: Union[str, URL]) -> bool:
+    """是否为SQLite内存库（sqlite:// 或 sqlite:///:memory:）"""
+    url = make_url(url)
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(f'PRAGMA {pragma}')
+    cursor.close()
+
+def create_db_engine(url: Optional[Union[str, URL]] = None) -> Engine:
+    """
+    按连接串创建数据库引擎，默认使用配置中的DATABASE_URL
+    - MySQL：连接池参数取自配置
+    - SQLite文件库：WAL模式，写锁被占用时等待SQLITE_BUSY_TIMEOUT秒而不是立即报错，
+      可以被多个线程和多个抓取进程同时使用
+    - SQLite内存库：所有线程共用同一个连接，否则每个连接看到的都是各自的空库
+    """
+    config = Config()
+    url = make_url(url or config.DATABASE_URL)
+    if url.get_backend_name() != 'sqlite':
+        return create_engine(
+            url,
+            pool_size=config.DB_POOL_SIZE,
+            max_overflow=config.DB_MAX_OVERFLOW,
+            pool_timeout=config.DB_POOL_TIMEOUT,
+            pool_recycle=config.DB_POOL_RECYCLE
+        )
+
+    if is_sqlite_memory(url):
+        engine = create_engine(url, connect_args={'check_same_thread': False}, poolclass=StaticPool)
+    else:
+        engine = create_engine(
+            url,
+            connect_args={'check_same_thread': False, 'timeout': config.SQLITE_BUSY_TIMEOUT},
+            pool_size=config.DB_POOL_SIZE,
+            max_overflow=config.DB_MAX_OVERFLOW,
+            pool_timeout=config.DB_POOL_TIMEOUT
+        )
+    event.listen(engine, 'connect', _set_sqlite_pragmas)
+    return engine
@@ -1,17 +1,20 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, Date, DateTime, Text, ForeignKey, Boolean
+from sqlalchemy import create_engine, Column, Integer, String, Float, Numeric, Date, DateTime, Text, ForeignKey, Boolean, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
 Base = declarative_base()
 
+# 所有表使用InnoDB（行级锁，抓取写入和分析读取互不阻塞），表结构变更见migrations/
+TABLE_OPTIONS = {'mysql_engine': 'InnoDB', 'mysql_charset': 'utf8mb4', 'mysql_collate': 'utf8mb4_unicode_ci'}
+
 class Movie(Base):
     __tablename__ = 'movies'
     
     id = Column(Integer, primary_key=True)
     douban_id = Column(String(20), unique=True, nullable=False)
     name = Column(String(100), nullable=False)
-    rating = Column(Float)
+    rating = Column(Numeric(3, 1, asdecimal=False))  # 定点数，分页游标按评分比较时不受浮点误差影响
     director = Column(String(100))
     actors = Column(Text)
     genre = Column(String(100))
@@ -25,19 +28,127 @@ class Movie(Base):
     
     comments = relationship('Comment', back_populates='movie')
     analysis_result = relationship('AnalysisResult', back_populates='movie', uselist=False)
+    
+    __table_args__ = (
+        # 电影列表按这些列排序和筛选，id作为同值时的次序和分页游标的一部分
+        Index('ix_movies_rating_id', 'rating', 'id'),
+        Index('ix_movies_year_id', 'year', 'id'),
+        Index('ix_movies_name_id', 'name', 'id'),
+        Index('ix_movies_analyzed_id', 'analyzed', 'id'),
+        TABLE_OPTIONS,
+    )
+
+class Genre(Base):
+    __tablename__ = 'genres'
+    
+    id = Column(Integer, primary_key=True)
+    name = Column(String(50), nullable=False)
+    
+    __table_args__ = (
+        Index('uq_genres_name', 'name', unique=True),
+        TABLE_OPTIONS,
+    )
+
+class Person(Base):
+    __tablename__ = 'people'
+    
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100), nullable=False)
+    
+    __table_args__ = (
+        Index('uq_people_name', 'name', unique=True),
+        TABLE_OPTIONS,
+    )
+
+class MovieGenre(Base):
+    """电影与类型的关联，由Movie.genre拆分而来"""
+    __tablename__ = 'movie_genres'
+    
+    movie_id = Column(Integer, primary_key=True, autoincrement=False)  # movies.id
+    genre_id = Column(Integer, primary_key=True, autoincrement=False)
+    
+    __table_args__ = (
+        # 按类型筛选电影和统计各类型电影数
+        Index('ix_movie_genres_genre_id_movie_id', 'genre_id', 'movie_id'),
+        TABLE_OPTIONS,
+    )
+
+class MoviePerson(Base):
+    """电影与导演、演员的关联，由Movie.director和Movie.actors拆分而来"""
+    __tablename__ = 'movie_people'
+    
+    movie_id = Column(Integer, primary_key=True, autoincrement=False)  # movies.id
+    role = Column(String(20), primary_key=True)  # director/actor
+    person_id = Column(Integer, primary_key=True, autoincrement=False)
+    
+    __table_args__ = (
+        # 按导演或演员筛选电影
+        Index('ix_movie_people_person_id_role_movie_id', 'person_id', 'role', 'movie_id'),
+        TABLE_OPTIONS,
+    )
 
 class Comment(Base):
     __tablename__ = 'comments'
     
     id = Column(Integer, primary_key=True)
     movie_id = Column(Integer, ForeignKey('movies.id'))
-    user = Column(String(100, collation='utf8mb4_unicode_ci'))
-    comment_text = Column(Text(collation='utf8mb4_unicode_ci'))
-    sentiment = Column(String(20))
+    user = Column(String(100, collation='utf8mb4_unicode_ci').with_variant(String(100), 'sqlite'))
+    comment_text = Column(Text(collation='utf8mb4_unicode_ci').with_variant(Text(), 'sqlite'))
+    sentiment = Column(String(20))        # 情感倾向：正面/中性/负面
+    sentiment_score = Column(Float)       # SnowNLP情感得分
+    sentiment_version = Column(Integer)   # 打分时的模型版本，与当前版本不同时重新打分
+    search_version = Column(Integer)      # 建立全文索引时的分词版本，为空或过期时重新索引
     date = Column(DateTime)
     created_at = Column(DateTime, default=datetime.now)
     
     movie = relationship('Movie', back_populates='comments')
+    
+    __table_args__ = (
+        # 同一用户在同一时间对同一部电影只有一条短评，批量写入时据此去重
+        Index('uq_comments_movie_user_date', 'movie_id', 'user', 'date', unique=True),
+        # 按电影读取评论并按时间排序
+        Index('ix_comments_movie_id_date', 'movie_id', 'date'),
+        # 重新分析时查找未打分或版本过期的评论
+        Index('ix_comments_movie_id_sentiment_version', 'movie_id', 'sentiment_version'),
+        # 查找未建立全文索引或索引版本过期的评论
+        Index('ix_comments_movie_id_search_version', 'movie_id', 'search_version'),
+        TABLE_OPTIONS,
+    )
+
+class CommentTerm(Base):
+    """评论全文检索的倒排索引，每条评论中的每个词一行"""
+    __tablename__ = 'comment_terms'
+    
+    # 主键即倒排表：按(电影, 词)取出的记录已按词频、评论ID排好序，单个词的查询不用额外排序
+    movie_id = Column(Integer, primary_key=True)  # 与comments.movie_id一致，存放豆瓣电影ID
+    # 二进制排序规则，大小写、全半角不同的词不会被当成同一个词而违反主键
+    term = Column(String(50, collation='utf8mb4_bin').with_variant(String(50), 'sqlite'), primary_key=True)
+    tf = Column(Integer, primary_key=True, autoincrement=False)  # 词在评论中出现的次数
+    comment_id = Column(Integer, primary_key=True, autoincrement=False)
+    
+    __table_args__ = (
+        # 评论重新索引时删除旧的词
+        Index('ix_comment_terms_comment_id', 'comment_id'),
+        TABLE_OPTIONS,
+    )
+
+class CommentDailyStats(Base):
+    """每部电影每天的评论统计，保存和打分评论时增量更新，趋势查询只读这张表"""
+    __tablename__ = 'comment_daily_stats'
+    
+    movie_id = Column(Integer, primary_key=True, autoincrement=False)  # 与comments.movie_id一致，存放豆瓣电影ID
+    day = Column(Date, primary_key=True)
+    total_comments = Column(Integer, nullable=False, default=0)
+    positive_count = Column(Integer, nullable=False, default=0)
+    neutral_count = Column(Integer, nullable=False, default=0)
+    negative_count = Column(Integer, nullable=False, default=0)
+    scored_comments = Column(Integer, nullable=False, default=0)  # 有情感得分的评论数，平均分的分母
+    score_sum = Column(Float, nullable=False, default=0)
+    short_comments = Column(Integer, nullable=False, default=0)   # 小于50字
+    medium_comments = Column(Integer, nullable=False, default=0)  # 50-200字
+    long_comments = Column(Integer, nullable=False, default=0)    # 超过200字
+    
+    __table_args__ = TABLE_OPTIONS
 
 class AnalysisResult(Base):
     __tablename__ = 'analysis_results'
@@ -64,6 +175,12 @@ class AnalysisResult(Base):
     created_at = Column(DateTime, default=datetime.now)
     
     movie = relationship('Movie', back_populates='analysis_result')
+    
+    __table_args__ = (
+        # 每部电影只保留一份分析结果
+        Index('uq_analysis_results_movie_id', 'movie_id', unique=True),
+        TABLE_OPTIONS,
+    )
 
 class ProxyPool(Base):
     __tablename__ = 'proxy_pool'
@@ -74,4 +191,39 @@ class ProxyPool(Base):
     anonymity = Column(String(20))
     last_checked = Column(DateTime)
     created_at = Column(DateTime, default=datetime.now)
-    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now) 
\ No newline at end of file
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+    
+    __table_args__ = TABLE_OPTIONS
+
+class CrawlWatermark(Base):
+    __tablename__ = 'crawl_watermarks'
+    
+    # 与comments.movie_id一致，存放豆瓣电影ID
+    movie_id = Column(Integer, primary_key=True)
+    newest_date = Column(DateTime)
+    newest_user = Column(String(100))
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+    
+    __table_args__ = TABLE_OPTIONS
+
+class CrawlJob(Base):
+    __tablename__ = 'crawl_jobs'
+    
+    id = Column(Integer, primary_key=True)
+    douban_id = Column(String(20), unique=True, nullable=False)
+    status = Column(String(20), default='pending')   # pending/running/done/failed
+    stage = Column(String(20), default='detail')     # detail -> comments
+    cursor = Column(Integer, default=0)              # 下一个要抓取的评论页
+    max_pages = Column(Integer, default=5)
+    attempts = Column(Integer, default=0)
+    next_run_at = Column(DateTime, default=datetime.now)
+    locked_by = Column(String(100))
+    locked_at = Column(DateTime)
+    last_error = Column(Text)
+    created_at = Column(DateTime, default=datetime.now)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+    
+    __table_args__ = (
+        Index('ix_crawl_jobs_status_next_run_at', 'status', 'next_run_at'),
+        TABLE_OPTIONS,
+    )
@@ -0,0 +1,180 @@
+from typing import Dict, Any, Callable, Optional
+from collections import OrderedDict
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from config.config import Config
+
+class QueryCache:
+    """
+    数据库读结果缓存
+    进程内LRU，每个键单独指定TTL，由写方法按键精确失效。
+    启用共享后端时，结果同时写入本地sqlite文件，同一台机器上的多个进程
+    （Web应用和抓取任务进程）共用缓存；任一进程失效某个键会递增全局代数，
+    其他进程的进程内条目随之回到共享后端核对，不会读到已失效的结果
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, shared_path: Optional[str] = None):
+        """
+        :param max_entries: 进程内最多缓存的键数
+        :param shared_path: 共享后端的sqlite文件路径，None表示只用进程内缓存
+        """
+        config = Config()
+        self.logger = logging.getLogger(__name__)
+        self.max_entries = max_entries if max_entries is not None else config.QUERY_CACHE_SIZE
+        self.shared_path = shared_path
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()  # key -> (过期时间, 代数, 结果)
+        self._epoch = 0  # 进程内失效次数，查询期间发生失效时结果不写入缓存
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.counters = {'hits': 0, 'shared_hits': 0, 'misses': 0, 'invalidations': 0, 'evictions': 0}
+        if shared_path:
+            self._connection()
+
+    def _connection(self) -> sqlite3.Connection:
+        """每个线程使用独立的共享后端连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(self.shared_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.shared_path, isolation_level=None, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS query_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS query_cache_generation (
+                    id INTEGER PRIMARY KEY,
+                    generation INTEGER NOT NULL
+                )
+            ''')
+            conn.execute('INSERT OR IGNORE INTO query_cache_generation (id, generation) VALUES (1, 0)')
+            self._local.conn = conn
+        return conn
+
+    def _generation(self) -> int:
+        """共享后端的全局代数，未启用共享时恒为0"""
+        if not self.shared_path:
+            return 0
+        return self._connection().execute('SELECT generation FROM query_cache_generation WHERE id = 1').fetchone()[0]
+
+    def _count(self, counter: str):
+        with self._lock:
+            self.counters[counter] += 1
+
+    def get_or_load(self, key: str, loader: Callable[[], Any], ttl: float) -> Any:
+        """
+        获取缓存结果，未命中时调用loader查询并缓存
+        None不缓存（对象不存在或查询失败）。返回值与缓存共用，调用方不要修改
+        :param ttl: 该键的有效期(秒)，0表示不缓存
+        """
+        if ttl <= 0:
+            return loader()
+
+        generation = self._generation()
+        now = time.time()
+        with self._lock:
+            epoch = self._epoch
+            entry = self._entries.get(key)
+            if entry and entry[0] > now and entry[1] == generation:
+                self._entries.move_to_end(key)
+                self.counters['hits'] += 1
+                return entry[2]
+
+        if self.shared_path:
+            row = self._connection().execute(
+                'SELECT value, expires_at FROM query_cache WHERE key = ? AND expires_at > ?', (key, now)
+            ).fetchone()
+            if row:
+                value = json.loads(row[0])
+                self._store_local(key, row[1], generation, value, epoch)
+                self._count('shared_hits')
+                return value
+
+        self._count('misses')
+        value = loader()
+        if value is not None:
+            expires_at = time.time() + ttl
+            if self._store_shared(key, expires_at, generation, value):
+                self._store_local(key, expires_at, generation, value, epoch)
+        return value
+
+    def _store_shared(self, key: str, expires_at: float, generation: int, value: Any) -> bool:
+        """写入共享后端，查询期间其他进程做过失效时放弃写入"""
+        if not self.shared_path:
+            return True
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if self._generation() != generation:
+                conn.execute('ROLLBACK')
+                return False
+            conn.execute(
+                'INSERT OR REPLACE INTO query_cache (key, value, expires_at) VALUES (?, ?, ?)',
+                (key, json.dumps(value, ensure_ascii=False, default=str), expires_at)
+            )
+            conn.execute('COMMIT')
+            return True
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def _store_local(self, key: str, expires_at: float, generation: int, value: Any,
+                     epoch: Optional[int] = None):
+        """写入进程内缓存，超过容量时淘汰最久未访问的键"""
+        with self._lock:
+            if epoch is not None and epoch != self._epoch:
+                return
+            self._entries[key] = (expires_at, generation, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.counters['evictions'] += 1
+
+    def invalidate(self, *keys: str, broadcast: bool = True):
+        """
+        写入数据后使对应的键失效
+        :param broadcast: 是否递增共享后端的全局代数。全局代数会让其他进程的所有进程内条目
+                          回到共享后端核对，频繁写入且允许在TTL内短暂过时的键传False，
+                          只删除共享后端中的结果，其他进程已缓存的副本到期后再更新
+        """
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+            self._epoch += 1
+            self.counters['invalidations'] += len(keys)
+        if self.shared_path and keys:
+            conn = self._connection()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                conn.executemany('DELETE FROM query_cache WHERE key = ?', [(key,) for key in keys])
+                if broadcast:
+                    conn.execute('UPDATE query_cache_generation SET generation = generation + 1 WHERE id = 1')
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+
+    def clear(self):
+        """清空进程内缓存"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存统计"""
+        with self._lock:
+            stats = dict(self.counters)
+            stats['entries'] = len(self._entries)
+        stats['shared'] = bool(self.shared_path)
+        lookups = stats['hits'] + stats['shared_hits'] + stats['misses']
+        stats['hit_ratio'] = round((stats['hits'] + stats['shared_hits']) / lookups, 4) if lookups else 0.0
+        return stats
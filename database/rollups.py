@@ -0,0 +1,75 @@
+from typing import Dict, Any, Iterable, Mapping, Optional
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+# comment_daily_stats中的计数列，增量更新时按列累加
+ROLLUP_COLUMNS = (
+    'total_comments', 'positive_count', 'neutral_count', 'negative_count',
+    'scored_comments', 'score_sum', 'short_comments', 'medium_comments', 'long_comments'
+)
+
+SENTIMENT_COLUMNS = {'正面': 'positive_count', '中性': 'neutral_count', '负面': 'negative_count'}
+
+LENGTH_COLUMNS = {'short': 'short_comments', 'medium': 'medium_comments', 'long': 'long_comments'}
+
+GRANULARITIES = ('day', 'week', 'month')
+
+def length_bucket(text: Optional[str]) -> Optional[str]:
+    """评论长度分组：short小于50字，medium 50-200字，long超过200字；没有评论内容返回None"""
+    if not text:
+        return None
+    length = len(text.strip())
+    if length < 50:
+        return 'short'
+    if length < 200:
+        return 'medium'
+    return 'long'
+
+def new_daily_stats() -> Dict[date, Dict[str, float]]:
+    """按日期分组的计数，新日期各列从0开始"""
+    return defaultdict(lambda: dict.fromkeys(ROLLUP_COLUMNS, 0))
+
+def _day(comment_date: datetime) -> date:
+    """评论时间所在的日期"""
+    return comment_date.date() if isinstance(comment_date, datetime) else comment_date
+
+def add_sentiment(stats: Dict[date, Dict[str, float]], comment_date: Optional[datetime],
+                  sentiment: Optional[str], score: Optional[float], sign: int = 1):
+    """只计入（sign=-1时扣除）情感相关的列，打分前后相减时使用；空评论没有倾向和得分，不产生变化"""
+    if not comment_date:
+        return
+    day_stats = stats[_day(comment_date)]
+    if sentiment in SENTIMENT_COLUMNS:
+        day_stats[SENTIMENT_COLUMNS[sentiment]] += sign
+    if score is not None:
+        day_stats['scored_comments'] += sign
+        day_stats['score_sum'] += sign * score
+
+def add_comment(stats: Dict[date, Dict[str, float]], comment_date: Optional[datetime], text: Optional[str],
+                sentiment: Optional[str], score: Optional[float], sign: int = 1):
+    """
+    把一条评论计入（sign=-1时扣除）所在日期的计数
+    没有日期或没有内容的评论不计入，与分析结果中的评论总数口径一致
+    """
+    if not comment_date or not text:
+        return
+    day_stats = stats[_day(comment_date)]
+    day_stats['total_comments'] += sign
+    day_stats[LENGTH_COLUMNS[length_bucket(text)]] += sign
+    add_sentiment(stats, comment_date, sentiment, score, sign)
+
+def aggregate_by_day(comments: Iterable[Mapping[str, Any]]) -> Dict[date, Dict[str, float]]:
+    """按日期汇总评论，comments中每项包含date、comment_text、sentiment，可选sentiment_score"""
+    stats = new_daily_stats()
+    for comment in comments:
+        add_comment(stats, comment.get('date'), comment.get('comment_text'),
+                    comment.get('sentiment'), comment.get('sentiment_score'))
+    return stats
+
+def period_start(day: date, granularity: str) -> date:
+    """日期所在周期的第一天，周从周一开始"""
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
@@ -0,0 +1,47 @@
+import argparse
+import logging
+from database.db_manager import DatabaseManager
+
+def index_comments(args, db_manager: DatabaseManager):
+    """为已有评论建立全文索引（迁移后回填，或分词版本升级后重建）"""
+    movie_ids = [int(douban_id) for douban_id in args.douban_ids] or db_manager.get_unindexed_movie_ids()
+    total = 0
+    for movie_id in movie_ids:
+        indexed = db_manager.index_comments(movie_id)
+        total += indexed
+        print(f"电影 {movie_id}: 索引 {indexed} 条评论")
+    print(f"共索引 {total} 条评论，涉及 {len(movie_ids)} 部电影")
+
+def rebuild_daily_stats(args, db_manager: DatabaseManager):
+    """按评论表重建每日统计（迁移后回填，或修复偏差），应在抓取停止时执行"""
+    movie_ids = [int(douban_id) for douban_id in args.douban_ids] or db_manager.get_comment_movie_ids()
+    for movie_id in movie_ids:
+        days = db_manager.rebuild_daily_stats(movie_id)
+        print(f"电影 {movie_id}: {days} 天")
+    print(f"共重建 {len(movie_ids)} 部电影的每日统计")
+
+def rebuild_movie_dimensions(args, db_manager: DatabaseManager):
+    """按电影的类型、导演、演员字段重建关联表（迁移后回填）"""
+    print(f"共处理 {db_manager.rebuild_movie_dimensions()} 部电影")
+
+def main():
+    parser = argparse.ArgumentParser(description='数据库维护工具')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    index_parser = subparsers.add_parser('index-comments', help='回填评论全文索引')
+    index_parser.add_argument('douban_ids', nargs='*', help='豆瓣电影ID，不指定时处理所有有未索引评论的电影')
+    index_parser.set_defaults(func=index_comments)
+
+    stats_parser = subparsers.add_parser('rebuild-daily-stats', help='重建每日评论统计')
+    stats_parser.add_argument('douban_ids', nargs='*', help='豆瓣电影ID，不指定时处理所有有评论的电影')
+    stats_parser.set_defaults(func=rebuild_daily_stats)
+
+    dimensions_parser = subparsers.add_parser('rebuild-movie-dimensions', help='重建电影类型和人员关联')
+    dimensions_parser.set_defaults(func=rebuild_movie_dimensions)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    args.func(args, DatabaseManager())
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,61 @@
 import sys
+from logging.config import fileConfig
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
+from alembic import context
+
+from config.config import Config
+from database.engine import create_db_engine
 from database.models import Base
-target_metadata = Base.metadata 
\ No newline at end of file
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+def include_object(obj, name, type_, reflected, compare_to):
+    """
+    库中不建外键约束：comments.movie_id存放的是豆瓣ID，模型中的ForeignKey只用于ORM关联，
+    autogenerate时忽略，避免生成添加外键的迁移
+    """
+    return type_ != 'foreign_key_constraint'
+
+def get_url() -> str:
+    """命令行 -x url=... 优先，其次是应用配置中的连接串"""
+    return context.get_x_argument(as_dictionary=True).get('url') or Config.DATABASE_URL
+
+def run_migrations_offline():
+    """只生成SQL脚本，不连接数据库"""
+    context.configure(
+        url=get_url(),
+        target_metadata=target_metadata,
+        include_object=include_object,
+        literal_binds=True,
+        dialect_opts={'paramstyle': 'named'},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online():
+    """连接数据库执行迁移，SQLite连接与应用一样设置WAL和等锁超时"""
+    engine = create_db_engine(get_url())
+    try:
+        with engine.connect() as connection:
+            context.configure(
+                connection=connection,
+                target_metadata=target_metadata,
+                include_object=include_object,
+                # SQLite不支持大部分ALTER，autogenerate生成batch操作
+                render_as_batch=connection.dialect.name == 'sqlite'
+            )
+            with context.begin_transaction():
+                context.run_migrations()
+    finally:
+        engine.dispose()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
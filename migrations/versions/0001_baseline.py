@@ -0,0 +1,135 @@
+"""基线表结构
+
+与douban_movie.sql和此前create_all建出的表一致。
+已有数据库中存在的表直接跳过，新库按InnoDB建表
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 10:00:00
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+TABLE_OPTIONS = {'mysql_engine': 'InnoDB', 'mysql_charset': 'utf8mb4', 'mysql_collate': 'utf8mb4_unicode_ci'}
+
+def _existing_tables() -> set:
+    """已存在的表，离线生成SQL时视为空库"""
+    if context.is_offline_mode():
+        return set()
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+def upgrade():
+    existing = _existing_tables()
+
+    if 'movies' not in existing:
+        op.create_table(
+            'movies',
+            sa.Column('id', sa.Integer, primary_key=True),
+            sa.Column('douban_id', sa.String(20), nullable=False),
+            sa.Column('name', sa.String(100), nullable=False),
+            sa.Column('rating', sa.Float),
+            sa.Column('director', sa.String(100)),
+            sa.Column('actors', sa.Text),
+            sa.Column('genre', sa.String(100)),
+            sa.Column('release_date', sa.Date),
+            sa.Column('img_url', sa.String(255)),
+            sa.Column('year', sa.String(4)),
+            sa.Column('sub_title', sa.String(200)),
+            sa.Column('analyzed', sa.Boolean),
+            sa.Column('created_at', sa.DateTime),
+            sa.Column('updated_at', sa.DateTime),
+            sa.UniqueConstraint('douban_id', name='douban_id'),
+            **TABLE_OPTIONS
+        )
+
+    # comments.movie_id存放的是豆瓣ID而不是movies.id，不建外键约束
+    if 'comments' not in existing:
+        op.create_table(
+            'comments',
+            sa.Column('id', sa.Integer, primary_key=True),
+            sa.Column('movie_id', sa.Integer),
+            sa.Column('user', sa.String(100, collation='utf8mb4_unicode_ci').with_variant(sa.String(100), 'sqlite')),
+            sa.Column('comment_text', sa.Text(collation='utf8mb4_unicode_ci').with_variant(sa.Text(), 'sqlite')),
+            sa.Column('sentiment', sa.String(20)),
+            sa.Column('date', sa.DateTime),
+            sa.Column('created_at', sa.DateTime),
+            sa.Index('ix_comments_movie_id', 'movie_id'),
+            **TABLE_OPTIONS
+        )
+
+    if 'analysis_results' not in existing:
+        op.create_table(
+            'analysis_results',
+            sa.Column('id', sa.Integer, primary_key=True),
+            sa.Column('movie_id', sa.Integer),
+            sa.Column('wordcloud_path', sa.String(255)),
+            sa.Column('sentiment_chart_path', sa.String(255)),
+            sa.Column('time_dist_path', sa.String(255)),
+            sa.Column('length_dist_path', sa.String(255)),
+            sa.Column('positive_count', sa.Integer),
+            sa.Column('neutral_count', sa.Integer),
+            sa.Column('negative_count', sa.Integer),
+            sa.Column('total_comments', sa.Integer),
+            sa.Column('avg_sentiment_score', sa.Float),
+            sa.Column('short_comments', sa.Integer),
+            sa.Column('medium_comments', sa.Integer),
+            sa.Column('long_comments', sa.Integer),
+            sa.Column('top_words', sa.Text),
+            sa.Column('created_at', sa.DateTime),
+            sa.Index('ix_analysis_results_movie_id', 'movie_id'),
+            **TABLE_OPTIONS
+        )
+
+    if 'proxy_pool' not in existing:
+        op.create_table(
+            'proxy_pool',
+            sa.Column('id', sa.Integer, primary_key=True),
+            sa.Column('proxy', sa.String(100)),
+            sa.Column('protocol', sa.String(10)),
+            sa.Column('anonymity', sa.String(20)),
+            sa.Column('last_checked', sa.DateTime),
+            sa.Column('created_at', sa.DateTime),
+            sa.Column('updated_at', sa.DateTime),
+            sa.UniqueConstraint('proxy', name='proxy'),
+            **TABLE_OPTIONS
+        )
+
+    if 'crawl_watermarks' not in existing:
+        op.create_table(
+            'crawl_watermarks',
+            sa.Column('movie_id', sa.Integer, primary_key=True, autoincrement=False),
+            sa.Column('newest_date', sa.DateTime),
+            sa.Column('newest_user', sa.String(100)),
+            sa.Column('updated_at', sa.DateTime),
+            **TABLE_OPTIONS
+        )
+
+    if 'crawl_jobs' not in existing:
+        op.create_table(
+            'crawl_jobs',
+            sa.Column('id', sa.Integer, primary_key=True),
+            sa.Column('douban_id', sa.String(20), nullable=False),
+            sa.Column('status', sa.String(20)),
+            sa.Column('stage', sa.String(20)),
+            sa.Column('cursor', sa.Integer),
+            sa.Column('max_pages', sa.Integer),
+            sa.Column('attempts', sa.Integer),
+            sa.Column('next_run_at', sa.DateTime),
+            sa.Column('locked_by', sa.String(100)),
+            sa.Column('locked_at', sa.DateTime),
+            sa.Column('last_error', sa.Text),
+            sa.Column('created_at', sa.DateTime),
+            sa.Column('updated_at', sa.DateTime),
+            sa.UniqueConstraint('douban_id', name='douban_id'),
+            sa.Index('ix_crawl_jobs_status_next_run_at', 'status', 'next_run_at'),
+            **TABLE_OPTIONS
+        )
+
+def downgrade():
+    for table in ('crawl_jobs', 'crawl_watermarks', 'proxy_pool', 'analysis_results', 'comments', 'movies'):
+        op.drop_table(table)
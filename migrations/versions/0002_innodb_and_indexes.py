@@ -0,0 +1,99 @@
+"""改用InnoDB并补充热点查询的索引
+
+- 所有表改为InnoDB：MyISAM是表级锁，抓取写入评论时分析读取会被阻塞
+- comments增加(movie_id, date)索引，按电影取评论并按时间排序时不再回表排序
+- comments增加(movie_id, user, date)唯一键，批量INSERT IGNORE据此去重
+- analysis_results.movie_id改为唯一
+- 删除被上面两个复合索引覆盖的movie_id单列索引
+
+已有重复数据时先删除重复行再加唯一键：评论保留最早的一条，分析结果保留最新的一条。
+各步骤先检查当前结构，对已手动加过唯一键的库可以重复执行；
+离线生成SQL（--sql）时按0001新建的结构输出全部语句
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 10:30:00
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+TABLES = ('movies', 'comments', 'analysis_results', 'proxy_pool', 'crawl_watermarks', 'crawl_jobs')
+
+def _index_names(table: str) -> set:
+    """表上已有的索引和唯一约束名"""
+    if context.is_offline_mode():
+        return set()
+    inspector = sa.inspect(op.get_bind())
+    names = {index['name'] for index in inspector.get_indexes(table)}
+    names.update(constraint['name'] for constraint in inspector.get_unique_constraints(table))
+    return names
+
+def _movie_id_indexes(table: str) -> list:
+    """只包含movie_id一列的普通索引"""
+    if context.is_offline_mode():
+        return [f'ix_{table}_movie_id']
+    inspector = sa.inspect(op.get_bind())
+    return [
+        index['name'] for index in inspector.get_indexes(table)
+        if index['column_names'] == ['movie_id'] and not index['unique']
+    ]
+
+def _convert_to_innodb():
+    """把非InnoDB的表转为InnoDB"""
+    if context.is_offline_mode():
+        for table in TABLES:
+            op.execute(f'ALTER TABLE `{table}` ENGINE = InnoDB')
+        return
+    bind = op.get_bind()
+    for table in TABLES:
+        engine = bind.execute(sa.text(
+            'SELECT ENGINE FROM information_schema.TABLES '
+            'WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table'
+        ), {'table': table}).scalar()
+        if engine and engine.lower() != 'innodb':
+            op.execute(f'ALTER TABLE `{table}` ENGINE = InnoDB')
+
+def upgrade():
+    if op.get_bind().dialect.name == 'mysql':
+        _convert_to_innodb()
+
+    comment_indexes = _index_names('comments')
+    if 'uq_comments_movie_user_date' not in comment_indexes:
+        # 唯一键不约束含NULL的行，这些行不参与去重
+        op.execute(
+            'DELETE FROM comments '
+            'WHERE movie_id IS NOT NULL AND user IS NOT NULL AND date IS NOT NULL '
+            'AND id NOT IN (SELECT keep_id FROM ('
+            'SELECT MIN(id) AS keep_id FROM comments GROUP BY movie_id, user, date'
+            ') AS keep)'
+        )
+        op.create_index('uq_comments_movie_user_date', 'comments', ['movie_id', 'user', 'date'], unique=True)
+    if 'ix_comments_movie_id_date' not in comment_indexes:
+        op.create_index('ix_comments_movie_id_date', 'comments', ['movie_id', 'date'])
+
+    if 'uq_analysis_results_movie_id' not in _index_names('analysis_results'):
+        op.execute(
+            'DELETE FROM analysis_results '
+            'WHERE movie_id IS NOT NULL '
+            'AND id NOT IN (SELECT keep_id FROM ('
+            'SELECT MAX(id) AS keep_id FROM analysis_results GROUP BY movie_id'
+            ') AS keep)'
+        )
+        op.create_index('uq_analysis_results_movie_id', 'analysis_results', ['movie_id'], unique=True)
+
+    for table in ('comments', 'analysis_results'):
+        for name in _movie_id_indexes(table):
+            op.drop_index(name, table_name=table)
+
+def downgrade():
+    # 存储引擎不回退，MyISAM没有需要保留的特性
+    op.create_index('ix_analysis_results_movie_id', 'analysis_results', ['movie_id'])
+    op.drop_index('uq_analysis_results_movie_id', table_name='analysis_results')
+    op.create_index('ix_comments_movie_id', 'comments', ['movie_id'])
+    op.drop_index('ix_comments_movie_id_date', table_name='comments')
+    op.drop_index('uq_comments_movie_user_date', table_name='comments')
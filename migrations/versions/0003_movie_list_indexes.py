@@ -0,0 +1,37 @@
+"""电影列表分页和筛选的索引
+
+- movies增加(rating, id)、(year, id)、(name, id)、(analyzed, id)索引，
+  按评分、年份、名称排序或按分析状态筛选时沿索引翻页
+- movies.rating由FLOAT改为DECIMAL(3,1)：分页游标要按评分做相等比较，
+  单精度浮点数与游标中的值比较会漏掉同分的电影；豆瓣评分只有一位小数，转换不损失精度
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 14:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    ('ix_movies_rating_id', ['rating', 'id']),
+    ('ix_movies_year_id', ['year', 'id']),
+    ('ix_movies_name_id', ['name', 'id']),
+    ('ix_movies_analyzed_id', ['analyzed', 'id']),
+)
+
+def upgrade():
+    with op.batch_alter_table('movies') as batch_op:
+        batch_op.alter_column('rating', type_=sa.Numeric(3, 1), existing_type=sa.Float, existing_nullable=True)
+    for name, columns in INDEXES:
+        op.create_index(name, 'movies', columns)
+
+def downgrade():
+    for name, _ in INDEXES:
+        op.drop_index(name, table_name='movies')
+    with op.batch_alter_table('movies') as batch_op:
+        batch_op.alter_column('rating', type_=sa.Float, existing_type=sa.Numeric(3, 1), existing_nullable=True)
@@ -0,0 +1,27 @@
+"""保存每条评论的情感得分
+
+comments增加sentiment_score和sentiment_version，重新分析时只给未打分或
+打分模型版本过期的评论重新打分；(movie_id, sentiment_version)索引用于查找这些评论
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 16:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('comments', sa.Column('sentiment_score', sa.Float))
+    op.add_column('comments', sa.Column('sentiment_version', sa.Integer))
+    op.create_index('ix_comments_movie_id_sentiment_version', 'comments', ['movie_id', 'sentiment_version'])
+
+def downgrade():
+    op.drop_index('ix_comments_movie_id_sentiment_version', table_name='comments')
+    with op.batch_alter_table('comments') as batch_op:
+        batch_op.drop_column('sentiment_version')
+        batch_op.drop_column('sentiment_score')
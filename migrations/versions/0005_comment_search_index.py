@@ -0,0 +1,42 @@
+"""评论全文检索的倒排索引
+
+- 新增comment_terms：主键(movie_id, term, tf, comment_id)，按电影和词查倒排记录
+- comments增加search_version，(movie_id, search_version)索引用于查找未索引的评论
+
+选用jieba分词的倒排表而不是MySQL FULLTEXT ngram索引，SQLite库也能使用，
+分词结果与词云一致。已有评论在升级后执行 `python maintenance.py index-comments` 回填
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 18:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+TABLE_OPTIONS = {'mysql_engine': 'InnoDB', 'mysql_charset': 'utf8mb4', 'mysql_collate': 'utf8mb4_unicode_ci'}
+
+def upgrade():
+    op.add_column('comments', sa.Column('search_version', sa.Integer))
+    op.create_index('ix_comments_movie_id_search_version', 'comments', ['movie_id', 'search_version'])
+    op.create_table(
+        'comment_terms',
+        sa.Column('movie_id', sa.Integer, nullable=False),
+        sa.Column('term', sa.String(50, collation='utf8mb4_bin').with_variant(sa.String(50), 'sqlite'), nullable=False),
+        sa.Column('tf', sa.Integer, nullable=False, autoincrement=False),
+        sa.Column('comment_id', sa.Integer, nullable=False, autoincrement=False),
+        sa.PrimaryKeyConstraint('movie_id', 'term', 'tf', 'comment_id'),
+        **TABLE_OPTIONS
+    )
+    op.create_index('ix_comment_terms_comment_id', 'comment_terms', ['comment_id'])
+
+def downgrade():
+    op.drop_index('ix_comment_terms_comment_id', table_name='comment_terms')
+    op.drop_table('comment_terms')
+    op.drop_index('ix_comments_movie_id_search_version', table_name='comments')
+    with op.batch_alter_table('comments') as batch_op:
+        batch_op.drop_column('search_version')
@@ -0,0 +1,40 @@
+"""每部电影每天的评论统计
+
+新增comment_daily_stats，主键(movie_id, day)，保存和打分评论时增量更新，
+情感趋势接口按日期范围读取。已有评论在升级后执行
+`python maintenance.py rebuild-daily-stats` 回填
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 20:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+TABLE_OPTIONS = {'mysql_engine': 'InnoDB', 'mysql_charset': 'utf8mb4', 'mysql_collate': 'utf8mb4_unicode_ci'}
+
+def upgrade():
+    op.create_table(
+        'comment_daily_stats',
+        sa.Column('movie_id', sa.Integer, nullable=False, autoincrement=False),
+        sa.Column('day', sa.Date, nullable=False),
+        sa.Column('total_comments', sa.Integer, nullable=False),
+        sa.Column('positive_count', sa.Integer, nullable=False),
+        sa.Column('neutral_count', sa.Integer, nullable=False),
+        sa.Column('negative_count', sa.Integer, nullable=False),
+        sa.Column('scored_comments', sa.Integer, nullable=False),
+        sa.Column('score_sum', sa.Float, nullable=False),
+        sa.Column('short_comments', sa.Integer, nullable=False),
+        sa.Column('medium_comments', sa.Integer, nullable=False),
+        sa.Column('long_comments', sa.Integer, nullable=False),
+        sa.PrimaryKeyConstraint('movie_id', 'day'),
+        **TABLE_OPTIONS
+    )
+
+def downgrade():
+    op.drop_table('comment_daily_stats')
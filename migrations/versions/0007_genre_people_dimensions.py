@@ -0,0 +1,69 @@
+"""类型和人员维度表
+
+movies.genre、director、actors是用"/"拼接的字符串，按类型筛选只能LIKE '%类型%'，
+用不上索引且会匹配到子串。新增：
+- genres、people：名称唯一
+- movie_genres：主键(movie_id, genre_id)，(genre_id, movie_id)索引用于按类型筛选和统计
+- movie_people：主键(movie_id, role, person_id)，(person_id, role, movie_id)索引用于按导演、演员筛选
+
+原字符串列保留用于展示。已有电影在升级后执行 `python maintenance.py rebuild-movie-dimensions` 回填
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 22:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+TABLE_OPTIONS = {'mysql_engine': 'InnoDB', 'mysql_charset': 'utf8mb4', 'mysql_collate': 'utf8mb4_unicode_ci'}
+
+def upgrade():
+    op.create_table(
+        'genres',
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('name', sa.String(50), nullable=False),
+        **TABLE_OPTIONS
+    )
+    op.create_index('uq_genres_name', 'genres', ['name'], unique=True)
+
+    op.create_table(
+        'people',
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('name', sa.String(100), nullable=False),
+        **TABLE_OPTIONS
+    )
+    op.create_index('uq_people_name', 'people', ['name'], unique=True)
+
+    op.create_table(
+        'movie_genres',
+        sa.Column('movie_id', sa.Integer, nullable=False, autoincrement=False),
+        sa.Column('genre_id', sa.Integer, nullable=False, autoincrement=False),
+        sa.PrimaryKeyConstraint('movie_id', 'genre_id'),
+        **TABLE_OPTIONS
+    )
+    op.create_index('ix_movie_genres_genre_id_movie_id', 'movie_genres', ['genre_id', 'movie_id'])
+
+    op.create_table(
+        'movie_people',
+        sa.Column('movie_id', sa.Integer, nullable=False, autoincrement=False),
+        sa.Column('role', sa.String(20), nullable=False),
+        sa.Column('person_id', sa.Integer, nullable=False, autoincrement=False),
+        sa.PrimaryKeyConstraint('movie_id', 'role', 'person_id'),
+        **TABLE_OPTIONS
+    )
+    op.create_index('ix_movie_people_person_id_role_movie_id', 'movie_people', ['person_id', 'role', 'movie_id'])
+
+def downgrade():
+    op.drop_index('ix_movie_people_person_id_role_movie_id', table_name='movie_people')
+    op.drop_table('movie_people')
+    op.drop_index('ix_movie_genres_genre_id_movie_id', table_name='movie_genres')
+    op.drop_table('movie_genres')
+    op.drop_index('uq_people_name', table_name='people')
+    op.drop_table('people')
+    op.drop_index('uq_genres_name', table_name='genres')
+    op.drop_table('genres')
@@ -3,8 +3,13 @@ from flask_cors import CORS
 import logging
 from database.db_manager import DatabaseManager
 from crawler.movie_crawler import MovieCrawler
+from crawler.transport import get_transport
+from crawler.proxy_manager import start_proxy_pool
+from crawler.pipeline import BatchWriter
+from config.config import Config
 from analysis.sentiment import SentimentAnalyzer
 import os
+from datetime import date
 
 def create_app():
     app = Flask(__name__)
@@ -34,6 +39,9 @@ def create_app():
     movie_crawler = MovieCrawler(db_manager)
     analyzer = SentimentAnalyzer(db_manager)
     
+    # 启用代理池时在后台验证代理，爬虫请求自动经过代理
+    proxy_manager = start_proxy_pool(db_manager) if Config.PROXY_ENABLED else None
+    
     # 配置日志
     logging.basicConfig(level=logging.INFO)
     logger = logging.getLogger(__name__)
@@ -58,14 +66,55 @@ def create_app():
             logger.error(f"搜索电影失败: {str(e)}")
             return jsonify({'error': str(e)}), 500
     
+    @app.route('/api/search/details')
+    def get_search_details():
+        """获取搜索返回后才补全的电影详情"""
+        ids = [douban_id for douban_id in request.args.get('ids', '').split(',') if douban_id]
+        try:
+            return jsonify({'details': movie_crawler.get_enriched_details(ids)})
+        except Exception as e:
+            logger.error(f"获取搜索详情失败: {str(e)}")
+            return jsonify({'error': str(e)}), 500
+    
+    @app.route('/api/crawler/stats')
+    def get_crawler_stats():
+        """获取爬虫统计"""
+        stats = get_transport().stats()
+        stats['driver_pool'] = movie_crawler.driver_pool.stats()
+        stats['search_cache'] = movie_crawler.search_cache.stats()
+        if proxy_manager:
+            stats['proxies'] = proxy_manager.stats()
+        stats['query_cache'] = db_manager.query_cache.stats()
+        return jsonify(stats)
+    
     @app.route('/api/movies')
     def get_movies():
-        """获取已添加的电影列表"""
+        """
+        分页获取已添加的电影列表
+        参数: sort(id/rating/year/name)、order(desc/asc)、limit、cursor(上一页的next_cursor)、
+        min_rating、max_rating、genre、director、year、analyzed(1/0)
+        """
+        args = request.args
         try:
-            movies = db_manager.get_all_movies()
+            analyzed = args.get('analyzed')
+            page = db_manager.list_movies(
+                sort=args.get('sort', 'id'),
+                order=args.get('order', 'desc'),
+                limit=args.get('limit', type=int),
+                cursor=args.get('cursor') or None,
+                min_rating=args.get('min_rating', type=float),
+                max_rating=args.get('max_rating', type=float),
+                genre=args.get('genre') or None,
+                director=args.get('director') or None,
+                year=args.get('year') or None,
+                analyzed=None if analyzed in (None, '') else analyzed.lower() in ('1', 'true')
+            )
+            return jsonify(page)
+        except ValueError as e:
             return jsonify({
-                'movies': movies
-            })
+                'error': str(e),
+                'message': '参数错误'
+            }), 400
         except Exception as e:
             logger.error(f"获取电影列表失败: {str(e)}")
             return jsonify({
@@ -73,6 +122,79 @@ def create_app():
                 'message': '获取电影列表失败'
             }), 500
     
+    @app.route('/api/movies/filters')
+    def get_movie_filters():
+        """获取电影列表可选的年份和类型"""
+        try:
+            return jsonify(db_manager.get_movie_filters())
+        except Exception as e:
+            logger.error(f"获取筛选项失败: {str(e)}")
+            return jsonify({'error': str(e)}), 500
+    
+    @app.route('/api/movies/<string:douban_id>/comments/search')
+    def search_movie_comments(douban_id):
+        """
+        检索电影评论
+        参数: q(关键词，多个词时返回全部包含的评论)、page(从1开始)、limit
+        """
+        try:
+            result = db_manager.search_comments(
+                int(douban_id),
+                request.args.get('q', ''),
+                page=request.args.get('page', 1, type=int),
+                limit=request.args.get('limit', type=int)
+            )
+            return jsonify(result)
+        except ValueError as e:
+            return jsonify({
+                'error': str(e),
+                'message': '参数错误'
+            }), 400
+        except Exception as e:
+            logger.error(f"检索评论失败: {str(e)}")
+            return jsonify({
+                'error': str(e),
+                'message': '检索评论失败'
+            }), 500
+    
+    @app.route('/api/movies/<string:douban_id>/trend')
+    def get_sentiment_trend(douban_id):
+        """
+        获取评论数量和情感随时间的变化
+        参数: granularity(day/week/month)、start、end(YYYY-MM-DD，含当天)
+        """
+        args = request.args
+        try:
+            start = args.get('start')
+            end = args.get('end')
+            result = db_manager.get_sentiment_trend(
+                int(douban_id),
+                granularity=args.get('granularity', 'day'),
+                start=date.fromisoformat(start) if start else None,
+                end=date.fromisoformat(end) if end else None
+            )
+            return jsonify(result)
+        except ValueError as e:
+            return jsonify({
+                'error': str(e),
+                'message': '参数错误'
+            }), 400
+        except Exception as e:
+            logger.error(f"获取情感趋势失败: {str(e)}")
+            return jsonify({
+                'error': str(e),
+                'message': '获取情感趋势失败'
+            }), 500
+    
+    @app.route('/api/movies/genres')
+    def get_genre_counts():
+        """获取各类型的电影数"""
+        try:
+            return jsonify({'genres': db_manager.get_genre_counts()})
+        except Exception as e:
+            logger.error(f"获取类型统计失败: {str(e)}")
+            return jsonify({'error': str(e)}), 500
+    
     @app.route('/api/movies/add', methods=['POST'])
     def add_movie():
         """添加电影到数据库"""
@@ -99,9 +221,15 @@ def create_app():
     def analyze_movie(douban_id):
         """分析电影评论"""
         try:
-            # 获取评论并分析
-            comments = movie_crawler.get_movie_comments(douban_id)
-            db_manager.save_comments(comments, douban_id)
+            # 增量获取上次之后的新评论，边抓边分批写库
+            watermark = db_manager.get_comment_watermark(douban_id)
+            with BatchWriter(lambda batch: db_manager.save_comments(batch, douban_id)) as writer:
+                result = movie_crawler.stream_movie_comments(
+                    douban_id, writer.put, incremental=True, watermark=watermark
+                )
+            # 中途有页面失败、被反爬拦截或翻满页数仍未到达上次位置时不推进高水位，避免留下空档
+            if result['newest'] and result['complete']:
+                db_manager.update_comment_watermark(douban_id, [result['newest']])
             analysis_result = analyzer.analyze_movie(douban_id)
             
             return jsonify(analysis_result)
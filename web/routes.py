@@ -21,7 +21,7 @@ def search_movies():
                 'name': movie['name'],
                 'rating': movie['rating'],
                 'director': movie['director'],
-                'is_added': db_manager.check_movie_exists(movie['douban_id'])
+                'is_added': movie['is_added']
             } for movie in movies]
         })
     except Exception as e:
@@ -31,6 +31,9 @@ async function searchMovies() {
         // 显示搜索结果
         displaySearchResults(data.movies);
         
+        // 补全截止时间之后才返回的详情
+        pollSearchDetails(data.movies);
+        
         // 显示搜索结果数量
         if (data.movies.length > 0) {
             showToast(`找到 ${data.movies.length} 部相关电影`, 'success');
@@ -89,6 +92,7 @@ function displaySearchResults(movies) {
     movies.forEach(movie => {
         const card = document.createElement('div');
         card.className = 'movie-card';
+        card.dataset.doubanId = movie.douban_id;
         card.innerHTML = `
             <div class="card-img-container">
                 <img src="${movie.img || ''}" 
@@ -103,12 +107,12 @@ function displaySearchResults(movies) {
                     <span class="movie-rating">
                         ${typeof movie.rating === 'number' ? 
                           `<i class="fas fa-star"></i> ${movie.rating.toFixed(1)}` : 
-                          movie.rating}
+                          '暂无评分'}
                     </span>
                     <span class="movie-year">${movie.year || '年份未知'}</span>
                 </div>
                 <p class="card-text">
-                    导演：${movie.director || '未知'}<br>
+                    导演：<span class="movie-director">${movie.director || '未知'}</span><br>
                     ${movie.sub_title || ''}
                 </p>
                 ${movie.is_added ? 
@@ -123,6 +127,45 @@ function displaySearchResults(movies) {
     });
 }
 
+// 轮询搜索返回后才补全的详情
+async function pollSearchDetails(movies, attempts = 3) {
+    let pending = movies.filter(movie => movie.enriching).map(movie => movie.douban_id);
+    
+    for (let i = 0; i < attempts && pending.length > 0; i++) {
+        await new Promise(resolve => setTimeout(resolve, 1500));
+        try {
+            const response = await fetch(`/api/search/details?ids=${pending.join(',')}`);
+            if (!response.ok) {
+                return;
+            }
+            const data = await response.json();
+            
+            Object.entries(data.details).forEach(([doubanId, detail]) => {
+                updateSearchCard(doubanId, detail);
+            });
+            pending = pending.filter(doubanId => !(doubanId in data.details));
+        } catch (error) {
+            console.error('获取电影详情失败:', error);
+            return;
+        }
+    }
+}
+
+// 更新搜索结果卡片的评分和导演
+function updateSearchCard(doubanId, detail) {
+    const card = document.querySelector(`#searchResults .movie-card[data-douban-id="${doubanId}"]`);
+    if (!card) {
+        return;
+    }
+    
+    if (typeof detail.rating === 'number') {
+        card.querySelector('.movie-rating').innerHTML = `<i class="fas fa-star"></i> ${detail.rating.toFixed(1)}`;
+    }
+    if (detail.director) {
+        card.querySelector('.movie-director').textContent = detail.director;
+    }
+}
+
 // 添加电影
 async function addMovie(doubanId) {
     const button = event.target;
@@ -257,58 +300,48 @@ function displayAnalysisResults(results) {
     `;
 }
 
-// 存储所有电影数据
-let allMovies = [];
+// 当前筛选条件和下一页游标
+let movieQuery = '';
+let nextCursor = null;
 
 // 初始化筛选选项
-async function initializeFilters(movies) {
-    allMovies = movies;
+async function initializeFilters() {
+    const response = await fetch('/api/movies/filters');
+    const data = await response.json();
     
-    // 获取所有年份
-    const years = [...new Set(movies.filter(m => m.year).map(m => m.year))].sort().reverse();
     const yearSelect = document.getElementById('yearFilter');
     yearSelect.innerHTML = '<option value="">全部年份</option>' + 
-        years.map(year => `<option value="${year}">${year}</option>`).join('');
+        data.years.map(year => `<option value="${year}">${year}</option>`).join('');
     
-    // 获取所有类型
-    const genres = [...new Set(movies.filter(m => m.genre).map(m => m.genre.split('/')).flat())];
     const genreSelect = document.getElementById('genreFilter');
     genreSelect.innerHTML = '<option value="">全部类型</option>' + 
-        genres.map(genre => `<option value="${genre}">${genre}</option>`).join('');
+        data.genres.map(genre => `<option value="${genre}">${genre}</option>`).join('');
 }
 
-// 应用筛选
-function applyFilters() {
-    const minRating = parseFloat(document.getElementById('minRating').value) || 0;
-    const maxRating = parseFloat(document.getElementById('maxRating').value) || 10;
+// 根据筛选面板构造查询参数，筛选和排序在服务端完成
+function buildMovieQuery() {
+    const params = new URLSearchParams();
+    const minRating = document.getElementById('minRating').value;
+    const maxRating = document.getElementById('maxRating').value;
     const genre = document.getElementById('genreFilter').value;
     const year = document.getElementById('yearFilter').value;
+    const analyzed = document.getElementById('analyzedFilter').value;
     const sortBy = document.getElementById('sortBy').value;
     
-    // 筛选电影
-    let filteredMovies = allMovies.filter(movie => {
-        const ratingMatch = (!movie.rating || (movie.rating >= minRating && movie.rating <= maxRating));
-        const genreMatch = !genre || (movie.genre && movie.genre.includes(genre));
-        const yearMatch = !year || movie.year === year;
-        return ratingMatch && genreMatch && yearMatch;
-    });
-    
-    // 排序
-    filteredMovies.sort((a, b) => {
-        switch(sortBy) {
-            case 'rating':
-                return (b.rating || 0) - (a.rating || 0);
-            case 'year':
-                return (b.year || '') > (a.year || '') ? -1 : 1;
-            case 'name':
-                return a.name.localeCompare(b.name, 'zh-CN');
-            default:
-                return 0;
-        }
-    });
-    
-    // 显示筛选结果
-    displayMoviesList(filteredMovies);
+    if (minRating) params.set('min_rating', minRating);
+    if (maxRating) params.set('max_rating', maxRating);
+    if (genre) params.set('genre', genre);
+    if (year) params.set('year', year);
+    if (analyzed) params.set('analyzed', analyzed);
+    params.set('sort', sortBy);
+    params.set('order', sortBy === 'name' ? 'asc' : 'desc');
+    return params.toString();
+}
+
+// 应用筛选
+function applyFilters() {
+    movieQuery = buildMovieQuery();
+    loadMoviesPage(false);
 }
 
 // 重置筛选
@@ -317,52 +350,76 @@ function resetFilters() {
     document.getElementById('maxRating').value = '';
     document.getElementById('genreFilter').value = '';
     document.getElementById('yearFilter').value = '';
+    document.getElementById('analyzedFilter').value = '';
     document.getElementById('sortBy').value = 'rating';
     
-    displayMoviesList(allMovies);
+    applyFilters();
 }
 
-// 修改 loadMoviesList 函数
-async function loadMoviesList() {
+// 加载一页电影，append为true时接在已显示的列表后面
+async function loadMoviesPage(append) {
+    const container = document.getElementById('moviesList');
+    const loadMoreBtn = document.getElementById('loadMoreMovies');
     try {
-        const container = document.getElementById('moviesList');
-        container.innerHTML = `
-            <div class="search-loading">
-                <div class="spinner"></div>
-                <p>正在加载电影列表...</p>
-            </div>
-        `;
+        if (append) {
+            loadMoreBtn.disabled = true;
+        } else {
+            container.innerHTML = `
+                <div class="search-loading">
+                    <div class="spinner"></div>
+                    <p>正在加载电影列表...</p>
+                </div>
+            `;
+        }
         
-        const response = await fetch('/api/movies');
+        const cursor = append && nextCursor ? `&cursor=${encodeURIComponent(nextCursor)}` : '';
+        const response = await fetch(`/api/movies?${movieQuery}${cursor}`);
         const data = await response.json();
+        if (!response.ok) {
+            throw new Error(data.message || '加载电影列表失败');
+        }
         
-        if (data.movies.length === 0) {
+        if (!append && data.movies.length === 0) {
             container.innerHTML = `
                 <div class="col-12 text-center py-5">
                     <i class="fas fa-film fa-3x text-muted mb-3"></i>
-                    <h5 class="text-muted">还没有添加任何电影</h5>
-                    <p class="text-muted">去搜索页面添加一些电影吧</p>
+                    <h5 class="text-muted">没有符合条件的电影</h5>
+                    <p class="text-muted">去搜索页面添加一些电影，或调整筛选条件</p>
                 </div>
             `;
-            return;
+        } else {
+            displayMoviesList(data.movies, append);
         }
         
-        // 显示电影列表
-        displayMoviesList(data.movies);
-        
-        // 初始化筛选选项
-        initializeFilters(data.movies);
-        
+        nextCursor = data.next_cursor;
+        loadMoreBtn.style.display = nextCursor ? '' : 'none';
     } catch (error) {
         console.error('加载电影列表失败:', error);
         showToast('加载电影列表失败，请稍后重试', 'error');
+    } finally {
+        loadMoreBtn.disabled = false;
     }
 }
 
+// 加载下一页
+function loadMoreMovies() {
+    loadMoviesPage(true);
+}
+
+// 修改 loadMoviesList 函数
+async function loadMoviesList() {
+    applyFilters();
+    
+    // 初始化筛选选项
+    initializeFilters().catch(error => console.error('加载筛选项失败:', error));
+}
+
 // 显示电影列表
-function displayMoviesList(movies) {
+function displayMoviesList(movies, append = false) {
     const container = document.getElementById('moviesList');
-    container.innerHTML = '';
+    if (!append) {
+        container.innerHTML = '';
+    }
     
     movies.forEach(movie => {
         const card = document.createElement('div');